@@ -0,0 +1,166 @@
+"""
+============================================================================
+CLASIFICACIÓN MASIVA DE PUNTOS
+Etiqueta lotes de puntos (país / polígono) con los motores de simulación
+============================================================================
+"""
+
+import io
+import json
+
+import numpy as np
+
+from config import MOTOR_CLASIFICACION_MASIVA, MAX_PUNTOS_CLASIFICACION
+from nucleo_montecarlo.config import TAMANO_LOTE
+from nucleo_montecarlo.point_classifier import obtener_indice, clasificar_puntos
+from nucleo_montecarlo.cancelacion import verificar_cancelacion
+
+
+# Formatos de entrada aceptados (Content-Type)
+TIPO_JSON = "application/json"
+TIPO_NPY = "application/x-npy"
+TIPO_ARROW = "application/vnd.apache.arrow.stream"
+
+
+def leer_puntos(contenido, tipo_contenido):
+    """
+    Decodifica un lote de puntos.
+
+    Formatos:
+        - JSON: {"x": [...], "y": [...]} o {"puntos": [[x, y], ...]}
+        - NumPy .npy: arreglo (N, 2)
+        - Arrow IPC stream: columnas "x" e "y" (requiere pyarrow)
+
+    Returns:
+        tupla (x, y) de arreglos float64
+
+    Raises:
+        ValueError: si el formato no es soportado o el contenido es inválido
+    """
+    tipo = (tipo_contenido or TIPO_JSON).split(';')[0].strip()
+
+    if tipo == TIPO_JSON:
+        datos = json.loads(contenido)
+        if not isinstance(datos, dict) or not ('puntos' in datos or ('x' in datos and 'y' in datos)):
+            raise ValueError('El JSON debe ser un objeto {"x": [...], "y": [...]} o {"puntos": [[x, y], ...]}')
+        if 'puntos' in datos:
+            puntos = np.asarray(datos['puntos'], dtype=np.float64).reshape(-1, 2)
+            x, y = puntos[:, 0], puntos[:, 1]
+        else:
+            x = np.asarray(datos['x'], dtype=np.float64)
+            y = np.asarray(datos['y'], dtype=np.float64)
+    elif tipo in (TIPO_NPY, "application/octet-stream"):
+        puntos = np.load(io.BytesIO(contenido), allow_pickle=False)
+        if puntos.ndim != 2 or puntos.shape[1] != 2:
+            raise ValueError("El arreglo .npy debe tener forma (N, 2)")
+        x = puntos[:, 0].astype(np.float64)
+        y = puntos[:, 1].astype(np.float64)
+    elif tipo == TIPO_ARROW:
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ValueError("El formato Arrow requiere pyarrow instalado en el servidor")
+        tabla = pa.ipc.open_stream(contenido).read_all()
+        x = tabla.column('x').to_numpy().astype(np.float64)
+        y = tabla.column('y').to_numpy().astype(np.float64)
+    else:
+        raise ValueError(f"Formato no soportado: {tipo}")
+
+    if x.ndim != 1 or x.shape != y.shape:
+        raise ValueError("x e y deben tener la misma longitud")
+    if len(x) > MAX_PUNTOS_CLASIFICACION:
+        raise ValueError(f"Máximo {MAX_PUNTOS_CLASIFICACION:,} puntos por petición")
+
+    return x, y
+
+
+def _clasificar_lonlat(geo_info, lon, lat, motor):
+    """Proyecta puntos lon/lat al sistema del objetivo y los clasifica."""
+    px, py = geo_info['transformador'].transform(lon, lat)
+    return clasificar_puntos(motor, obtener_indice(geo_info, motor), px, py)
+
+
+def _clasificar_objetivo(geo_info, x, y, coordenadas, motor):
+    """Máscara de pertenencia de los puntos a un objetivo (país o polígono)."""
+    if coordenadas == 'lonlat':
+        # Filtro previo por bbox geográfico: solo se proyectan los candidatos
+        geo = geo_info['coords_geo']
+        candidatos = np.flatnonzero(
+            (x >= geo['min_lon']) & (x <= geo['max_lon']) &
+            (y >= geo['min_lat']) & (y <= geo['max_lat'])
+        )
+        dentro = np.zeros(len(x), dtype=bool)
+        if len(candidatos):
+            dentro[candidatos] = _clasificar_lonlat(geo_info, x[candidatos], y[candidatos], motor)
+        return dentro
+
+    return clasificar_puntos(motor, obtener_indice(geo_info, motor), x, y)
+
+
+def _bbox_objetivos(objetivos):
+    """Arreglo (n_objetivos, 4) con min_lon, max_lon, min_lat, max_lat de cada objetivo."""
+    return np.array([[geo['min_lon'], geo['max_lon'], geo['min_lat'], geo['max_lat']]
+                     for geo in (geo_info['coords_geo'] for geo_info in objetivos)])
+
+
+def _clasificar_por_bbox(bboxes, objetivos, x, y, ids, motor):
+    """
+    Asigna ids a un lote en lon/lat probando cada punto solo contra los
+    objetivos cuyo bbox lo contiene, en orden de id para que gane el primero.
+
+    Los puntos se ordenan por longitud una vez por lote: los candidatos de
+    cada objetivo son un rango contiguo (searchsorted) filtrado por latitud,
+    sin recorrer el lote completo por cada objetivo.
+    """
+    orden = np.argsort(x, kind='stable')
+    x_ordenado = x[orden]
+    desde = np.searchsorted(x_ordenado, bboxes[:, 0], side='left')
+    hasta = np.searchsorted(x_ordenado, bboxes[:, 1], side='right')
+
+    for id_objetivo, (min_lon, max_lon, min_lat, max_lat) in enumerate(bboxes):
+        candidatos = orden[desde[id_objetivo]:hasta[id_objetivo]]
+        candidatos = candidatos[(y[candidatos] >= min_lat) & (y[candidatos] <= max_lat) & (ids[candidatos] == -1)]
+        if len(candidatos):
+            dentro = _clasificar_lonlat(objetivos[id_objetivo], x[candidatos], y[candidatos], motor)
+            ids[candidatos[dentro]] = id_objetivo
+
+
+def clasificar_lote(x, y, objetivos, coordenadas='lonlat', motor=MOTOR_CLASIFICACION_MASIVA, cancelacion=None):
+    """
+    Asigna a cada punto el id del primer objetivo que lo contiene.
+
+    Args:
+        x, y: arreglos de coordenadas (lon/lat en grados, o metros en la
+            proyección del objetivo si coordenadas='proyectadas')
+        objetivos: lista de geo_info (geometrías proyectadas cacheadas)
+        coordenadas: 'lonlat' o 'proyectadas' (solo con un objetivo)
+        motor: motor de clasificación
+        cancelacion: token de cancelación, revisado entre lotes
+
+    Returns:
+        ndarray int16 con el índice del objetivo, o -1 si ningún objetivo
+        contiene al punto
+    """
+    if coordenadas not in ('lonlat', 'proyectadas'):
+        raise ValueError("coordenadas debe ser 'lonlat' o 'proyectadas'")
+    if coordenadas == 'proyectadas' and len(objetivos) != 1:
+        raise ValueError("Las coordenadas proyectadas solo se admiten con un único objetivo")
+
+    ids = np.full(len(x), -1, dtype=np.int16)
+    # Con varios objetivos, el filtro por bbox evita recorrer el lote por cada uno
+    bboxes = _bbox_objetivos(objetivos) if coordenadas == 'lonlat' and len(objetivos) > 1 else None
+
+    for inicio in range(0, len(x), TAMANO_LOTE):
+        verificar_cancelacion(cancelacion, inicio)
+        lote = slice(inicio, inicio + TAMANO_LOTE)
+        x_lote, y_lote = x[lote], y[lote]
+        ids_lote = ids[lote]
+
+        if bboxes is not None:
+            _clasificar_por_bbox(bboxes, objetivos, x_lote, y_lote, ids_lote, motor)
+            continue
+
+        dentro = _clasificar_objetivo(objetivos[0], x_lote, y_lote, coordenadas, motor)
+        ids_lote[dentro] = 0
+
+    return ids
@@ -0,0 +1,97 @@
+"""
+============================================================================
+CUOTAS POR CLIENTE
+Presupuesto de puntos por cliente para que nadie acapare los hilos de
+cómputo del servidor
+============================================================================
+"""
+
+import threading
+import time
+
+from config import CUOTA_PUNTOS_POR_MINUTO, MAX_PUNTOS_EN_CURSO
+
+
+class CuotaExcedida(Exception):
+    """El cliente agotó su cuota; 'espera' son los segundos sugeridos antes de reintentar."""
+
+    def __init__(self, mensaje, espera):
+        super().__init__(mensaje)
+        self.espera = espera
+
+
+# cliente -> {'saldo': puntos disponibles, 'en_curso': puntos reservados,
+#             'actualizado': instante de la última recarga}
+_clientes = {}
+_lock = threading.Lock()
+
+
+def _recargar(estado, ahora):
+    """Cubeta de fichas: el saldo se recupera a CUOTA_PUNTOS_POR_MINUTO por minuto."""
+    transcurrido = ahora - estado['actualizado']
+    estado['saldo'] = min(CUOTA_PUNTOS_POR_MINUTO, estado['saldo'] + transcurrido * CUOTA_PUNTOS_POR_MINUTO / 60)
+    estado['actualizado'] = ahora
+
+
+def _purgar(ahora):
+    """Olvida a los clientes sin trabajo en curso y con la cubeta llena."""
+    for cliente in list(_clientes):
+        estado = _clientes[cliente]
+        _recargar(estado, ahora)
+        if estado['en_curso'] == 0 and estado['saldo'] >= CUOTA_PUNTOS_POR_MINUTO:
+            del _clientes[cliente]
+
+
+def reservar_puntos(cliente, n_puntos):
+    """
+    Descuenta n_puntos de la cuota del cliente antes de empezar a calcular.
+
+    Raises:
+        CuotaExcedida: si el cliente ya tiene demasiados puntos en curso o
+            no le queda saldo suficiente en la cubeta
+    """
+    with _lock:
+        ahora = time.monotonic()
+        _purgar(ahora)
+        estado = _clientes.setdefault(
+            cliente, {'saldo': CUOTA_PUNTOS_POR_MINUTO, 'en_curso': 0, 'actualizado': ahora}
+        )
+
+        if estado['en_curso'] + n_puntos > MAX_PUNTOS_EN_CURSO:
+            raise CuotaExcedida(
+                f"Demasiados puntos en curso para este cliente (máximo {MAX_PUNTOS_EN_CURSO:,})", 1
+            )
+
+        necesarios = min(n_puntos, CUOTA_PUNTOS_POR_MINUTO)
+        if estado['saldo'] < necesarios:
+            espera = (necesarios - estado['saldo']) * 60 / CUOTA_PUNTOS_POR_MINUTO
+            raise CuotaExcedida(
+                f"Cuota de puntos agotada ({CUOTA_PUNTOS_POR_MINUTO:,} por minuto)", espera
+            )
+
+        estado['saldo'] -= necesarios
+        estado['en_curso'] += n_puntos
+
+
+def liberar_puntos(cliente, n_puntos, puntos_usados=None):
+    """
+    Termina una reserva. Si el cálculo se canceló, los puntos que no llegó a
+    procesar (n_puntos - puntos_usados) vuelven al saldo del cliente.
+    """
+    with _lock:
+        estado = _clientes.get(cliente)
+        if estado is None:
+            return
+        estado['en_curso'] = max(0, estado['en_curso'] - n_puntos)
+        if puntos_usados is not None and puntos_usados < n_puntos:
+            estado['saldo'] = min(CUOTA_PUNTOS_POR_MINUTO, estado['saldo'] + n_puntos - puntos_usados)
+
+
+def estado_cliente(cliente):
+    """Saldo y puntos en curso de un cliente (para diagnóstico)."""
+    with _lock:
+        estado = _clientes.get(cliente)
+        if estado is None:
+            return {'saldo': CUOTA_PUNTOS_POR_MINUTO, 'en_curso': 0}
+        _recargar(estado, time.monotonic())
+        return {'saldo': int(estado['saldo']), 'en_curso': estado['en_curso']}
@@ -1,52 +1,69 @@
 """
 ============================================================================
-CONFIGURACIÓN DEL PROYECTO
-Constantes y configuraciones globales
+CONFIGURACIÓN DEL BACKEND
+Constantes de la API (límites, cachés y formatos de respuesta)
 ============================================================================
 """
 
-# Lista de países de Sudamérica (nombres en inglés como aparecen en Natural Earth)
-PAISES_SUDAMERICA = [
-    "Argentina",
-    "Bolivia",
-    "Brazil",
-    "Chile",
-    "Colombia",
-    "Ecuador",
-    "Guyana",
-    "Paraguay",
-    "Peru",
-    "Suriname",
-    "Uruguay",
-    "Venezuela"
-]
-
-# Áreas reales de referencia en km² (Fuente: Banco Mundial / Wikipedia)
-AREAS_REALES_KM2 = {
-    "Argentina": 2780400,
-    "Bolivia": 1098581,
-    "Brazil": 8515770,
-    "Chile": 756102,
-    "Colombia": 1138910,
-    "Ecuador": 283561,
-    "Guyana": 214969,
-    "Paraguay": 406752,
-    "Peru": 1285216,
-    "Suriname": 165940,
-    "Uruguay": 176215,
-    "Venezuela": 916445
-}
-
-# URL de datos geográficos
-URL_MAPA = "https://naciscdn.org/naturalearth/110m/cultural/ne_110m_admin_0_countries.zip"
-
-# Configuración de proyección
-PROYECCION_PRINCIPAL = "ESRI:102033"
-PROYECCION_ALTERNATIVA = "EPSG:32718"
-
-# Configuración de caché
-DATA_CACHE_PATH = "data/countries.gpkg"
-
-# Configuración de visualización
-# MAX_PUNTOS_VIZ = 50000 # para limitar el número de puntos visibles
-MAX_PUNTOS_VIZ = float('inf') # para deshabilitar el límite
+import os
+
+# Las constantes de la simulación (países, áreas de referencia, motores,
+# muestreadores, estimadores y rutas de datos) están en nucleo_montecarlo.config
+
+# Clasificación con el motor más rápido, usado por /clasificar
+MOTOR_CLASIFICACION_MASIVA = "vectorizado"
+
+# Polígonos personalizados (endpoint /poligonos)
+MAX_VERTICES_POLIGONO = 200_000
+MAX_BYTES_POLIGONO = 10_000_000
+MAX_BYTES_CUERPO_POLIGONO = 14_000_000 # cuerpo de /poligonos: el WKB máximo en base64 (4/3) más el JSON que lo envuelve
+MAX_POLIGONOS_CACHE = 256 # polígonos proyectados que se mantienen en memoria (LRU)
+
+# Clasificación masiva de puntos (endpoint /clasificar)
+MAX_PUNTOS_CLASIFICACION = 20_000_000 # como MAX_PUNTOS_EN_CURSO: cuenta en la cuota del cliente
+MAX_BYTES_CLASIFICACION = 400_000_000 # cuerpo de la petición; (N, 2) float64 .npy con el máximo de puntos = 320 MB
+
+# Estimación multirregión (endpoint /simular_regiones)
+MAX_REGIONES_CACHE = 16 # conjuntos de países con proyección común cacheada (LRU)
+RESOLUCION_RASTER_REGIONES = 256 # celdas por eje del ráster etiquetado de países
+
+# Formatos de respuesta de /simular (ver response_formats.FORMATOS)
+MAX_RESULTADOS_CACHE = 16 # resultados recientes guardados para servir sus imágenes por URL (LRU)
+MEMORIA_RESULTADOS_MB = 1024 # tope de los puntos de visualización, conteos e índices de teselas retenidos por esos resultados
+TAMANO_MINIMO_COMPRESION = 1024 # bytes; respuestas menores se envían sin comprimir
+
+# Salida vectorial (formato "vectorial", dibujada en el navegador)
+TOLERANCIA_CONTORNO_VECTORIAL_M = 2_000 # tolerancia del contorno simplificado
+MAX_PUNTOS_VECTORIAL = 100_000 # puntos de la muestra cuantizada
+ANCHO_VIEWBOX_SVG = 1000 # ancho del viewBox de la ruta SVG (el alto conserva la proporción)
+
+# Teselas de densidad (/resultados/{id}/teselas/{z}/{x}/{y}.png)
+NIVEL_INDICE_TESELAS = 10 # celdas por eje = 2^nivel; los zooms 0..nivel-8 salen de los conteos de todos los puntos
+ZOOM_MAXIMO_TESELAS = 16
+MAX_TESELAS_CACHE = 1024 # teselas PNG generadas que se mantienen en memoria (LRU)
+
+# Renderizado de imágenes (display.py)
+PROCESOS_RENDER = 2 # procesos dedicados a matplotlib; 0 = renderizar en el proceso del servidor
+MAX_PLANTILLAS_RENDER = 32 # figuras base por país que conserva cada proceso (LRU)
+
+# Refinamiento incremental (/simulaciones/{id}/extender)
+# Estadísticas suficientes de cada corrida (JSON), junto al backend y no
+# relativas al directorio desde el que se inicia el servidor
+DIRECTORIO_SIMULACIONES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "simulaciones")
+
+# Presupuesto de cómputo por solicitud (simulaciones, regiones y extensiones)
+PLAZO_SIMULACION_S = 120 # plazo máximo de un cálculo en el servidor; None = sin plazo
+INTERVALO_DESCONEXION_S = 0.25 # cada cuánto se revisa si el cliente sigue conectado
+CUOTA_PUNTOS_POR_MINUTO = 100_000_000 # puntos por cliente y minuto (cubeta de fichas)
+MAX_PUNTOS_EN_CURSO = 20_000_000 # puntos de un mismo cliente calculándose a la vez
+
+# Presupuesto de memoria (memory_budget.py)
+MEMORIA_MAXIMA_SOLICITUD_MB = 1024 # estimación máxima de una solicitud; por encima se degrada o se rechaza (400)
+MEMORIA_NODO_MB = 4096 # suma de las estimaciones de las solicitudes en curso; por encima, 503
+MAX_PUNTOS_VIZ_DEGRADADO = 200_000 # puntos de visualización que guarda una solicitud degradada
+INTERVALO_MUESTREO_RSS_S = 0.01 # período de muestreo del RSS con ?perfil_memoria=
+
+# Precalentamiento al iniciar (warmup.py; /ready responde 503 hasta que termina)
+PRECALENTAR_PAISES = None # nombres de Natural Earth; None = todos los países del dataset
+PRECALENTAR_MOTORES = ["shapely", "vectorizado"] # el motor por defecto y el de /clasificar
+GENERAR_TABLA_NIVELES = True # generar la tabla de /niveles_detalle si falta algún nivel con datos locales
@@ -0,0 +1,122 @@
+"""
+============================================================================
+POLÍGONOS PERSONALIZADOS
+Carga, validación y caché por hash de regiones definidas por el usuario
+============================================================================
+"""
+
+import base64
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import geopandas as gpd
+import shapely
+from shapely.geometry import shape
+
+from config import MAX_BYTES_POLIGONO, MAX_VERTICES_POLIGONO, MAX_POLIGONOS_CACHE
+from nucleo_montecarlo.geometry_processor import proyectar_y_calcular_bbox
+
+
+# Caché LRU: hash del contenido -> geo_info (geometría proyectada + índices);
+# se usa desde los hilos del pool de FastAPI
+_cache_poligonos = OrderedDict()
+_lock = threading.Lock()
+
+
+def _geometria_desde_geojson(geojson):
+    """Acepta una geometría, un Feature o un FeatureCollection de GeoJSON."""
+    tipo = geojson.get('type')
+    if tipo == 'FeatureCollection':
+        return shapely.union_all([shape(f['geometry']) for f in geojson.get('features', [])])
+    if tipo == 'Feature':
+        return shape(geojson['geometry'])
+    return shape(geojson)
+
+
+def leer_poligono(geojson=None, wkb_base64=None):
+    """
+    Convierte la entrada del usuario en un polígono WGS84 validado.
+
+    Raises:
+        ValueError: si la entrada falta, excede los límites o no es un
+            polígono válido en coordenadas geográficas
+    """
+    if (geojson is None) == (wkb_base64 is None):
+        raise ValueError("Debe enviar exactamente uno de 'geojson' o 'wkb_base64'")
+
+    try:
+        if wkb_base64 is not None:
+            datos = base64.b64decode(wkb_base64, validate=True)
+            if len(datos) > MAX_BYTES_POLIGONO:
+                raise ValueError(f"El WKB excede el tamaño máximo ({MAX_BYTES_POLIGONO:,} bytes)")
+            geometria = shapely.from_wkb(datos)
+        else:
+            if len(json.dumps(geojson)) > MAX_BYTES_POLIGONO:
+                raise ValueError(f"El GeoJSON excede el tamaño máximo ({MAX_BYTES_POLIGONO:,} bytes)")
+            geometria = _geometria_desde_geojson(geojson)
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"Geometría ilegible: {e}")
+
+    if geometria.is_empty or geometria.geom_type not in ('Polygon', 'MultiPolygon'):
+        raise ValueError("La geometría debe ser un Polygon o MultiPolygon no vacío")
+
+    n_vertices = shapely.get_num_coordinates(geometria)
+    if n_vertices > MAX_VERTICES_POLIGONO:
+        raise ValueError(f"El polígono tiene {n_vertices:,} vértices (máximo {MAX_VERTICES_POLIGONO:,})")
+
+    min_lon, min_lat, max_lon, max_lat = geometria.bounds
+    if min_lon < -180 or max_lon > 180 or min_lat < -90 or max_lat > 90:
+        raise ValueError("Las coordenadas deben estar en grados WGS84 (lon, lat)")
+
+    if not geometria.is_valid:
+        raise ValueError(f"Polígono inválido: {shapely.is_valid_reason(geometria)}")
+
+    return geometria
+
+
+def hash_poligono(geometria):
+    """Hash del contenido: WKB de la geometría normalizada (independiente del orden de anillos)."""
+    return hashlib.sha256(shapely.to_wkb(shapely.normalize(geometria))).hexdigest()
+
+
+def registrar_poligono(geometria):
+    """
+    Proyecta y cachea un polígono bajo el hash de su contenido. Si ya estaba
+    registrado se reutiliza su geometría proyectada y sus índices.
+
+    Returns:
+        tupla (poligono_id, geo_info)
+    """
+    poligono_id = hash_poligono(geometria)
+
+    geo_info = obtener_poligono(poligono_id)
+    if geo_info is not None:
+        return poligono_id, geo_info
+
+    # La proyección se hace fuera del lock; si otro hilo registró el mismo
+    # polígono mientras tanto, se conserva el suyo
+    pais_gdf = gpd.GeoDataFrame(geometry=[geometria], crs="EPSG:4326")
+    geo_info = proyectar_y_calcular_bbox(pais_gdf, poligono_id)
+    geo_info['pais_gdf'] = pais_gdf
+    geo_info['indices'] = {}
+
+    with _lock:
+        geo_info = _cache_poligonos.setdefault(poligono_id, geo_info)
+        _cache_poligonos.move_to_end(poligono_id)
+        while len(_cache_poligonos) > MAX_POLIGONOS_CACHE:
+            _cache_poligonos.popitem(last=False)
+
+    return poligono_id, geo_info
+
+
+def obtener_poligono(poligono_id):
+    """Devuelve el geo_info cacheado de un polígono, o None si no existe."""
+    with _lock:
+        geo_info = _cache_poligonos.get(poligono_id)
+        if geo_info is not None:
+            _cache_poligonos.move_to_end(poligono_id)
+        return geo_info
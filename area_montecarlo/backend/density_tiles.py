@@ -0,0 +1,235 @@
+"""
+============================================================================
+TESELAS DE DENSIDAD
+Teselas XYZ con el conteo de puntos de una simulación, para hacer zoom
+sobre nubes de millones de puntos sin dibujarlos con matplotlib
+============================================================================
+"""
+
+import io
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.image as mpimg
+
+from config import NIVEL_INDICE_TESELAS, ZOOM_MAXIMO_TESELAS, MAX_TESELAS_CACHE
+from result_store import adjuntar_teselas
+
+# Lado de una tesela en píxeles
+TAMANO_TESELA = 256
+ZOOM_PIRAMIDE = NIVEL_INDICE_TESELAS - 8 # zooms servidos desde los conteos precalculados
+
+COLOR_DENTRO = np.array([46, 160, 67], dtype=np.float32)
+COLOR_FUERA = np.array([214, 39, 40], dtype=np.float32)
+
+# Caché LRU: (resultado_id, z, x, y) -> PNG; se usa desde los hilos del pool
+_cache_teselas = OrderedDict()
+_lock = threading.Lock()
+
+
+def _separar_bits(v):
+    """Intercala ceros entre los bits de v (< 2^16) para construir códigos de Morton."""
+    v = np.asarray(v, dtype=np.uint32)
+    v = (v | (v << 8)) & 0x00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F
+    v = (v | (v << 2)) & 0x33333333
+    v = (v | (v << 1)) & 0x55555555
+    return v
+
+
+def _codigo_morton(columna, fila):
+    return _separar_bits(columna) | (_separar_bits(fila) << 1)
+
+
+def _normalizar(x, y, bbox):
+    """Coordenadas normalizadas a [0, 1) en float32 sobre el cuadrado que cubre el bbox, con v hacia abajo."""
+    min_x, min_y, max_x, max_y = bbox
+    lado = max(max_x - min_x, max_y - min_y)
+    limite = np.nextafter(np.float32(1), np.float32(0))
+    u = np.clip(((np.asarray(x) - min_x) / lado).astype(np.float32), 0, limite)
+    v = np.clip(((max_y - np.asarray(y)) / lado).astype(np.float32), 0, limite)
+    return u, v
+
+
+def _celdas(u, v):
+    """(columna, fila) de la celda del índice (2^NIVEL por eje) de cada punto."""
+    celdas = 1 << NIVEL_INDICE_TESELAS
+    columna = np.minimum((u * celdas).astype(np.int64), celdas - 1)
+    fila = np.minimum((v * celdas).astype(np.int64), celdas - 1)
+    return columna, fila
+
+
+def crear_conteos_teselas(bbox):
+    """
+    Grilla vacía de conteos dentro/fuera (2^NIVEL celdas por eje) para
+    acumular lote a lote con acumular_conteos, p. ej. como 'acumular' de
+    simulacion_montecarlo: así las teselas de zoom <= ZOOM_PIRAMIDE cuentan
+    todos los puntos de la corrida y no solo los guardados para visualizar.
+    """
+    celdas = 1 << NIVEL_INDICE_TESELAS
+    return {
+        'bbox': tuple(bbox),
+        'grilla': np.zeros((2, celdas, celdas), dtype=np.uint32),
+        'n_puntos': 0
+    }
+
+
+def acumular_conteos(conteos, x, y, dentro):
+    """Suma a la grilla los puntos de un lote (coordenadas proyectadas absolutas)."""
+    columna, fila = _celdas(*_normalizar(x, y, conteos['bbox']))
+    celdas = 1 << NIVEL_INDICE_TESELAS
+    plano = fila * celdas + columna
+    grilla = conteos['grilla'].reshape(2, celdas * celdas)
+    np.add(grilla[0], np.bincount(plano[dentro], minlength=celdas * celdas), out=grilla[0], casting='unsafe')
+    np.add(grilla[1], np.bincount(plano[~dentro], minlength=celdas * celdas), out=grilla[1], casting='unsafe')
+    conteos['n_puntos'] += len(plano)
+
+
+def construir_indice_teselas(resultados, conteos=None):
+    """
+    Indexa los puntos de visualización de una simulación sobre un cuadrado
+    que cubre el bbox (origen arriba a la izquierda, como en XYZ).
+
+    - Conteos dentro/fuera en una grilla de 2^NIVEL celdas por eje y su
+      pirámide (sumas 2x2): las teselas de zoom <= ZOOM_PIRAMIDE son
+      recortes directos de estas grillas. Si se pasan los 'conteos'
+      acumulados durante la simulación (ver crear_conteos_teselas), la
+      pirámide parte de ellos y refleja los N puntos; si no, de los puntos
+      de visualización.
+    - Puntos ordenados por código de Morton de su celda: toda tesela de
+      zoom mayor corresponde a un rango contiguo de códigos, que se ubica
+      con searchsorted sin recorrer la nube completa.
+    """
+    x = np.concatenate([resultados['puntos_dentro_x'], resultados['puntos_fuera_x']])
+    y = np.concatenate([resultados['puntos_dentro_y'], resultados['puntos_fuera_y']])
+    dentro = np.zeros(len(x), dtype=bool)
+    dentro[:len(resultados['puntos_dentro_x'])] = True
+
+    u, v = _normalizar(x, y, resultados['bbox'])
+    columna, fila = _celdas(u, v)
+
+    if conteos is None:
+        conteos = crear_conteos_teselas(resultados['bbox'])
+        acumular_conteos(conteos, x, y, dentro)
+
+    # Pirámide de conteos (fila, columna)
+    piramide = {}
+    grilla = conteos['grilla']
+    piramide[ZOOM_PIRAMIDE] = grilla
+    for zoom in range(ZOOM_PIRAMIDE - 1, -1, -1):
+        n = grilla.shape[1] // 2
+        grilla = grilla.reshape(2, n, 2, n, 2).sum(axis=(2, 4), dtype=np.uint32)
+        piramide[zoom] = grilla
+
+    codigos = _codigo_morton(columna, fila)
+    orden = np.argsort(codigos, kind='stable')
+
+    return {
+        'codigos': codigos[orden],
+        'u': u[orden],
+        'v': v[orden],
+        'dentro': dentro[orden],
+        'piramide': piramide,
+        'n_puntos_piramide': conteos['n_puntos'],
+        'n_puntos': len(x)
+    }
+
+
+def conteos_tesela(indice, z, x, y):
+    """
+    Conteos (dentro, fuera) por píxel de la tesela (z, x, y).
+
+    Returns:
+        ndarray uint32 de forma (2, TAMANO_TESELA, TAMANO_TESELA)
+    """
+    if z <= ZOOM_PIRAMIDE:
+        grilla = indice['piramide'][z]
+        fila, columna = y * TAMANO_TESELA, x * TAMANO_TESELA
+        return grilla[:, fila:fila + TAMANO_TESELA, columna:columna + TAMANO_TESELA]
+
+    # Rango de códigos de la celda del índice que contiene a la tesela
+    if z <= NIVEL_INDICE_TESELAS:
+        desplazamiento = 2 * (NIVEL_INDICE_TESELAS - z)
+        prefijo = int(_codigo_morton(x, y))
+    else:
+        desplazamiento = 0
+        prefijo = int(_codigo_morton(x >> (z - NIVEL_INDICE_TESELAS), y >> (z - NIVEL_INDICE_TESELAS)))
+    inicio, fin = np.searchsorted(indice['codigos'], [prefijo << desplazamiento, (prefijo + 1) << desplazamiento])
+
+    escala = (1 << z) * TAMANO_TESELA
+    px = np.floor(indice['u'][inicio:fin].astype(np.float64) * escala).astype(np.int64) - x * TAMANO_TESELA
+    py = np.floor(indice['v'][inicio:fin].astype(np.float64) * escala).astype(np.int64) - y * TAMANO_TESELA
+    dentro = indice['dentro'][inicio:fin]
+
+    validos = (px >= 0) & (px < TAMANO_TESELA) & (py >= 0) & (py < TAMANO_TESELA)
+    pixel = py[validos] * TAMANO_TESELA + px[validos]
+    dentro = dentro[validos]
+    n_pixeles = TAMANO_TESELA * TAMANO_TESELA
+    return np.stack([
+        np.bincount(pixel[dentro], minlength=n_pixeles),
+        np.bincount(pixel[~dentro], minlength=n_pixeles)
+    ]).astype(np.uint32).reshape(2, TAMANO_TESELA, TAMANO_TESELA)
+
+
+def renderizar_tesela(conteos, densidad_esperada):
+    """
+    PNG RGBA: el color mezcla verde (dentro) y rojo (fuera) según la
+    proporción de cada píxel; la opacidad crece con log(conteo) relativo a
+    la densidad media esperada en ese zoom, para que teselas vecinas usen
+    la misma escala.
+    """
+    dentro = conteos[0].astype(np.float32)
+    total = dentro + conteos[1]
+    fraccion = np.divide(dentro, total, out=np.zeros_like(total), where=total > 0)
+
+    rgba = np.zeros((TAMANO_TESELA, TAMANO_TESELA, 4), dtype=np.uint8)
+    rgba[..., :3] = (fraccion[..., None] * COLOR_DENTRO + (1 - fraccion[..., None]) * COLOR_FUERA).astype(np.uint8)
+    alfa = np.log1p(total) / np.log1p(4 * densidad_esperada + 1)
+    rgba[..., 3] = (np.clip(alfa, 0, 1) * 255).astype(np.uint8)
+
+    buf = io.BytesIO()
+    mpimg.imsave(buf, rgba, format='png')
+    return buf.getvalue()
+
+
+def obtener_tesela(resultado_id, datos, z, x, y):
+    """
+    PNG de la tesela (z, x, y) de un resultado guardado. El índice de la
+    nube se construye con la primera tesela pedida, sobre los conteos
+    acumulados durante la simulación si los hay, y se guarda junto al
+    resultado (su tamaño cuenta en el tope del almacén); las teselas ya
+    generadas se sirven desde la caché LRU.
+
+    Raises:
+        ValueError: si la tesela está fuera de rango
+    """
+    if not 0 <= z <= ZOOM_MAXIMO_TESELAS:
+        raise ValueError(f"Zoom fuera de rango (0-{ZOOM_MAXIMO_TESELAS})")
+    if not (0 <= x < (1 << z) and 0 <= y < (1 << z)):
+        raise ValueError("Tesela fuera de rango para ese zoom")
+
+    clave = (resultado_id, z, x, y)
+    with _lock:
+        if clave in _cache_teselas:
+            _cache_teselas.move_to_end(clave)
+            return _cache_teselas[clave]
+
+    indice = datos.get('teselas')
+    if indice is None:
+        indice = adjuntar_teselas(resultado_id, datos,
+                                  construir_indice_teselas(datos['resultados'], datos.get('conteos_teselas')))
+
+    # Los zooms de la pirámide cuentan todos los puntos acumulados; los
+    # demás, solo los guardados para visualizar
+    n_puntos = indice['n_puntos_piramide'] if z <= ZOOM_PIRAMIDE else indice['n_puntos']
+    densidad_esperada = n_puntos / ((1 << z) * TAMANO_TESELA) ** 2
+    png = renderizar_tesela(conteos_tesela(indice, z, x, y), densidad_esperada)
+
+    with _lock:
+        _cache_teselas[clave] = png
+        while len(_cache_teselas) > MAX_TESELAS_CACHE:
+            _cache_teselas.popitem(last=False)
+    return png
@@ -5,83 +5,251 @@ Funciones para generar gráficos y visualizaciones
 ============================================================================
 """
 
+import atexit
 import base64
 import io
+import multiprocessing
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
 import matplotlib
 matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.patches import Rectangle
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 
+from config import PROCESOS_RENDER, MAX_PLANTILLAS_RENDER
+from nucleo_montecarlo.config import NIVEL_DETALLE_POR_DEFECTO
+
+
+# Plantillas por proceso: clave -> figura con polígono, bbox y estilo ya
+# dibujados. Cada solicitud solo agrega los puntos y el título. Con la
+# plantilla en caché el proceso no necesita la geometría: se le envía solo
+# cuando responde None (ver _ejecutar).
+_plantillas = OrderedDict()
+
+# Pool de procesos de renderizado (se crea al primer uso)
+_pool = None
+_lock_pool = threading.Lock()
+# Sin pool (PROCESOS_RENDER = 0) se renderiza en este proceso, de a uno
+_lock_render = threading.Lock()
+
+
+def _nueva_figura(figsize):
+    """Figura con canvas Agg propio, sin pasar por el estado global de pyplot."""
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _a_base64(fig):
+    buf = io.BytesIO()
+    fig.canvas.print_png(buf)
+    return base64.b64encode(buf.getvalue()).decode('utf-8')
+
+
+def _guardar_plantilla(clave, plantilla):
+    _plantillas[clave] = plantilla
+    while len(_plantillas) > MAX_PLANTILLAS_RENDER:
+        _plantillas.popitem(last=False)
+    return plantilla
+
+
+def _renderizar_previa(pais_gdf, nombre_pais, nivel_detalle):
+    """
+    La vista previa no cambia entre solicitudes: se guarda ya renderizada.
+    Devuelve None si no está en caché y no se envió pais_gdf.
+    """
+    clave = ('previa', nombre_pais, nivel_detalle)
+    if clave in _plantillas:
+        _plantillas.move_to_end(clave)
+        return _plantillas[clave]
+    if pais_gdf is None:
+        return None
+
+    fig = _nueva_figura((8, 8))
+    ax = fig.add_subplot()
 
-def generar_visualizacion_previa(pais_gdf, nombre_pais):
-    """Genera visualización previa en coordenadas geográficas."""
-    fig, ax = plt.subplots(figsize=(8, 8))
-    
     pais_gdf.plot(ax=ax, color='#667eea', edgecolor='#333333', linewidth=2, alpha=0.8)
-    
-    ax.set_title(f"Vista Geográfica: {nombre_pais}\n(WGS84 - Grados)", 
+
+    ax.set_title(f"Vista Geográfica: {nombre_pais}\n(WGS84 - Grados)",
                 fontsize=14, fontweight='bold', pad=20)
     ax.set_xlabel("Longitud", fontsize=11)
     ax.set_ylabel("Latitud", fontsize=11)
     ax.grid(True, linestyle='--', alpha=0.3, color='#999')
     ax.set_aspect('equal')
-    
-    plt.tight_layout()
-    
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', dpi=100, bbox_inches='tight')
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.read()).decode('utf-8')
-    plt.close()
-    
-    return img_base64
 
+    fig.tight_layout()
+
+    return _guardar_plantilla(clave, _a_base64(fig))
+
+
+def _plantilla_simulacion(pais_proyectado, nombre_pais, bbox, nivel_detalle):
+    """
+    Figura con el polígono proyectado, el bbox, ejes y límites fijos, o
+    None si no está en caché y no se envió pais_proyectado.
+    """
+    clave = ('simulacion', nombre_pais, tuple(bbox), nivel_detalle)
+    if clave in _plantillas:
+        _plantillas.move_to_end(clave)
+        return _plantillas[clave]
+    if pais_proyectado is None:
+        return None
 
-def generar_visualizacion_simulacion(pais_proyectado, nombre_pais, resultados, area_real):
-    """Genera visualización de la simulación Monte Carlo."""
-    bbox = resultados['bbox']
     min_x, min_y, max_x, max_y = bbox
     ancho = max_x - min_x
     alto = max_y - min_y
-    
-    fig, ax = plt.subplots(figsize=(12, 10))
-    
-    pais_proyectado.plot(ax=ax, color='#667eea', edgecolor='#333333', 
+
+    fig = _nueva_figura((12, 10))
+    ax = fig.add_subplot()
+
+    pais_proyectado.plot(ax=ax, color='#667eea', edgecolor='#333333',
                           linewidth=2, alpha=0.7)
-    
-    rect = plt.Rectangle((min_x, min_y), ancho, alto,
-                         linewidth=2, edgecolor='#ff6b6b', facecolor='none',
-                         linestyle='--', label='Bounding Box')
+
+    rect = Rectangle((min_x, min_y), ancho, alto,
+                     linewidth=2, edgecolor='#ff6b6b', facecolor='none',
+                     linestyle='--', label='Bounding Box')
     ax.add_patch(rect)
-    
-    if resultados['puntos_dentro_x']:
-        ax.scatter(resultados['puntos_dentro_x'], resultados['puntos_dentro_y'],
-                  color='green', s=2, alpha=0.5, label='Puntos dentro')
-    
-    if resultados['puntos_fuera_x']:
-        ax.scatter(resultados['puntos_fuera_x'], resultados['puntos_fuera_y'],
-                  color='red', s=1, alpha=0.3, label='Puntos fuera')
-    
-    area_estimada = resultados['area_estimada_km2']
-    error = abs(area_estimada - area_real) / area_real * 100 if area_real > 0 else 0
-    
-    ax.set_title(f"Simulación de Monte Carlo - {nombre_pais}\n"
-                f"N = {resultados['n_puntos']:,} puntos | "
-                f"Área estimada: {area_estimada:,.2f} km² | "
-                f"Error: {error:.2f}%",
-                fontsize=14, fontweight='bold')
-    
+
     ax.set_xlabel("Coordenada X (metros)", fontsize=11)
     ax.set_ylabel("Coordenada Y (metros)", fontsize=11)
     ax.grid(True, alpha=0.3)
-    
+
     ax.ticklabel_format(style='plain', axis='both')
-    
-    plt.tight_layout()
-    
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', dpi=100)
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.read()).decode('utf-8')
-    plt.close()
-    
-    return img_base64
+
+    # Los puntos caen dentro del bbox: los límites no dependen de la solicitud
+    ax.autoscale_view()
+    ax.set_autoscale_on(False)
+    ax.set_title("\n", fontsize=14, fontweight='bold')
+    fig.tight_layout()
+
+    return _guardar_plantilla(clave, fig)
+
+
+def _renderizar_simulacion(pais_proyectado, nombre_pais, bbox, nivel_detalle, puntos, titulo):
+    """
+    Agrega los puntos y el título a la plantilla, renderiza y los retira.
+    Devuelve None si falta la plantilla y no se envió pais_proyectado.
+    """
+    fig = _plantilla_simulacion(pais_proyectado, nombre_pais, bbox, nivel_detalle)
+    if fig is None:
+        return None
+    ax = fig.axes[0]
+
+    dentro_x, dentro_y, fuera_x, fuera_y = puntos
+    artistas = []
+
+    if len(dentro_x):
+        artistas.append(ax.scatter(dentro_x, dentro_y,
+                                   color='green', s=2, alpha=0.5, label='Puntos dentro'))
+
+    if len(fuera_x):
+        artistas.append(ax.scatter(fuera_x, fuera_y,
+                                   color='red', s=1, alpha=0.3, label='Puntos fuera'))
+
+    ax.set_title(titulo, fontsize=14, fontweight='bold')
+
+    try:
+        return _a_base64(fig)
+    finally:
+        for artista in artistas:
+            artista.remove()
+
+
+def _obtener_pool(roto=None):
+    """
+    Pool de procesos de renderizado, creado al primer uso. Si se indica el
+    pool 'roto' y sigue siendo el actual, se reemplaza por uno nuevo (otro
+    hilo pudo haberlo reemplazado ya).
+    """
+    global _pool
+
+    with _lock_pool:
+        if _pool is not None and _pool is roto:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        if _pool is None:
+            # 'spawn' evita heredar hilos y locks del servidor al hacer fork
+            _pool = ProcessPoolExecutor(max_workers=PROCESOS_RENDER,
+                                        mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def _ejecutar_en_pool(pool, funcion, geometria, *args):
+    """
+    Al pool se envía primero sin la geometría (serializar el GeoDataFrame
+    cuesta más que renderizar sobre una plantilla en caché); solo si el
+    proceso que la recibe no tiene la plantilla y devuelve None se reenvía
+    con ella.
+    """
+    resultado = pool.submit(funcion, None, *args).result()
+    if resultado is None:
+        resultado = pool.submit(funcion, geometria, *args).result()
+    return resultado
+
+
+def _ejecutar(funcion, geometria, *args):
+    """
+    Renderiza funcion(geometria, *args) en el pool de procesos o, si está
+    deshabilitado, aquí con un lock.
+
+    Si un proceso del pool muere (memoria, falla de matplotlib o GEOS), el
+    pool queda roto y rechaza todo lo que se le envíe: se reemplaza y se
+    reintenta una vez; si vuelve a fallar se renderiza en este proceso.
+    """
+    if PROCESOS_RENDER > 0:
+        pool = _obtener_pool()
+        try:
+            return _ejecutar_en_pool(pool, funcion, geometria, *args)
+        except BrokenProcessPool:
+            pool = _obtener_pool(roto=pool)
+        try:
+            return _ejecutar_en_pool(pool, funcion, geometria, *args)
+        except BrokenProcessPool:
+            _obtener_pool(roto=pool)
+            print("ERROR: el pool de renderizado falló dos veces; se renderiza en el proceso del servidor",
+                  file=sys.stderr)
+
+    with _lock_render:
+        return funcion(geometria, *args)
+
+
+@atexit.register
+def cerrar_pool():
+    """Detiene los procesos de renderizado."""
+    global _pool
+    with _lock_pool:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+def generar_visualizacion_previa(pais_gdf, nombre_pais, nivel_detalle=NIVEL_DETALLE_POR_DEFECTO):
+    """Genera visualización previa en coordenadas geográficas."""
+    return _ejecutar(_renderizar_previa, pais_gdf, nombre_pais, nivel_detalle)
+
+
+def generar_visualizacion_simulacion(pais_proyectado, nombre_pais, resultados, area_real,
+                                     nivel_detalle=NIVEL_DETALLE_POR_DEFECTO):
+    """Genera visualización de la simulación Monte Carlo."""
+    area_estimada = resultados['area_estimada_km2']
+    error = abs(area_estimada - area_real) / area_real * 100 if area_real > 0 else 0
+
+    titulo = (f"Simulación de Monte Carlo - {nombre_pais}\n"
+              f"N = {resultados['n_puntos']:,} puntos | "
+              f"Área estimada: {area_estimada:,.2f} km² | "
+              f"Error: {error:.2f}%")
+
+    # Arreglos en vez de listas: se envían al proceso de renderizado sin
+    # serializar cada float por separado
+    puntos = tuple(
+        np.asarray(resultados[clave], dtype=np.float64)
+        for clave in ('puntos_dentro_x', 'puntos_dentro_y', 'puntos_fuera_x', 'puntos_fuera_y')
+    )
+
+    return _ejecutar(_renderizar_simulacion, pais_proyectado, nombre_pais,
+                     tuple(resultados['bbox']), nivel_detalle, puntos, titulo)
@@ -0,0 +1,477 @@
+"""
+============================================================================
+PRUEBA DE CARGA
+Generador de carga HTTP para la API: rendimiento, latencias p50/p95/p99,
+errores y tiempos por etapa del servidor, en un reporte comparable
+============================================================================
+
+Uso (desde area_montecarlo/backend):
+
+    python load_test.py -c 8 -d 60 -o reporte.json
+    python load_test.py -c 8 -d 60 --comparar reporte_anterior.json
+    python load_test.py --url http://servidor:8000 --escenario simular
+
+Sin --url inicia la aplicación localmente con uvicorn en un puerto libre y
+espera a que /ready responda 200 (precalentamiento terminado). Cada
+cliente virtual mantiene su conexión abierta y envía una solicitud tras
+otra; contra el servidor local cada uno sale desde su propia dirección
+127.0.0.x, porque las cuotas se cuentan por IP (ver client_quotas).
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+from nucleo_montecarlo.config import PAISES_SUDAMERICA
+
+DIRECTORIO_BACKEND = os.path.dirname(os.path.abspath(__file__))
+
+# Percentiles de latencia del reporte
+PERCENTILES = (50, 95, 99)
+
+# Cantidades de puntos de /simular y su peso en la mezcla
+MEZCLA_N_PUNTOS = {10_000: 5, 100_000: 4, 1_000_000: 1}
+
+
+def _simular(rng, formato):
+    pais = str(rng.choice(PAISES_SUDAMERICA))
+    n_puntos = int(rng.choice(list(MEZCLA_N_PUNTOS), p=_pesos(MEZCLA_N_PUNTOS)))
+    return "POST", f"/simular?formato={formato}", {'pais': pais, 'n_puntos': n_puntos, 'motor': "vectorizado"}
+
+
+def _pesos(mezcla):
+    pesos = np.array(list(mezcla.values()), dtype=float)
+    return pesos / pesos.sum()
+
+
+def _operacion_paises(rng, simulaciones):
+    return "GET", "/paises", None
+
+
+def _operacion_motores(rng, simulaciones):
+    return "GET", "/motores", None
+
+
+def _operacion_simular_ligero(rng, simulaciones):
+    return _simular(rng, "ligero")
+
+
+def _operacion_simular_json(rng, simulaciones):
+    # Con las dos imágenes en base64: incluye el renderizado
+    return _simular(rng, "json")
+
+
+def _operacion_regiones(rng, simulaciones):
+    paises = [str(pais) for pais in rng.choice(PAISES_SUDAMERICA, size=3, replace=False)]
+    return "POST", "/simular_regiones", {'paises': paises, 'n_puntos': 500_000}
+
+
+def _operacion_clasificar(rng, simulaciones):
+    # 10.000 puntos lon/lat sobre Sudamérica contra todos los países
+    lon = rng.uniform(-82, -34, 10_000).round(4).tolist()
+    lat = rng.uniform(-56, 13, 10_000).round(4).tolist()
+    return "POST", "/clasificar", {'x': lon, 'y': lat}
+
+
+def _operacion_extender(rng, simulaciones):
+    # Extiende una simulación hecha antes por cualquier cliente
+    if not simulaciones:
+        return _operacion_simular_ligero(rng, simulaciones)
+    simulacion_id = simulaciones[int(rng.integers(len(simulaciones)))]
+    return "POST", f"/simulaciones/{simulacion_id}/extender", {'n_puntos': 100_000}
+
+
+# Operaciones: nombre -> función (rng, ids de simulaciones) -> (método, ruta, cuerpo)
+OPERACIONES = {
+    'paises': _operacion_paises,
+    'motores': _operacion_motores,
+    'simular_ligero': _operacion_simular_ligero,
+    'simular_json': _operacion_simular_json,
+    'simular_regiones': _operacion_regiones,
+    'clasificar': _operacion_clasificar,
+    'extender': _operacion_extender
+}
+
+# Escenarios: nombre -> peso de cada operación en la mezcla
+ESCENARIOS = {
+    'mixto': {
+        'paises': 20,
+        'simular_ligero': 40,
+        'simular_json': 10,
+        'simular_regiones': 10,
+        'clasificar': 10,
+        'extender': 10
+    },
+    'simular': {'simular_ligero': 1},
+    'lectura': {'paises': 1, 'motores': 1}
+}
+
+
+def crear_parser():
+    """Argumentos de línea de comandos de la prueba de carga."""
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API del calculador de área")
+    parser.add_argument('--url', default=None,
+                        help="API a probar; si no se indica se inicia una local con uvicorn")
+    parser.add_argument('--escenario', choices=list(ESCENARIOS), default='mixto')
+    parser.add_argument('-c', '--concurrencia', type=int, default=8, help="clientes virtuales simultáneos")
+    parser.add_argument('-d', '--duracion', type=float, default=30, help="segundos de carga medida")
+    parser.add_argument('--calentamiento', type=float, default=0,
+                        help="segundos de carga previa que no se miden")
+    parser.add_argument('--semilla', type=int, default=0, help="semilla de la mezcla de solicitudes")
+    parser.add_argument('--tiempo-espera', type=float, default=300, help="plazo por solicitud en segundos")
+    parser.add_argument('-o', '--salida', default=None, help="archivo JSON del reporte")
+    parser.add_argument('--comparar', default=None, metavar='REPORTE',
+                        help="reporte anterior contra el que se comparan latencias y rendimiento")
+    parser.add_argument('--umbral', type=float, default=10,
+                        help="porcentaje de empeoramiento que cuenta como regresión (por defecto 10)")
+    return parser
+
+
+# ============================================================================
+# SERVIDOR LOCAL
+# ============================================================================
+
+def _puerto_libre():
+    with socket.socket() as conexion:
+        conexion.bind(("127.0.0.1", 0))
+        return conexion.getsockname()[1]
+
+
+def iniciar_servidor_local(espera_maxima=600):
+    """
+    Inicia la API con uvicorn en un puerto libre y espera a que /ready
+    responda 200.
+
+    Raises:
+        RuntimeError: si el servidor termina o no queda listo a tiempo
+
+    Returns:
+        tupla (proceso, url)
+    """
+    puerto = _puerto_libre()
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(puerto),
+         "--log-level", "warning"],
+        cwd=DIRECTORIO_BACKEND,
+        # Grupo propio: al detenerlo terminan también los procesos de renderizado
+        start_new_session=True
+    )
+    url = f"http://127.0.0.1:{puerto}"
+
+    limite = time.monotonic() + espera_maxima
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError(f"El servidor terminó con código {proceso.returncode}")
+        try:
+            conexion = http.client.HTTPConnection("127.0.0.1", puerto, timeout=5)
+            conexion.request("GET", "/ready")
+            respuesta = conexion.getresponse()
+            estado = json.loads(respuesta.read())
+            conexion.close()
+            if respuesta.status == 200:
+                return proceso, url
+            if estado.get('etapa') == "error":
+                detener_servidor_local(proceso)
+                raise RuntimeError(f"El servidor no pudo prepararse: {estado.get('error')}")
+        except OSError:
+            pass
+        time.sleep(0.5)
+
+    detener_servidor_local(proceso)
+    raise RuntimeError(f"El servidor no quedó listo en {espera_maxima} s")
+
+
+def detener_servidor_local(proceso):
+    """Termina el servidor local y sus procesos hijos."""
+    os.killpg(proceso.pid, signal.SIGTERM)
+    try:
+        proceso.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        os.killpg(proceso.pid, signal.SIGKILL)
+        proceso.wait()
+    # Los hijos que sobrevivan al servidor (por ejemplo, el pool de renderizado)
+    try:
+        os.killpg(proceso.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+# ============================================================================
+# GENERACIÓN DE CARGA
+# ============================================================================
+
+def _cliente(numero, url, escenario, argumentos, inicio_medicion, fin, registros, simulaciones, lock):
+    """
+    Un cliente virtual: elige operaciones según los pesos del escenario y
+    las envía de a una por su propia conexión hasta el instante 'fin'.
+    """
+    partes = urlsplit(url)
+    origen = None
+    if partes.hostname == "127.0.0.1":
+        # Una IP por cliente: las cuotas del servidor se cuentan por IP
+        origen = (f"127.0.{(numero + 2) // 256}.{(numero + 2) % 256}", 0)
+
+    def _conectar():
+        return http.client.HTTPConnection(partes.hostname, partes.port or 80, timeout=argumentos.tiempo_espera,
+                                          source_address=origen)
+
+    rng = np.random.default_rng([argumentos.semilla, numero])
+    nombres = list(escenario)
+    pesos = _pesos(escenario)
+    conexion = _conectar()
+
+    while time.monotonic() < fin:
+        operacion = nombres[int(rng.choice(len(nombres), p=pesos))]
+        metodo, ruta, cuerpo = OPERACIONES[operacion](rng, simulaciones)
+        datos = json.dumps(cuerpo).encode('utf-8') if cuerpo is not None else None
+        cabeceras = {'Content-Type': 'application/json'} if datos is not None else {}
+
+        registro = {'operacion': operacion, 'inicio': time.monotonic()}
+        try:
+            conexion.request(metodo, ruta, body=datos, headers=cabeceras)
+            respuesta = conexion.getresponse()
+            contenido = respuesta.read()
+            registro['estado'] = respuesta.status
+            registro['bytes'] = len(contenido)
+        except (OSError, http.client.HTTPException) as e:
+            registro['estado'] = "conexion"
+            registro['error'] = str(e)
+            conexion.close()
+            conexion = _conectar()
+        registro['latencia'] = time.monotonic() - registro['inicio']
+
+        if registro['estado'] == 200 and respuesta.getheader('Content-Type', '').startswith('application/json'):
+            datos_respuesta = json.loads(contenido)
+            if isinstance(datos_respuesta, dict):
+                if 'tiempos_etapas' in datos_respuesta:
+                    registro['etapas'] = datos_respuesta['tiempos_etapas']
+                if 'simulacion_id' in datos_respuesta:
+                    with lock:
+                        simulaciones.append(datos_respuesta['simulacion_id'])
+
+        # Lo que empezó durante el calentamiento no se mide
+        if registro['inicio'] >= inicio_medicion:
+            with lock:
+                registros.append(registro)
+    conexion.close()
+
+
+def generar_carga(url, argumentos):
+    """
+    Ejecuta --concurrencia clientes virtuales durante --calentamiento +
+    --duracion segundos.
+
+    Returns:
+        tupla (registros de las solicitudes medidas, segundos medidos)
+    """
+    escenario = ESCENARIOS[argumentos.escenario]
+    registros = []
+    simulaciones = []
+    lock = threading.Lock()
+
+    inicio = time.monotonic()
+    inicio_medicion = inicio + argumentos.calentamiento
+    fin = inicio_medicion + argumentos.duracion
+    hilos = [
+        threading.Thread(target=_cliente, args=(numero, url, escenario, argumentos, inicio_medicion, fin,
+                                                registros, simulaciones, lock), daemon=True)
+        for numero in range(argumentos.concurrencia)
+    ]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    # Las solicitudes en vuelo al vencer el plazo alargan la ventana medida
+    medidos = max(time.monotonic(), fin) - inicio_medicion
+    return registros, medidos
+
+
+# ============================================================================
+# REPORTE
+# ============================================================================
+
+def _resumen_latencias(segundos):
+    if not segundos:
+        return None
+    milisegundos = np.array(segundos) * 1000
+    resumen = {f"p{p}": round(float(np.percentile(milisegundos, p)), 2) for p in PERCENTILES}
+    resumen['media'] = round(float(milisegundos.mean()), 2)
+    resumen['max'] = round(float(milisegundos.max()), 2)
+    return resumen
+
+
+def _resumen(registros, segundos):
+    """Solicitudes, estados, errores, rendimiento y latencias de un grupo de registros."""
+    estados = {}
+    for registro in registros:
+        estados[str(registro['estado'])] = estados.get(str(registro['estado']), 0) + 1
+    errores = sum(cantidad for estado, cantidad in estados.items() if estado != "200")
+    exitosos = [registro for registro in registros if registro['estado'] == 200]
+
+    resumen = {
+        'solicitudes': len(registros),
+        'estados': estados,
+        'errores': errores,
+        'tasa_error': round(errores / len(registros), 4) if registros else 0,
+        'rendimiento_rps': round(len(exitosos) / segundos, 3),
+        'latencia_ms': _resumen_latencias([registro['latencia'] for registro in exitosos]),
+        'bytes_medios': round(float(np.mean([registro['bytes'] for registro in exitosos])), 0) if exitosos else None
+    }
+
+    # Tiempos por etapa informados por el servidor (tiempos_etapas)
+    etapas = {}
+    for registro in exitosos:
+        for etapa, segundos_etapa in registro.get('etapas', {}).items():
+            etapas.setdefault(etapa, []).append(segundos_etapa)
+    if etapas:
+        resumen['etapas_servidor_ms'] = {etapa: _resumen_latencias(valores) for etapa, valores in etapas.items()}
+    return resumen
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=DIRECTORIO_BACKEND,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def construir_reporte(registros, segundos, url, argumentos):
+    """Reporte JSON: metadatos de la corrida, totales y resumen por operación."""
+    operaciones = {}
+    for registro in registros:
+        operaciones.setdefault(registro['operacion'], []).append(registro)
+
+    return {
+        'metadatos': {
+            'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': _commit(),
+            'host': platform.node(),
+            'cpus': os.cpu_count(),
+            'python': platform.python_version(),
+            'url': url,
+            'escenario': argumentos.escenario,
+            'pesos': ESCENARIOS[argumentos.escenario],
+            'concurrencia': argumentos.concurrencia,
+            'duracion_s': round(segundos, 2),
+            'calentamiento_s': argumentos.calentamiento,
+            'semilla': argumentos.semilla
+        },
+        'total': _resumen(registros, segundos),
+        'operaciones': {nombre: _resumen(grupo, segundos) for nombre, grupo in sorted(operaciones.items())}
+    }
+
+
+def _cambio(anterior, actual):
+    """Cambio porcentual, o None si no hay con qué comparar."""
+    if anterior is None or actual is None or anterior == 0:
+        return None
+    return (actual - anterior) / anterior * 100
+
+
+def comparar_reportes(anterior, actual, umbral):
+    """
+    Compara latencias (más es peor), rendimiento y tasa de error por
+    operación.
+
+    Returns:
+        tupla (líneas de la tabla, cantidad de regresiones)
+    """
+    lineas = [f"{'operación':18s} {'métrica':16s} {'anterior':>12s} {'actual':>12s} {'cambio':>9s}"]
+    regresiones = 0
+    grupos = [('total', anterior['total'], actual['total'])] + [
+        (nombre, anterior['operaciones'][nombre], actual['operaciones'][nombre])
+        for nombre in actual['operaciones'] if nombre in anterior['operaciones']
+    ]
+
+    for nombre, base, nuevo in grupos:
+        metricas = [(f"latencia {p}", (base['latencia_ms'] or {}).get(p), (nuevo['latencia_ms'] or {}).get(p), 1)
+                    for p in (f"p{p}" for p in PERCENTILES)]
+        metricas.append(("rendimiento_rps", base['rendimiento_rps'], nuevo['rendimiento_rps'], -1))
+        for metrica, valor_base, valor_nuevo, sentido in metricas:
+            cambio = _cambio(valor_base, valor_nuevo)
+            marca = ""
+            if cambio is not None and cambio * sentido > umbral:
+                marca = "  <- regresión"
+                regresiones += 1
+            texto_cambio = f"{cambio:+8.1f}%" if cambio is not None else f"{'-':>9s}"
+            lineas.append(f"{nombre:18s} {metrica:16s} {valor_base if valor_base is not None else '-':>12} "
+                          f"{valor_nuevo if valor_nuevo is not None else '-':>12} {texto_cambio}{marca}")
+        if nuevo['tasa_error'] > base['tasa_error']:
+            lineas.append(f"{nombre:18s} {'tasa_error':16s} {base['tasa_error']:>12} {nuevo['tasa_error']:>12}"
+                          f"{'':>10s}  <- regresión")
+            regresiones += 1
+
+    return lineas, regresiones
+
+
+def _imprimir_reporte(reporte):
+    total = reporte['total']
+    print(f"\n{total['solicitudes']:,} solicitudes en {reporte['metadatos']['duracion_s']} s "
+          f"({total['rendimiento_rps']} exitosas/s, tasa de error {total['tasa_error']:.2%})")
+    print(f"{'operación':18s} {'n':>7s} {'err':>5s} {'rps':>8s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s}")
+    for nombre, resumen in reporte['operaciones'].items():
+        latencia = resumen['latencia_ms'] or {}
+        print(f"{nombre:18s} {resumen['solicitudes']:>7,} {resumen['errores']:>5,} {resumen['rendimiento_rps']:>8} "
+              f"{latencia.get('p50', '-'):>9} {latencia.get('p95', '-'):>9} {latencia.get('p99', '-'):>9}")
+        for etapa, etapa_ms in resumen.get('etapas_servidor_ms', {}).items():
+            print(f"  servidor: {etapa:14s} {'':>23s} {etapa_ms['p50']:>9} {etapa_ms['p95']:>9} {etapa_ms['p99']:>9}")
+
+
+def main(argumentos):
+    """
+    Returns:
+        código de salida: 0, 1 si hubo regresiones frente a --comparar, 2
+        si el servidor local no pudo iniciarse
+    """
+    proceso = None
+    url = argumentos.url
+    if url is None:
+        try:
+            proceso, url = iniciar_servidor_local()
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+            return 2
+
+    try:
+        registros, segundos = generar_carga(url.rstrip('/'), argumentos)
+    finally:
+        if proceso is not None:
+            detener_servidor_local(proceso)
+
+    reporte = construir_reporte(registros, segundos, url, argumentos)
+    _imprimir_reporte(reporte)
+    if argumentos.salida:
+        with open(argumentos.salida, 'w', encoding='utf-8') as archivo:
+            json.dump(reporte, archivo, indent=2, ensure_ascii=False)
+            archivo.write("\n")
+
+    if argumentos.comparar:
+        with open(argumentos.comparar, encoding='utf-8') as archivo:
+            anterior = json.load(archivo)
+        lineas, regresiones = comparar_reportes(anterior, reporte, argumentos.umbral)
+        print(f"\nComparación con {argumentos.comparar} (commit {anterior['metadatos'].get('commit')}):")
+        print("\n".join(lineas))
+        if regresiones:
+            print(f"\n{regresiones} regresiones de más de {argumentos.umbral}%")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(crear_parser().parse_args()))
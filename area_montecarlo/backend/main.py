@@ -5,11 +5,18 @@ FastAPI Backend para Calculador de Área Monte Carlo
 ============================================================================
 """
 
+import os
+import sys
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from data_loader import cargar_datos
+# El núcleo de simulación compartido (nucleo_montecarlo) está en la raíz del repositorio
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+from nucleo_montecarlo import cargar_datos
 from routes import router, set_mundo
+from warmup import iniciar_precalentamiento, marcar_error
 
 app = FastAPI(title="Monte Carlo Area Calculator API")
 
@@ -27,12 +34,16 @@ app.include_router(router)
 
 @app.on_event("startup")
 async def startup_event():
-    """Cargar datos geográficos al iniciar la aplicación."""
+    """
+    Cargar datos geográficos al iniciar la aplicación y precalentar las
+    cachés en segundo plano; /ready responde 503 hasta que termina.
+    """
     mundo = cargar_datos()
     if mundo is None:
         print("ERROR: No se pudieron cargar los datos geográficos")
+        marcar_error("No se pudieron cargar los datos geográficos")
     else:
-        set_mundo(mundo)
+        iniciar_precalentamiento(set_mundo(mundo))
 
 
 if __name__ == "__main__":
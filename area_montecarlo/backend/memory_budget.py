@@ -0,0 +1,291 @@
+"""
+============================================================================
+PRESUPUESTO DE MEMORIA
+Estimación y admisión por memoria de cada solicitud, y perfil de memoria
+por etapa del pipeline
+============================================================================
+"""
+
+import math
+import os
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+from config import (MEMORIA_MAXIMA_SOLICITUD_MB, MEMORIA_NODO_MB, MAX_PUNTOS_VIZ_DEGRADADO,
+                    INTERVALO_MUESTREO_RSS_S, NIVEL_INDICE_TESELAS)
+from nucleo_montecarlo import MOTORES, PRECISIONES
+from nucleo_montecarlo.config import MAX_PUNTOS_VIZ, TAMANO_LOTE, SUBLOTE_COMPACTO
+
+MB = 1024 * 1024
+
+# Bytes temporales por punto clasificado (arreglos de numpy medidos con
+# tracemalloc; los motores de GEOS trabajan sobre los arreglos de entrada)
+BYTES_CLASIFICACION = {
+    'shapely': 1,
+    'vectorizado': 1,
+    'slab': 104,
+    'dos_niveles': 40
+}
+BYTES_CLASIFICACION_DESCONOCIDO = 128 # motores registrados sin medición
+
+# Cada punto de visualización guardado son dos floats de Python en listas
+BYTES_PUNTO_VIZ = 64
+# Copias adicionales según el formato: "json" pasa los puntos a arreglos
+# para el proceso de renderizado; msgpack y arrow los serializan en la respuesta
+BYTES_PUNTO_VIZ_FORMATO = {
+    'json': 48,
+    'msgpack': 32,
+    'arrow': 32
+}
+
+# Conteos de teselas acumulados durante una simulación Monte Carlo: la
+# grilla uint32 dentro/fuera y los dos bincount int64 de cada lote
+BYTES_CONTEOS_TESELAS = 2 * 4 ** NIVEL_INDICE_TESELAS * (4 + 8)
+
+# Clasificación masiva (/clasificar): coordenadas x, y en float64 e id int16
+# por punto, más la salida: una lista de Python y su texto JSON, o el .npy
+BYTES_PUNTO_CLASIFICADO = 18
+BYTES_SALIDA_CLASIFICACION = {
+    'json': 16,
+    'npy': 2
+}
+
+
+class MemoriaInsuficiente(Exception):
+    """El nodo no tiene memoria libre para la solicitud; 'espera' son los segundos sugeridos antes de reintentar."""
+
+    def __init__(self, mensaje, espera):
+        super().__init__(mensaje)
+        self.espera = espera
+
+
+# Bytes estimados de las solicitudes que se están calculando
+_en_curso = 0
+_lock = threading.Lock()
+
+# Perfiles en curso: id(perfil) -> {'modo', 'marcas' de etapas sin cerrar}.
+# Una etapa interrumpida por una excepción no debe dejar su hilo de
+# muestreo corriendo, y tracemalloc se detiene con el último perfil que lo usa.
+MODOS_PERFIL = ("rss", "tracemalloc")
+_perfiles = {}
+_lock_perfiles = threading.Lock()
+
+
+def _puntos_viz_retenidos(n_puntos, max_puntos_viz):
+    """El simulador guarda hasta max_puntos_viz puntos dentro y la mitad fuera."""
+    if max_puntos_viz == float('inf'):
+        return n_puntos
+    return min(n_puntos, int(max_puntos_viz) + int(max_puntos_viz) // 2)
+
+
+def estimar_memoria(n_puntos, motor, precision="float64", formato=None, puntos_viz=0, conteos_teselas=False):
+    """
+    Bytes que necesitará una simulación: dos lotes de muestras vivos a la
+    vez (el siguiente se genera antes de liberar el anterior), los
+    temporales del motor, los puntos de visualización con sus copias y, con
+    conteos_teselas, la grilla de conteos de las teselas de densidad.
+    """
+    lote = min(n_puntos, TAMANO_LOTE)
+    # Las muestras compactas se clasifican de a SUBLOTE_COMPACTO puntos
+    clasificados = lote if precision == "float64" else min(lote, SUBLOTE_COMPACTO)
+    bytes_motor = BYTES_CLASIFICACION.get(motor, BYTES_CLASIFICACION_DESCONOCIDO)
+
+    muestras = 2 * lote * PRECISIONES[precision]['bytes_por_punto'] + lote
+    clasificacion = clasificados * bytes_motor
+    visualizacion = puntos_viz * (BYTES_PUNTO_VIZ + BYTES_PUNTO_VIZ_FORMATO.get(formato, 0))
+    teselas = BYTES_CONTEOS_TESELAS if conteos_teselas else 0
+    return muestras + clasificacion + visualizacion + teselas
+
+
+def planificar_memoria(n_puntos, motor, precision="float64", formato=None, puntos_viz=None):
+    """
+    Decide cómo correr una solicitud dentro de MEMORIA_MAXIMA_SOLICITUD_MB.
+
+    Si guardar todos los puntos de visualización (MAX_PUNTOS_VIZ) no entra,
+    la solicitud se degrada: los conteos se siguen acumulando lote a lote
+    (también los de las teselas de zoom bajo), pero solo se guardan
+    MAX_PUNTOS_VIZ_DEGRADADO puntos para la imagen, la salida vectorial y
+    las teselas de zoom alto. Con puntos_viz fijo (la retícula) no hay
+    degradación posible ni conteos de teselas.
+
+    Raises:
+        ValueError: si la solicitud no entra ni degradada
+
+    Returns:
+        dict con los bytes estimados, el modo ("completo" o "degradado") y
+        el max_puntos_viz con que se debe simular
+    """
+    if motor not in MOTORES:
+        raise ValueError(f"Motor de clasificación desconocido: {motor}")
+
+    limite = MEMORIA_MAXIMA_SOLICITUD_MB * MB
+    opciones = [("completo", MAX_PUNTOS_VIZ)]
+    if puntos_viz is None:
+        opciones.append(("degradado", MAX_PUNTOS_VIZ_DEGRADADO))
+
+    for modo, max_puntos_viz in opciones:
+        retenidos = puntos_viz if puntos_viz is not None else _puntos_viz_retenidos(n_puntos, max_puntos_viz)
+        necesarios = estimar_memoria(n_puntos, motor, precision, formato, retenidos,
+                                     conteos_teselas=puntos_viz is None)
+        if necesarios <= limite:
+            return {'bytes': necesarios, 'modo': modo, 'max_puntos_viz': max_puntos_viz}
+
+    raise ValueError(f"La solicitud necesita ~{necesarios / MB:,.0f} MB de memoria "
+                     f"(máximo {MEMORIA_MAXIMA_SOLICITUD_MB:,} MB por solicitud)")
+
+
+def planificar_clasificacion(n_puntos, motor, bytes_cuerpo, salida="json"):
+    """
+    Bytes que necesitará una clasificación masiva: el cuerpo recibido, los
+    arreglos de puntos e ids, la salida y los temporales de un lote (los
+    candidatos se proyectan antes de clasificarlos).
+
+    Raises:
+        ValueError: si supera MEMORIA_MAXIMA_SOLICITUD_MB
+    """
+    lote = min(n_puntos, TAMANO_LOTE)
+    bytes_motor = BYTES_CLASIFICACION.get(motor, BYTES_CLASIFICACION_DESCONOCIDO)
+    necesarios = (bytes_cuerpo + n_puntos * (BYTES_PUNTO_CLASIFICADO + BYTES_SALIDA_CLASIFICACION[salida])
+                  + lote * (16 + bytes_motor))
+    if necesarios > MEMORIA_MAXIMA_SOLICITUD_MB * MB:
+        raise ValueError(f"La clasificación necesita ~{necesarios / MB:,.0f} MB de memoria "
+                         f"(máximo {MEMORIA_MAXIMA_SOLICITUD_MB:,} MB por solicitud)")
+    return necesarios
+
+
+def reservar_memoria(n_bytes):
+    """
+    Registra la memoria de una solicitud antes de empezar a calcular.
+
+    Raises:
+        MemoriaInsuficiente: si con ella se supera MEMORIA_NODO_MB (una
+            solicitud sola siempre se admite)
+    """
+    global _en_curso
+    with _lock:
+        if _en_curso > 0 and _en_curso + n_bytes > MEMORIA_NODO_MB * MB:
+            raise MemoriaInsuficiente(
+                f"Memoria del servidor ocupada ({_en_curso / MB:,.0f} de {MEMORIA_NODO_MB:,} MB en curso)", 1
+            )
+        _en_curso += n_bytes
+
+
+def liberar_memoria(n_bytes):
+    """Termina la reserva de reservar_memoria."""
+    global _en_curso
+    with _lock:
+        _en_curso = max(0, _en_curso - n_bytes)
+
+
+def estado_memoria():
+    """Memoria reservada por las solicitudes en curso (para diagnóstico)."""
+    with _lock:
+        return {'en_curso_mb': round(_en_curso / MB, 1), 'limite_mb': MEMORIA_NODO_MB}
+
+
+def _rss_actual():
+    """Memoria residente del proceso en bytes, o None si /proc no está disponible."""
+    try:
+        with open('/proc/self/statm', encoding='ascii') as archivo:
+            return int(archivo.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+def _muestrear_rss(marca):
+    """Hilo que guarda el máximo de RSS hasta que se cierra la etapa."""
+    while not marca['fin'].wait(INTERVALO_MUESTREO_RSS_S):
+        rss = _rss_actual()
+        if rss is not None:
+            marca['rss_pico'] = max(marca['rss_pico'], rss)
+
+
+@contextmanager
+def perfil_solicitud(modo):
+    """
+    Perfil de memoria de una solicitud: produce un dict de etapas, o None si
+    modo es None.
+
+    - "rss": solo el RSS del proceso, muestreado en un hilo; casi no cuesta.
+    - "tracemalloc": además, lo asignado por Python en cada etapa. Es global
+      al proceso y hace mucho más lentas las asignaciones; su registro de
+      cada bloque también infla el RSS. Con solicitudes concurrentes los
+      picos incluyen las de las demás: es para diagnosticar.
+    """
+    if modo is None:
+        yield None
+        return
+
+    perfil = {}
+    with _lock_perfiles:
+        if modo == "tracemalloc" and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _perfiles[id(perfil)] = {'modo': modo, 'marcas': []}
+    try:
+        yield perfil
+    finally:
+        with _lock_perfiles:
+            for marca in _perfiles.pop(id(perfil))['marcas']:
+                marca['fin'].set()
+            if tracemalloc.is_tracing() and not any(p['modo'] == "tracemalloc" for p in _perfiles.values()):
+                tracemalloc.stop()
+
+
+def iniciar_etapa(perfil):
+    """Empieza a medir una etapa; devuelve la marca para cerrar_etapa (None sin perfil)."""
+    if perfil is None:
+        return None
+
+    rss = _rss_actual()
+    marca = {'rss_inicio': rss, 'rss_pico': rss or 0, 'fin': threading.Event()}
+    with _lock_perfiles:
+        estado = _perfiles[id(perfil)]
+        estado['marcas'].append(marca)
+        if estado['modo'] == "tracemalloc":
+            marca['python_inicio'] = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+
+    if rss is not None:
+        marca['hilo'] = threading.Thread(target=_muestrear_rss, args=(marca,), daemon=True)
+        marca['hilo'].start()
+    return marca
+
+
+def cerrar_etapa(perfil, etapa, marca):
+    """
+    Guarda en perfil[etapa] el pico de RSS del proceso (incluye lo que
+    asignan GEOS y numpy) y, con "tracemalloc", el pico y lo retenido por
+    Python sobre lo asignado al empezar la etapa.
+    """
+    if perfil is None:
+        return
+
+    medicion = {}
+    if 'python_inicio' in marca:
+        actual, pico = tracemalloc.get_traced_memory()
+        medicion['pico_python_mb'] = round((pico - marca['python_inicio']) / MB, 2)
+        medicion['retenido_python_mb'] = round((actual - marca['python_inicio']) / MB, 2)
+
+    marca['fin'].set()
+    if 'hilo' in marca:
+        marca['hilo'].join()
+    with _lock_perfiles:
+        _perfiles[id(perfil)]['marcas'].remove(marca)
+
+    rss = _rss_actual()
+    if rss is not None and marca['rss_inicio'] is not None:
+        rss_pico = max(marca['rss_pico'], rss)
+        medicion['rss_pico_mb'] = round(rss_pico / MB, 1)
+        medicion['rss_aumento_mb'] = round((rss_pico - marca['rss_inicio']) / MB, 1)
+    perfil[etapa] = medicion
+
+
+def resumen_plan(plan):
+    """Bloque "memoria" de la respuesta."""
+    max_puntos_viz = plan['max_puntos_viz']
+    return {
+        'estimada_mb': math.ceil(plan['bytes'] / MB),
+        'modo': plan['modo'],
+        'max_puntos_viz': None if max_puntos_viz == float('inf') else int(max_puntos_viz)
+    }
@@ -0,0 +1,212 @@
+"""
+============================================================================
+ESTIMACIÓN MULTIRREGIÓN
+Una sola nube de puntos para estimar el área de varios países a la vez
+============================================================================
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import shapely
+import time
+
+from config import MAX_REGIONES_CACHE, RESOLUCION_RASTER_REGIONES
+from nucleo_montecarlo.config import TAMANO_LOTE
+from nucleo_montecarlo.geometry_processor import crear_proyeccion_equivalente, proyectar_geometria
+from nucleo_montecarlo.point_sampler import MUESTREADORES
+from nucleo_montecarlo.cancelacion import verificar_cancelacion
+
+
+# Caché LRU: tupla de nombres -> proyección común, geometrías, STRtree y ráster;
+# se usa desde los hilos del pool de FastAPI
+_cache_regiones = OrderedDict()
+_lock = threading.Lock()
+
+# Etiquetas especiales del ráster
+FUERA = -1
+BORDE = -2
+
+
+def _construir_raster(arbol, bbox, resolucion):
+    """
+    Ráster etiquetado sobre el bbox de la unión. Cada celda guarda el id del
+    país que la contiene por completo, FUERA si no toca ningún país o BORDE
+    si la cruza algún límite (esas celdas se resuelven con la geometría exacta).
+    El STRtree evita probar cada celda contra todos los países.
+    """
+    min_x, min_y, max_x, max_y = bbox
+    ancho_celda = (max_x - min_x) / resolucion
+    alto_celda = (max_y - min_y) / resolucion
+
+    i, j = np.meshgrid(np.arange(resolucion), np.arange(resolucion), indexing='ij')
+    x0 = min_x + i.ravel() * ancho_celda
+    y0 = min_y + j.ravel() * alto_celda
+    celdas = shapely.box(x0, y0, x0 + ancho_celda, y0 + alto_celda)
+
+    etiquetas = np.full(len(celdas), FUERA, dtype=np.int16)
+    indice_celda, _ = arbol.query(celdas, predicate='intersects')
+    etiquetas[indice_celda] = BORDE
+    indice_celda, indice_region = arbol.query(celdas, predicate='within')
+    etiquetas[indice_celda] = indice_region
+
+    return {
+        'etiquetas': etiquetas.reshape(resolucion, resolucion),
+        'origen': (min_x, min_y),
+        'ancho_celda': ancho_celda,
+        'alto_celda': alto_celda,
+        'resolucion': resolucion
+    }
+
+
+def construir_regiones(nombres, geometrias_geo):
+    """
+    Proyecta todos los países a una LAEA común (centrada en la unión) y
+    construye el STRtree y el ráster etiquetado sobre las geometrías
+    proyectadas.
+
+    Una proyección única es necesaria: la muestra compartida solo es
+    uniforme en área si todos los países comparten el mismo plano.
+
+    Returns:
+        dict con nombres, geometrías proyectadas, unión, bbox y STRtree
+    """
+    union_geo = shapely.union_all(geometrias_geo)
+    proyeccion = crear_proyeccion_equivalente(union_geo)
+
+    geometrias = [proyectar_geometria(geometria, proyeccion) for geometria in geometrias_geo]
+    union = shapely.union_all(geometrias)
+    bbox = tuple(union.bounds)
+    arbol = shapely.STRtree(geometrias)
+
+    preparadas = [shapely.from_wkb(shapely.to_wkb(geometria)) for geometria in geometrias]
+    shapely.prepare(preparadas)
+
+    return {
+        'nombres': list(nombres),
+        'geometrias': geometrias,
+        'preparadas': preparadas,
+        'union': union,
+        'bbox': bbox,
+        'proyeccion': proyeccion['descripcion'],
+        'arbol': arbol,
+        'raster': _construir_raster(arbol, bbox, RESOLUCION_RASTER_REGIONES),
+        # Dominios de muestreo, construidos al pedirlos con 'lock_dominios' tomado
+        'dominios': {},
+        'lock_dominios': threading.Lock()
+    }
+
+
+def obtener_regiones(nombres, geometrias_geo):
+    """
+    Devuelve la estructura multirregión cacheada para ese conjunto de países.
+    Se construye fuera del lock; si otro hilo la guardó mientras tanto, se
+    usa la suya.
+    """
+    clave = tuple(nombres)
+    with _lock:
+        if clave in _cache_regiones:
+            _cache_regiones.move_to_end(clave)
+            return _cache_regiones[clave]
+
+    regiones = construir_regiones(nombres, geometrias_geo)
+    with _lock:
+        regiones = _cache_regiones.setdefault(clave, regiones)
+        _cache_regiones.move_to_end(clave)
+        while len(_cache_regiones) > MAX_REGIONES_CACHE:
+            _cache_regiones.popitem(last=False)
+    return regiones
+
+
+def _obtener_dominio(regiones, muestreador):
+    """Dominio de muestreo de la unión, construido una sola vez por muestreador."""
+    with regiones['lock_dominios']:
+        dominios = regiones['dominios']
+        if muestreador not in dominios:
+            dominios[muestreador] = MUESTREADORES[muestreador]['construir'](regiones['union'], regiones['bbox'])
+        return dominios[muestreador]
+
+
+def asignar_regiones(regiones, x, y):
+    """
+    Devuelve el id del país (posición en regiones['nombres']) que contiene a
+    cada punto, o -1 si no cae en ninguno.
+
+    La mayoría de los puntos se etiquetan leyendo el ráster; solo los que
+    caen en celdas BORDE se prueban contra las geometrías exactas de los
+    países cuyo bbox los contiene.
+    """
+    raster = regiones['raster']
+    resolucion = raster['resolucion']
+    min_x, min_y = raster['origen']
+
+    i = np.clip(((x - min_x) / raster['ancho_celda']).astype(np.int64), 0, resolucion - 1)
+    j = np.clip(((y - min_y) / raster['alto_celda']).astype(np.int64), 0, resolucion - 1)
+    ids = raster['etiquetas'][i, j]
+
+    en_borde = np.flatnonzero(ids == BORDE)
+    ids[en_borde] = FUERA
+    for id_region, geometria in enumerate(regiones['preparadas']):
+        if not len(en_borde):
+            break
+        bx0, by0, bx1, by1 = regiones['geometrias'][id_region].bounds
+        px, py = x[en_borde], y[en_borde]
+        candidatos = (px >= bx0) & (px <= bx1) & (py >= by0) & (py <= by1)
+        dentro = np.zeros(len(en_borde), dtype=bool)
+        dentro[candidatos] = shapely.contains_xy(geometria, px[candidatos], py[candidatos])
+        ids[en_borde[dentro]] = id_region
+        en_borde = en_borde[~dentro]
+
+    return ids
+
+
+def simulacion_multirregion(regiones, n_puntos, muestreador='bbox', semilla=None, cancelacion=None):
+    """
+    Muestrea una vez sobre el dominio de la unión y reparte los puntos entre
+    los países. Para cada país i:
+        Área_i = Área_Dominio × (n_i / N),  EE_i = Área_Dominio × sqrt(p_i(1-p_i)/N)
+
+    Con la misma semilla (y los mismos países y muestreador) se repite la
+    corrida; si es None se elige una al azar y se informa en el resultado.
+    El token 'cancelacion' se revisa antes de cada lote.
+
+    Returns:
+        dict con estimaciones por país y del total de tierra
+    """
+    dominio = _obtener_dominio(regiones, muestreador)
+    muestrear = MUESTREADORES[muestreador]['muestrear']
+    area_dominio = dominio['area_m2']
+
+    start_time = time.time()
+
+    if semilla is None:
+        semilla = int(np.random.SeedSequence().entropy % 2**63)
+    rng = np.random.default_rng(semilla)
+    conteos = np.zeros(len(regiones['nombres']), dtype=np.int64)
+    for inicio in range(0, n_puntos, TAMANO_LOTE):
+        n_lote = min(TAMANO_LOTE, n_puntos - inicio)
+        verificar_cancelacion(cancelacion, inicio)
+        x_rand, y_rand = muestrear(dominio, n_lote, rng)
+        ids = asignar_regiones(regiones, x_rand, y_rand)
+        conteos += np.bincount(ids[ids >= 0], minlength=len(conteos))
+
+    tiempo_simulacion = time.time() - start_time
+
+    def _estimar(conteo):
+        proporcion = conteo / n_puntos
+        return {
+            'puntos_dentro': int(conteo),
+            'area_estimada_km2': float(area_dominio * proporcion / 1_000_000),
+            'error_estandar_km2': float(area_dominio * np.sqrt(proporcion * (1 - proporcion) / n_puntos) / 1_000_000)
+        }
+
+    return {
+        'n_puntos': n_puntos,
+        'muestreador': muestreador,
+        'semilla': semilla,
+        'area_dominio_m2': area_dominio,
+        'tiempo_simulacion': tiempo_simulacion,
+        'paises': {nombre: _estimar(conteo) for nombre, conteo in zip(regiones['nombres'], conteos)},
+        'total': _estimar(conteos.sum())
+    }
@@ -0,0 +1,183 @@
+"""
+============================================================================
+REFINAMIENTO INCREMENTAL
+Estadísticas suficientes de cada simulación para extenderla con más puntos
+============================================================================
+"""
+
+import json
+import os
+import re
+import threading
+import uuid
+from contextlib import contextmanager
+
+from config import DIRECTORIO_SIMULACIONES
+from nucleo_montecarlo.montecarlo_simulator import simulacion_montecarlo, estimar_area
+from nucleo_montecarlo.control_variate import estimar_con_control
+
+
+_ID_VALIDO = re.compile(r'^[0-9a-f]{32}$')
+
+# Un lock por simulación: dos extensiones simultáneas no deben leer el
+# mismo estado del generador ni pisarse los conteos. Cada entrada es
+# [lock, extensiones que lo usan] y se borra cuando termina la última, así
+# el diccionario no crece con cada simulación extendida.
+_locks = {}
+_lock_registro = threading.Lock()
+
+
+@contextmanager
+def _bloquear(simulacion_id):
+    """Toma el lock de la simulación (ver _locks)."""
+    with _lock_registro:
+        entrada = _locks.setdefault(simulacion_id, [threading.Lock(), 0])
+        entrada[1] += 1
+    try:
+        with entrada[0]:
+            yield
+    finally:
+        with _lock_registro:
+            entrada[1] -= 1
+            if entrada[1] == 0:
+                del _locks[simulacion_id]
+
+
+def _ruta(simulacion_id):
+    return os.path.join(DIRECTORIO_SIMULACIONES, f"{simulacion_id}.json")
+
+
+def _escribir(estadisticas):
+    """Escritura atómica: un archivo a medio escribir nunca reemplaza al anterior."""
+    os.makedirs(DIRECTORIO_SIMULACIONES, exist_ok=True)
+    ruta = _ruta(estadisticas['id'])
+    temporal = f"{ruta}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as archivo:
+        json.dump(estadisticas, archivo)
+    os.replace(temporal, ruta)
+
+
+def guardar_simulacion(objetivo, parametros, resultados):
+    """
+    Guarda las estadísticas suficientes de una corrida de Monte Carlo:
+    conteos, N, área del dominio, semilla y estado final del generador.
+    Con eso basta para continuar la muestra sin repetir los puntos ya
+    generados.
+
+    Args:
+        objetivo: {'tipo': 'pais' | 'poligono', 'id': nombre o poligono_id}
+        parametros: ParametrosSimulacion usados en la corrida
+        resultados: dict devuelto por simulacion_montecarlo
+
+    Returns:
+        id de la simulación
+    """
+    estadisticas = {
+        'id': uuid.uuid4().hex,
+        'objetivo': objetivo,
+        'motor': resultados['motor'],
+        'muestreador': resultados['muestreador'],
+        'estimador': parametros.estimador,
+        'forma_control': parametros.forma_control,
+        'precision': resultados['precision'],
+        'bbox': list(resultados['bbox']),
+        'area_dominio_m2': resultados['area_dominio_m2'],
+        'n_puntos': resultados['n_puntos'],
+        'puntos_dentro': resultados['puntos_dentro'],
+        'puntos_control': resultados.get('puntos_control', 0),
+        'puntos_ambos': resultados.get('puntos_ambos', 0),
+        'semilla': resultados['semilla'],
+        'estado_rng': resultados['estado_rng'],
+        'tiempo_simulacion': resultados['tiempo_simulacion'],
+        'extensiones': 0
+    }
+    _escribir(estadisticas)
+    return estadisticas['id']
+
+
+def cargar_simulacion(simulacion_id):
+    """Devuelve las estadísticas guardadas de una simulación, o None si no existe."""
+    if not _ID_VALIDO.match(simulacion_id) or not os.path.exists(_ruta(simulacion_id)):
+        return None
+    with open(_ruta(simulacion_id), encoding='utf-8') as archivo:
+        return json.load(archivo)
+
+
+def extender_simulacion(simulacion_id, geo_info, n_puntos, indice, dominio, control=None, cancelacion=None):
+    """
+    Genera n_puntos más continuando el generador de la corrida anterior (con
+    la misma precisión de muestra) y acumula los conteos. Como las muestras
+    son independientes, la estimación conjunta es la de una sola corrida
+    con N + n_puntos puntos.
+
+    Si se cancela a mitad de camino (SimulacionCancelada) no se guarda
+    nada: la simulación queda como estaba.
+
+    Raises:
+        ValueError: si el dominio de muestreo cambió desde la corrida
+            original (por ejemplo, otra configuración de celdas)
+
+    Returns:
+        dict con los conteos acumulados, la estimación refinada y su error
+    """
+    with _bloquear(simulacion_id):
+        estadisticas = cargar_simulacion(simulacion_id)
+        if abs(dominio['area_m2'] - estadisticas['area_dominio_m2']) > 1e-6 * estadisticas['area_dominio_m2']:
+            raise ValueError("El dominio de muestreo cambió desde la simulación original")
+        return _extender(estadisticas, geo_info, n_puntos, indice, dominio, control, cancelacion)
+
+
+def _extender(estadisticas, geo_info, n_puntos, indice, dominio, control, cancelacion):
+    """Corre los puntos adicionales, acumula los conteos y guarda el nuevo estado."""
+    adicional = simulacion_montecarlo(
+        geo_info['pais_proyectado'],
+        tuple(estadisticas['bbox']),
+        n_puntos,
+        motor=estadisticas['motor'],
+        indice=indice,
+        muestreador=estadisticas['muestreador'],
+        dominio=dominio,
+        control=control,
+        semilla=estadisticas['semilla'],
+        estado_rng=estadisticas['estado_rng'],
+        max_puntos_viz=0,
+        cancelacion=cancelacion,
+        precision=estadisticas.get('precision', "float64")
+    )
+
+    estadisticas['n_puntos'] += adicional['n_puntos']
+    estadisticas['puntos_dentro'] += adicional['puntos_dentro']
+    estadisticas['puntos_control'] += adicional.get('puntos_control', 0)
+    estadisticas['puntos_ambos'] += adicional.get('puntos_ambos', 0)
+    estadisticas['estado_rng'] = adicional['estado_rng']
+    estadisticas['tiempo_simulacion'] += adicional['tiempo_simulacion']
+    estadisticas['extensiones'] += 1
+    _escribir(estadisticas)
+
+    area_dominio = estadisticas['area_dominio_m2']
+    area_estimada_m2, error_estandar_km2 = estimar_area(
+        area_dominio, estadisticas['puntos_dentro'], estadisticas['n_puntos']
+    )
+
+    resultados = {
+        'n_puntos': estadisticas['n_puntos'],
+        'n_puntos_agregados': adicional['n_puntos'],
+        'puntos_dentro_agregados': adicional['puntos_dentro'],
+        'puntos_dentro': estadisticas['puntos_dentro'],
+        'puntos_fuera': estadisticas['n_puntos'] - estadisticas['puntos_dentro'],
+        'area_dominio_m2': area_dominio,
+        'area_estimada_m2': area_estimada_m2,
+        'area_estimada_km2': area_estimada_m2 / 1_000_000,
+        'error_estandar_km2': error_estandar_km2,
+        'tiempo_extension': adicional['tiempo_simulacion'],
+        'tiempo_total': estadisticas['tiempo_simulacion'],
+        'extensiones': estadisticas['extensiones']
+    }
+
+    if control is not None:
+        resultados['variable_control'] = estimar_con_control(
+            estadisticas['n_puntos'], estadisticas['puntos_dentro'], estadisticas['puntos_control'],
+            estadisticas['puntos_ambos'], control, area_dominio
+        )
+
+    return resultados
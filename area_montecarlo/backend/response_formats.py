@@ -0,0 +1,137 @@
+"""
+============================================================================
+FORMATOS DE RESPUESTA
+Serialización y compresión negociadas para las respuestas de simulación
+============================================================================
+"""
+
+import gzip
+import io
+import json
+
+import numpy as np
+from fastapi import Response
+
+from config import TAMANO_MINIMO_COMPRESION
+
+# Dependencias opcionales: se usan si están instaladas
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+# formato -> tipo de contenido
+FORMATOS = {
+    'json': "application/json",
+    'ligero': "application/json",
+    'vectorial': "application/json",
+    'msgpack': "application/msgpack",
+    'arrow': "application/vnd.apache.arrow.stream"
+}
+
+
+def formatos_disponibles():
+    """Formatos cuya dependencia está instalada en el servidor."""
+    disponibles = ['json', 'ligero', 'vectorial']
+    if msgpack is not None:
+        disponibles.append('msgpack')
+    if pa is not None:
+        disponibles.append('arrow')
+    return disponibles
+
+
+def serializar_json(payload):
+    """JSON con orjson si está disponible (varias veces más rápido)."""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, default=_a_python).encode('utf-8')
+
+
+def _a_python(valor):
+    """Convierte escalares y arreglos de NumPy para el codificador json estándar."""
+    if isinstance(valor, (np.generic, np.ndarray)):
+        return valor.tolist()
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+
+def _serializar_msgpack(payload, muestras):
+    """Resumen + muestras como bytes crudos float64 (little-endian)."""
+    contenido = dict(payload)
+    contenido['muestras'] = {
+        nombre: np.asarray(valores, dtype='<f8').tobytes()
+        for nombre, valores in muestras.items()
+    }
+    return msgpack.packb(contenido, use_bin_type=True)
+
+
+def _serializar_arrow(payload, muestras):
+    """Tabla Arrow (x, y, dentro) con el resumen JSON en los metadatos del esquema."""
+    x = np.concatenate([muestras['dentro_x'], muestras['fuera_x']]).astype(np.float64)
+    y = np.concatenate([muestras['dentro_y'], muestras['fuera_y']]).astype(np.float64)
+    dentro = np.concatenate([
+        np.ones(len(muestras['dentro_x']), dtype=bool),
+        np.zeros(len(muestras['fuera_x']), dtype=bool)
+    ])
+
+    tabla = pa.table({'x': x, 'y': y, 'dentro': dentro})
+    tabla = tabla.replace_schema_metadata({'resumen': serializar_json(payload)})
+
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, tabla.schema) as escritor:
+        escritor.write_table(tabla)
+    return sink.getvalue()
+
+
+def comprimir(cuerpo, accept_encoding):
+    """
+    Comprime según Accept-Encoding (brotli si está instalado, si no gzip).
+
+    Returns:
+        tupla (cuerpo, content_encoding o None)
+    """
+    if len(cuerpo) < TAMANO_MINIMO_COMPRESION or not accept_encoding:
+        return cuerpo, None
+
+    aceptadas = {codificacion.split(';')[0].strip() for codificacion in accept_encoding.split(',')}
+    if 'br' in aceptadas and brotli is not None:
+        return brotli.compress(cuerpo, quality=4), 'br'
+    if 'gzip' in aceptadas:
+        return gzip.compress(cuerpo, compresslevel=5), 'gzip'
+    return cuerpo, None
+
+
+def construir_respuesta(payload, formato='json', accept_encoding=None, muestras=None):
+    """
+    Serializa el payload en el formato pedido y lo comprime si el cliente
+    lo acepta. 'muestras' (arreglos de puntos) solo viaja en msgpack/arrow.
+    """
+    if formato == 'msgpack':
+        cuerpo = _serializar_msgpack(payload, muestras or {})
+    elif formato == 'arrow':
+        cuerpo = _serializar_arrow(payload, muestras or {})
+    else:
+        cuerpo = serializar_json(payload)
+
+    cuerpo, codificacion = comprimir(cuerpo, accept_encoding)
+
+    headers = {'Vary': 'Accept-Encoding'}
+    if codificacion is not None:
+        headers['Content-Encoding'] = codificacion
+
+    return Response(content=cuerpo, media_type=FORMATOS[formato], headers=headers)
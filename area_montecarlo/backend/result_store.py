@@ -0,0 +1,115 @@
+"""
+============================================================================
+ALMACÉN DE RESULTADOS
+Resultados recientes de simulación en memoria, accesibles por id
+============================================================================
+"""
+
+import threading
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+
+from config import MAX_RESULTADOS_CACHE, MEMORIA_RESULTADOS_MB
+from memory_budget import MB
+
+
+# Caché LRU: id de resultado -> datos necesarios para servir imágenes/muestras
+_resultados = OrderedDict()
+# id de resultado -> bytes estimados de sus puntos de visualización, de sus
+# conteos de teselas y de su índice de teselas
+_tamanos = {}
+# Se guardan y leen desde los hilos del pool de FastAPI
+_lock = threading.Lock()
+
+CLAVES_PUNTOS_VIZ = ('puntos_dentro_x', 'puntos_dentro_y', 'puntos_fuera_x', 'puntos_fuera_y')
+
+
+def _compactar(resultados):
+    """
+    Copia de los resultados con los puntos de visualización en arreglos
+    float64: 16 bytes por punto en vez de los ~64 de las listas de floats de
+    Python, que se liberan al terminar la respuesta.
+    """
+    return {
+        **resultados,
+        **{clave: np.asarray(resultados[clave], dtype=np.float64)
+           for clave in CLAVES_PUNTOS_VIZ if clave in resultados}
+    }
+
+
+def _tamano(datos):
+    """
+    Bytes de los puntos de visualización (lo único que crece con N), de los
+    conteos acumulados durante la simulación y, si ya se construyó, del
+    índice de teselas: la nube ordenada por Morton y la pirámide de conteos
+    (ver density_tiles.construir_indice_teselas), cuya base puede ser la
+    misma grilla de conteos.
+    """
+    resultados = datos['resultados']
+    tamano = sum(resultados[clave].nbytes for clave in CLAVES_PUNTOS_VIZ if clave in resultados)
+
+    conteos = datos.get('conteos_teselas')
+    if conteos is not None:
+        tamano += conteos['grilla'].nbytes
+
+    indice = datos.get('teselas')
+    if indice is not None:
+        tamano += sum(indice[clave].nbytes for clave in ('codigos', 'u', 'v', 'dentro'))
+        tamano += sum(grilla.nbytes for grilla in indice['piramide'].values()
+                      if conteos is None or grilla is not conteos['grilla'])
+    return tamano
+
+
+def _descartar_antiguos():
+    """Descarta los resultados más antiguos que exceden los límites (con _lock tomado)."""
+    while len(_resultados) > 1 and (len(_resultados) > MAX_RESULTADOS_CACHE
+                                    or sum(_tamanos.values()) > MEMORIA_RESULTADOS_MB * MB):
+        antiguo, _ = _resultados.popitem(last=False)
+        del _tamanos[antiguo]
+
+
+def guardar_resultado(datos):
+    """
+    Guarda los datos de una simulación y devuelve su id; los puntos de
+    visualización se guardan como arreglos (ver _compactar). Se descartan
+    los más antiguos si hay más de MAX_RESULTADOS_CACHE o si sus puntos y
+    conteos superan MEMORIA_RESULTADOS_MB (el último siempre se conserva).
+    """
+    resultado_id = uuid.uuid4().hex
+    datos = {**datos, 'resultados': _compactar(datos['resultados'])}
+    tamano = _tamano(datos)
+    with _lock:
+        _resultados[resultado_id] = datos
+        _tamanos[resultado_id] = tamano
+        _descartar_antiguos()
+    return resultado_id
+
+
+def obtener_resultado(resultado_id):
+    """Devuelve los datos guardados de una simulación, o None si expiró."""
+    with _lock:
+        datos = _resultados.get(resultado_id)
+        if datos is not None:
+            _resultados.move_to_end(resultado_id)
+        return datos
+
+
+def adjuntar_teselas(resultado_id, datos, indice):
+    """
+    Guarda el índice de teselas junto al resultado y suma su tamaño al de
+    este, descartando resultados antiguos si ahora se supera el tope. Si
+    otro hilo ya adjuntó uno, se conserva ese.
+
+    Returns:
+        el índice guardado en datos['teselas']
+    """
+    with _lock:
+        if 'teselas' not in datos:
+            datos['teselas'] = indice
+            # El resultado pudo haber expirado mientras se construía el índice
+            if resultado_id in _tamanos:
+                _tamanos[resultado_id] = _tamano(datos)
+                _descartar_antiguos()
+        return datos['teselas']
@@ -1,27 +1,101 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+import asyncio
+import base64
+import io
+import math
+import time
+from typing import Optional
 
-from config import PAISES_SUDAMERICA, AREAS_REALES_KM2
-from data_loader import cargar_datos
-from geometry_processor import proyectar_y_calcular_bbox
-from montecarlo_simulator import simulacion_montecarlo
+import numpy as np
+import shapely
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ValidationError
+
+from config import (ZOOM_MAXIMO_TESELAS, PLAZO_SIMULACION_S, INTERVALO_DESCONEXION_S, MOTOR_CLASIFICACION_MASIVA,
+                    MAX_BYTES_CLASIFICACION, MAX_BYTES_CUERPO_POLIGONO)
+from nucleo_montecarlo import (cargar_datos, buscar_pais, crear_catalogo, geometria_pais,
+                               simular_geometria, estimacion_reticula,
+                               MOTORES, obtener_indice, MUESTREADORES, obtener_dominio,
+                               FORMAS_CONTROL, obtener_control, PRECISIONES,
+                               SimulacionCancelada, crear_cancelacion, cancelar, verificar_cancelacion,
+                               obtener_catalogo, registrar_catalogo, datos_locales, cargar_tabla)
+from nucleo_montecarlo.config import (AREAS_REALES_KM2, MOTOR_POR_DEFECTO, MUESTREADOR_POR_DEFECTO,
+                                      ESTIMADOR_POR_DEFECTO, FORMA_CONTROL_POR_DEFECTO,
+                                      PRECISION_POR_DEFECTO, RESOLUCIONES_RETICULA, NIVELES_DETALLE,
+                                      NIVEL_DETALLE_POR_DEFECTO)
+from nucleo_montecarlo.run_history import (registrar_corrida, listar_corridas, error_por_n,
+                                           rendimiento, estimacion_combinada)
+from custom_polygons import leer_poligono, registrar_poligono, obtener_poligono
+from bulk_classifier import leer_puntos, clasificar_lote, TIPO_NPY
+from multi_region import obtener_regiones, simulacion_multirregion
+from response_formats import FORMATOS, formatos_disponibles, construir_respuesta
+from result_store import guardar_resultado, obtener_resultado
+from refinement import guardar_simulacion, cargar_simulacion, extender_simulacion
+from vector_output import ContornoNoDisponible, obtener_contorno, muestra_cuantizada
+from density_tiles import obtener_tesela, crear_conteos_teselas, acumular_conteos, TAMANO_TESELA
 from display import generar_visualizacion_previa, generar_visualizacion_simulacion
+from client_quotas import CuotaExcedida, reservar_puntos, liberar_puntos
+from warmup import estado_preparacion, esta_listo
+from memory_budget import (MemoriaInsuficiente, estimar_memoria, planificar_memoria, planificar_clasificacion,
+                           reservar_memoria, liberar_memoria, estado_memoria, perfil_solicitud, iniciar_etapa,
+                           cerrar_etapa, resumen_plan, MODOS_PERFIL)
 
 router = APIRouter()
 
-# Variable global para datos
+# Variables globales para datos
 mundo = None
+indice_paises = None
 
 
 def set_mundo(data):
-    """Establece los datos geográficos cargados."""
-    global mundo
+    """
+    Establece los datos geográficos cargados, indexa todos los países por
+    nombre e ISO y prepara la proyección de igual área de cada uno.
+    
+    Returns:
+        el catálogo de países (ver nucleo_montecarlo.crear_catalogo)
+    """
+    global mundo, indice_paises
+    indice = crear_catalogo(data)
+    # Las solicitudes con el nivel de detalle por defecto usan este catálogo
+    registrar_catalogo(indice)
+    
     mundo = data
+    indice_paises = indice
+    return indice
 
 
-class SimulacionRequest(BaseModel):
+class ParametrosSimulacion(BaseModel):
+    n_puntos: int = 0 # obligatorio para montecarlo; reticula y exacto no muestrean N puntos
+    metodo: str = "montecarlo"
+    motor: str = MOTOR_POR_DEFECTO
+    muestreador: str = MUESTREADOR_POR_DEFECTO
+    estimador: str = ESTIMADOR_POR_DEFECTO
+    forma_control: str = FORMA_CONTROL_POR_DEFECTO
+    precision: str = PRECISION_POR_DEFECTO
+
+
+class SimulacionRequest(ParametrosSimulacion):
     pais: str
+    nivel_detalle: str = NIVEL_DETALLE_POR_DEFECTO
+
+
+class ExtensionRequest(BaseModel):
+    n_puntos: int
+
+
+class RegionesRequest(BaseModel):
     n_puntos: int
+    paises: Optional[list[str]] = None
+    continente: Optional[str] = None
+    muestreador: str = MUESTREADOR_POR_DEFECTO
+    semilla: Optional[int] = None # None = al azar; la usada vuelve en la respuesta
+
+
+class PoligonoRequest(BaseModel):
+    geojson: Optional[dict] = None
+    wkb_base64: Optional[str] = None
 
 
 @router.get("/")
@@ -29,91 +103,982 @@ def root():
     return {"message": "Monte Carlo Area Calculator API"}
 
 
+@router.get("/ready")
+def ready():
+    """
+    Disponibilidad para el balanceador: 503 hasta que terminan la carga de
+    datos y el precalentamiento (ver warmup.py), 200 después.
+    """
+    estado = estado_preparacion()
+    estado["memoria"] = estado_memoria()
+    if not esta_listo():
+        return JSONResponse(status_code=503, content=estado)
+    return estado
+
+
 @router.get("/paises")
-def get_paises():
-    """Retorna lista de países disponibles."""
+def get_paises(continente: Optional[str] = None):
+    """Retorna lista de países disponibles (opcionalmente filtrada por continente)."""
+    if indice_paises is None:
+        raise HTTPException(status_code=500, detail="Datos geográficos no disponibles")
+    
     return {
         "paises": [
             {
-                "nombre": pais,
-                "area_real": AREAS_REALES_KM2.get(pais, 0)
+                "nombre": info['nombre'],
+                "iso_a3": info['iso_a3'],
+                "continente": info['continente'],
+                "area_real": AREAS_REALES_KM2.get(info['nombre'], 0)
             }
-            for pais in PAISES_SUDAMERICA
+            for info in sorted(indice_paises['paises'].values(), key=lambda info: info['nombre'])
+            if continente is None or info['continente'] == continente
         ]
     }
 
 
-@router.post("/simular")
-def simular(request: SimulacionRequest):
-    """Ejecuta la simulación de Monte Carlo."""
-    global mundo
+@router.get("/motores")
+def get_motores():
+    """Retorna los motores de clasificación disponibles."""
+    return {
+        "motores": [
+            {"nombre": nombre, "descripcion": motor['descripcion']}
+            for nombre, motor in MOTORES.items()
+        ],
+        "muestreadores": [
+            {"nombre": nombre, "descripcion": muestreador['descripcion'],
+             "precisiones": list(muestreador['precisiones'])}
+            for nombre, muestreador in MUESTREADORES.items()
+        ],
+        "precisiones": [
+            {"nombre": nombre, "descripcion": precision['descripcion'],
+             "bytes_por_punto": precision['bytes_por_punto']}
+            for nombre, precision in PRECISIONES.items()
+        ]
+    }
+
+
+@router.get("/niveles_detalle")
+def get_niveles_detalle(pais: Optional[str] = None):
+    """
+    Niveles de detalle de la geometría y la tabla de vértices, área exacta
+    y costo de clasificación de cada país en cada nivel con datos locales
+    (la genera el precalentamiento, o python -m nucleo_montecarlo.niveles_detalle).
+    """
+    tabla = cargar_tabla()
+    if tabla is not None and pais is not None:
+        nombre_pais = buscar_pais(indice_paises, pais) if indice_paises is not None else None
+        tabla = {**tabla, "filas": [fila for fila in tabla['filas'] if fila['pais'] == (nombre_pais or pais)]}
     
-    if mundo is None:
-        raise HTTPException(status_code=500, detail="Datos geográficos no disponibles")
+    return {
+        "por_defecto": NIVEL_DETALLE_POR_DEFECTO,
+        "niveles": [
+            {"nombre": nombre, "escala": nivel['escala'], "tolerancia_m": nivel['tolerancia_m'],
+             "datos_locales": datos_locales(nombre)}
+            for nombre, nivel in NIVELES_DETALLE.items()
+        ],
+        "tabla": tabla
+    }
+
+
+async def _catalogo_nivel(nivel):
+    """Catálogo del nivel de detalle pedido; los niveles distintos del por defecto se cargan la primera vez."""
+    if nivel not in NIVELES_DETALLE:
+        raise HTTPException(status_code=400, detail=f"Nivel de detalle no válido. Opciones: {', '.join(NIVELES_DETALLE)}")
+    if nivel == indice_paises['nivel']:
+        return indice_paises
     
-    if request.pais not in PAISES_SUDAMERICA:
-        raise HTTPException(status_code=400, detail="País no válido")
+    catalogo = await run_in_threadpool(obtener_catalogo, nivel)
+    if catalogo is None:
+        raise HTTPException(status_code=503, detail=f"Datos del nivel de detalle {nivel} no disponibles")
+    return catalogo
+
+
+def _validar_parametros(parametros):
+    """Valida los parámetros comunes de simulación; lanza HTTPException si fallan."""
+    if parametros.metodo not in ("montecarlo", "reticula", "exacto"):
+        raise HTTPException(status_code=400, detail="Método no válido. Opciones: montecarlo, reticula, exacto")
     
-    if request.n_puntos < 100 or request.n_puntos > 10_000_000:
+    if parametros.metodo == "montecarlo" and (parametros.n_puntos < 100 or parametros.n_puntos > 10_000_000):
         raise HTTPException(status_code=400, detail="Cantidad de puntos fuera de rango (100-10,000,000)")
     
-    # Filtrar país
-    pais_gdf = mundo[mundo['NAME'] == request.pais]
+    if parametros.motor not in MOTORES:
+        raise HTTPException(status_code=400, detail=f"Motor no válido. Opciones: {', '.join(MOTORES)}")
+    
+    if parametros.muestreador not in MUESTREADORES:
+        raise HTTPException(status_code=400, detail=f"Muestreador no válido. Opciones: {', '.join(MUESTREADORES)}")
+    
+    if parametros.estimador not in ("simple", "variable_control"):
+        raise HTTPException(status_code=400, detail="Estimador no válido. Opciones: simple, variable_control")
     
-    if pais_gdf.empty:
-        raise HTTPException(status_code=404, detail=f"País '{request.pais}' no encontrado")
+    if parametros.forma_control not in FORMAS_CONTROL:
+        raise HTTPException(status_code=400, detail=f"Forma de control no válida. Opciones: {', '.join(FORMAS_CONTROL)}")
     
-    # Procesar geometría
-    geo_info = proyectar_y_calcular_bbox(pais_gdf, request.pais)
+    if parametros.precision not in MUESTREADORES[parametros.muestreador]['precisiones']:
+        opciones = ', '.join(MUESTREADORES[parametros.muestreador]['precisiones'])
+        raise HTTPException(status_code=400, detail=f"Precisión no válida para el muestreador. Opciones: {opciones}")
+
+
+def _formato_solicitado(peticion, formato):
+    """Formato pedido por ?formato= o, si falta, por la cabecera Accept."""
+    if formato is None:
+        accept = peticion.headers.get('accept', '')
+        formato = next((nombre for nombre in ('msgpack', 'arrow') if FORMATOS[nombre] in accept), 'json')
     
-    # Ejecutar simulación
-    resultados = simulacion_montecarlo(
-        geo_info['pais_proyectado'],
-        geo_info['bbox'],
-        request.n_puntos
-    )
+    if formato not in formatos_disponibles():
+        raise HTTPException(status_code=400, detail=f"Formato no válido. Opciones: {', '.join(formatos_disponibles())}")
+    return formato
+
+
+def _bloque_validacion(resultados, area_real, geo_info):
+    """
+    Error de la estimación respecto del área de referencia, separado en dos
+    partes con el área exacta del polígono proyectado (a la que converge la
+    estimación):
     
-    # Calcular error
-    area_real = AREAS_REALES_KM2.get(request.pais, 0)
+    - error_muestreo: estimación vs. polígono exacto; solo el azar de la
+      muestra (y la discretización, en la retícula). 'errores_estandar' lo
+      expresa en errores estándar de la estimación.
+    - error_datos: polígono exacto vs. área de referencia; lo que ningún N
+      corrige (islas omitidas, costas simplificadas, nivel de detalle).
+      None si no hay área de referencia.
+    """
     area_estimada = resultados['area_estimada_km2']
+    error_estandar = resultados.get('error_estandar_km2', 0)
+    area_exacta = geo_info['area_exacta_km2']
     
     if area_real > 0:
         error_absoluto = abs(area_estimada - area_real)
         error_relativo = (error_absoluto / area_real) * 100
+        error_datos = {
+            "absoluto_km2": round(area_exacta - area_real, 2),
+            "relativo_porcentaje": round((area_exacta - area_real) / area_real * 100, 4)
+        }
     else:
         error_absoluto = 0
         error_relativo = 0
+        error_datos = None
     
-    # Generar visualizaciones
-    imagen_previa = generar_visualizacion_previa(pais_gdf, request.pais)
-    imagen_simulacion = generar_visualizacion_simulacion(
-        geo_info['pais_proyectado'],
-        request.pais,
-        resultados,
-        area_real
-    )
-    
+    error_muestreo = area_estimada - area_exacta
     return {
-        "pais": request.pais,
+        "area_real_km2": area_real,
+        "area_estimada_km2": round(area_estimada, 2),
+        "error_estandar_km2": round(error_estandar, 2),
+        "error_absoluto_km2": round(error_absoluto, 2),
+        "error_relativo_porcentaje": round(error_relativo, 4),
+        "area_exacta_km2": round(area_exacta, 2),
+        "area_geodesica_km2": round(geo_info['area_geodesica_km2'], 2),
+        "error_muestreo": {
+            "absoluto_km2": round(error_muestreo, 2),
+            "relativo_porcentaje": round(error_muestreo / area_exacta * 100, 4) if area_exacta > 0 else 0,
+            "errores_estandar": round(abs(error_muestreo) / error_estandar, 3) if error_estandar > 0 else None
+        },
+        "error_datos": error_datos
+    }
+
+
+def _bloque_variable_control(vc, area_real, area_exacta):
+    """Resumen del estimador con variable de control."""
+    error_vc = abs(vc['area_estimada_km2'] - area_real) / area_real * 100 if area_real > 0 else 0
+    error_muestreo = abs(vc['area_estimada_km2'] - area_exacta) / area_exacta * 100 if area_exacta > 0 else 0
+    return {
+        "forma": vc['forma'],
+        "area_control_km2": round(vc['area_control_m2'] / 1_000_000, 2),
+        "coeficiente": round(vc['coeficiente'], 6),
+        "correlacion": round(vc['correlacion'], 6),
+        "area_estimada_km2": round(vc['area_estimada_km2'], 2),
+        "error_estandar_km2": round(vc['error_estandar_km2'], 2),
+        "error_relativo_porcentaje": round(error_vc, 4),
+        "error_muestreo_relativo_porcentaje": round(error_muestreo, 4)
+    }
+
+
+def _puntos_solicitados(parametros):
+    """Puntos que costará la solicitud (la retícula cuenta todos sus niveles)."""
+    if parametros.metodo == "reticula":
+        return sum(resolucion * resolucion for resolucion in RESOLUCIONES_RETICULA)
+    return parametros.n_puntos
+
+
+def _validar_perfil(perfil_memoria):
+    """Valida ?perfil_memoria= (ver memory_budget.perfil_solicitud)."""
+    if perfil_memoria is not None and perfil_memoria not in MODOS_PERFIL:
+        raise HTTPException(status_code=400, detail=f"Perfil de memoria no válido. Opciones: {', '.join(MODOS_PERFIL)}")
+
+
+def _plan_memoria(parametros, formato):
+    """Plan de memoria de la solicitud (ver memory_budget.planificar_memoria); 400 si no entra ni degradada."""
+    try:
+        if parametros.metodo == "reticula":
+            # La retícula guarda para visualizar solo su nivel más grueso
+            return planificar_memoria(_puntos_solicitados(parametros), parametros.motor, formato=formato,
+                                      puntos_viz=min(RESOLUCIONES_RETICULA) ** 2)
+        return planificar_memoria(parametros.n_puntos, parametros.motor, parametros.precision, formato)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def _vigilar_desconexion(peticion, cancelacion):
+    """Cancela el cálculo en cuanto el cliente cierra la conexión."""
+    while not await peticion.is_disconnected():
+        await asyncio.sleep(INTERVALO_DESCONEXION_S)
+    cancelar(cancelacion, "desconexion")
+
+
+async def _calcular(peticion, n_puntos, procesar, memoria=0):
+    """
+    Ejecuta procesar(cancelacion) en el pool de hilos con el presupuesto del
+    cliente: reserva n_puntos de su cuota y 'memoria' bytes del nodo, fija
+    el plazo del servidor y cancela el cálculo si el cliente se desconecta.
+    El simulador revisa el token entre lotes, así que el hilo se libera en a
+    lo sumo un lote; los puntos no calculados se devuelven a la cuota.
+    """
+    # Clientes identificados por IP (detrás de un proxy, configurar
+    # --forwarded-allow-ips en uvicorn para que sea la del cliente real)
+    cliente = peticion.client.host if peticion.client else "desconocido"
+    try:
+        reservar_puntos(cliente, n_puntos)
+    except CuotaExcedida as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(math.ceil(e.espera))})
+    
+    try:
+        reservar_memoria(memoria)
+    except MemoriaInsuficiente as e:
+        liberar_puntos(cliente, n_puntos, 0)
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.espera))})
+    
+    cancelacion = crear_cancelacion(PLAZO_SIMULACION_S)
+    vigia = asyncio.create_task(_vigilar_desconexion(peticion, cancelacion))
+    puntos_usados = n_puntos
+    try:
+        return await run_in_threadpool(procesar, cancelacion)
+    except SimulacionCancelada as e:
+        puntos_usados = e.puntos_procesados
+        if e.motivo == "plazo":
+            raise HTTPException(status_code=503, detail=f"Se superó el plazo de cómputo de {PLAZO_SIMULACION_S} s "
+                                                        f"({e.puntos_procesados:,} de {n_puntos:,} puntos)")
+        # 499: el cliente cerró la conexión (nadie recibirá esta respuesta)
+        raise HTTPException(status_code=499, detail="Cliente desconectado")
+    finally:
+        # Si esta tarea se cancela antes de que termine el hilo, el token lo detiene
+        cancelar(cancelacion, "desconexion")
+        vigia.cancel()
+        liberar_puntos(cliente, n_puntos, puntos_usados)
+        liberar_memoria(memoria)
+
+
+async def _leer_cuerpo(peticion, maximo):
+    """Cuerpo de la petición; 413 apenas supera 'maximo' bytes, sin leer el resto."""
+    declarado = peticion.headers.get('content-length', '')
+    if declarado.isdigit() and int(declarado) > maximo:
+        raise HTTPException(status_code=413, detail=f"El cuerpo excede el tamaño máximo ({maximo:,} bytes)")
+    
+    partes, total = [], 0
+    async for parte in peticion.stream():
+        total += len(parte)
+        if total > maximo:
+            raise HTTPException(status_code=413, detail=f"El cuerpo excede el tamaño máximo ({maximo:,} bytes)")
+        partes.append(parte)
+    return b"".join(partes)
+
+
+def _contorno(geo_info):
+    """Contorno vectorial (ver vector_output.obtener_contorno); 500 con el detalle si GEOS falla."""
+    try:
+        return obtener_contorno(geo_info)
+    except ContornoNoDisponible as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _respuesta_exacta(geo_info, nombre, area_real, formato, accept_encoding):
+    """
+    metodo "exacto": el área del polígono proyectado, ya calculada con la
+    geometría (ver nucleo_montecarlo.geometry_processor), sin muestrear ni
+    consumir cuota. La validación tiene solo error de datos.
+    """
+    area_exacta = geo_info['area_exacta_km2']
+    resultados = {'area_estimada_km2': area_exacta, 'error_estandar_km2': 0}
+    respuesta = {
+        "pais": nombre,
         "area_real_km2": area_real,
         "coordenadas_geograficas": geo_info['coords_geo'],
         "coordenadas_proyectadas": geo_info['coords_proyectadas'],
         "proyeccion": geo_info['proyeccion'],
+        "geometria": {"nivel_detalle": geo_info.get('nivel_detalle'), "vertices": geo_info['vertices']},
         "simulacion": {
+            "metodo": "exacto",
+            "n_puntos": 0,
+            "area_estimada_km2": round(area_exacta, 2),
+            "area_geodesica_km2": round(geo_info['area_geodesica_km2'], 2),
+            "error_estandar_km2": 0
+        },
+        "validacion": _bloque_validacion(resultados, area_real, geo_info)
+    }
+    if formato == "vectorial":
+        respuesta["vectorial"] = {"contorno": _contorno(geo_info)}
+    # msgpack y arrow llevan las muestras: sin puntos, arreglos vacíos
+    muestras = dict.fromkeys(("dentro_x", "dentro_y", "fuera_x", "fuera_y"), np.empty(0))
+    return construir_respuesta(respuesta, formato, accept_encoding, muestras)
+
+
+def _ejecutar_simulacion(geo_info, nombre, pais_gdf, area_real, parametros, formato="json", objetivo=None,
+                         cancelacion=None, plan_memoria=None, perfil=None):
+    """
+    Pipeline común: geometría proyectada (ya cacheada) -> estimación ->
+    validación -> visualizaciones. Lo usan los países y los polígonos
+    personalizados.
+    
+    Solo el formato "json" incrusta las imágenes en base64; los demás
+    devuelven sus URLs y las imágenes se generan al pedirlas. El formato
+    "vectorial" agrega el contorno y una muestra cuantizada para que el
+    navegador dibuje la simulación sin pasar por matplotlib.
+    
+    'objetivo' identifica al país o polígono para guardar las estadísticas
+    de la corrida y poder extenderla con /simulaciones/{id}/extender.
+    
+    'cancelacion' (ver _calcular) detiene la estimación entre lotes y evita
+    renderizar imágenes que nadie va a recibir.
+    
+    'plan_memoria' (ver _plan_memoria) fija cuántos puntos de visualización
+    se guardan; 'perfil' (ver memory_budget.perfil_solicitud) recibe la
+    memoria de cada etapa.
+    
+    Returns:
+        tupla (respuesta, resultados del simulador); los resultados van
+        directo a _responder, sin releerlos del almacén (que puede haberlos
+        descartado ya)
+    """
+    tiempos = {}
+    inicio = time.perf_counter()
+    marca = iniciar_etapa(perfil)
+    conteos_teselas = None
+    
+    if parametros.metodo == "reticula":
+        # Conteo determinista en retícula (n_puntos no aplica)
+        resultados = estimacion_reticula(
+            geo_info['pais_proyectado'],
+            geo_info['bbox'],
+            parametros.motor,
+            indice=obtener_indice(geo_info, parametros.motor),
+            cancelacion=cancelacion
+        )
+        bloque_simulacion = {
+            "metodo": "reticula",
+            "n_puntos": resultados['n_puntos'],
+            "motor": resultados['motor'],
+            "tiempo_segundos": round(resultados['tiempo_simulacion'], 4),
+            "area_bbox_km2": round(resultados['area_bbox_m2'] / 1_000_000, 2),
+            "niveles": [
+                {
+                    "resolucion": nivel['resolucion'],
+                    "n_puntos": nivel['n_puntos'],
+                    "puntos_dentro": nivel['puntos_dentro'],
+                    "area_estimada_km2": round(nivel['area_estimada_km2'], 2),
+                    "tiempo_segundos": round(nivel['tiempo'], 4)
+                }
+                for nivel in resultados['niveles']
+            ],
+            "area_nivel_fino_km2": round(resultados['area_nivel_fino_km2'], 2),
+            "extrapolacion": resultados['extrapolacion'],
+            "orden_richardson": (round(resultados['orden_richardson'], 3)
+                                 if resultados['orden_richardson'] is not None else None),
+            "area_estimada_km2": round(resultados['area_estimada_km2'], 2)
+        }
+    else:
+        dominio = obtener_dominio(geo_info, parametros.muestreador)
+        control = None
+        if parametros.estimador == "variable_control":
+            control = obtener_control(geo_info, parametros.muestreador, dominio, parametros.forma_control)
+        
+        # Ejecutar simulación; las teselas de zoom bajo se cuentan sobre
+        # todos los puntos, lote a lote, aunque solo se guarden algunos
+        conteos_teselas = crear_conteos_teselas(geo_info['bbox'])
+        resultados = simular_geometria(
+            geo_info,
+            parametros.n_puntos,
+            motor=parametros.motor,
+            muestreador=parametros.muestreador,
+            precision=parametros.precision,
+            control=control,
+            cancelacion=cancelacion,
+            acumular=lambda x, y, dentro: acumular_conteos(conteos_teselas, x, y, dentro),
+            **({'max_puntos_viz': plan_memoria['max_puntos_viz']} if plan_memoria else {})
+        )
+        bloque_simulacion = {
+            "metodo": "montecarlo",
             "n_puntos": resultados['n_puntos'],
+            "motor": resultados['motor'],
+            "muestreador": resultados['muestreador'],
+            "precision": resultados['precision'],
             "puntos_dentro": resultados['puntos_dentro'],
             "puntos_fuera": resultados['puntos_fuera'],
             "tiempo_segundos": round(resultados['tiempo_simulacion'], 2),
             "area_bbox_km2": round(resultados['area_bbox_m2'] / 1_000_000, 2),
+            "area_dominio_km2": round(resultados['area_dominio_m2'] / 1_000_000, 2),
             "proporcion": round(resultados['puntos_dentro'] / resultados['n_puntos'], 6),
-            "area_estimada_km2": round(area_estimada, 2)
-        },
-        "validacion": {
+            "area_estimada_km2": round(resultados['area_estimada_km2'], 2),
+            "error_estandar_km2": round(resultados['error_estandar_km2'], 2)
+        }
+    
+    tiempos['estimacion'] = time.perf_counter() - inicio
+    cerrar_etapa(perfil, 'estimacion', marca)
+    verificar_cancelacion(cancelacion, _puntos_solicitados(parametros))
+    
+    simulacion_id = None
+    if parametros.metodo == "montecarlo" and objetivo is not None:
+        # Estadísticas suficientes para poder extender la corrida después
+        simulacion_id = guardar_simulacion(objetivo, parametros, resultados)
+    
+    resultado_id = guardar_resultado({
+        "nombre": nombre,
+        "nivel_detalle": geo_info.get('nivel_detalle'),
+        "pais_gdf": pais_gdf,
+        "pais_proyectado": geo_info['pais_proyectado'],
+        "resultados": resultados,
+        "conteos_teselas": conteos_teselas,
+        "area_real": area_real
+    })
+    
+    respuesta = {
+        "resultado_id": resultado_id,
+        "pais": nombre,
+        "area_real_km2": area_real,
+        "coordenadas_geograficas": geo_info['coords_geo'],
+        "coordenadas_proyectadas": geo_info['coords_proyectadas'],
+        "proyeccion": geo_info['proyeccion'],
+        "geometria": {"nivel_detalle": geo_info.get('nivel_detalle'), "vertices": geo_info['vertices']},
+        "simulacion": bloque_simulacion,
+        "validacion": _bloque_validacion(resultados, area_real, geo_info)
+    }
+    
+    if simulacion_id is not None:
+        respuesta["simulacion_id"] = simulacion_id
+    
+    if formato == "json":
+        # Generar visualizaciones
+        inicio = time.perf_counter()
+        marca = iniciar_etapa(perfil)
+        respuesta["visualizacion_previa"] = generar_visualizacion_previa(pais_gdf, nombre,
+                                                                         geo_info.get('nivel_detalle'))
+        respuesta["visualizacion_simulacion"] = generar_visualizacion_simulacion(
+            geo_info['pais_proyectado'],
+            nombre,
+            resultados,
+            area_real,
+            geo_info.get('nivel_detalle')
+        )
+        tiempos['visualizacion'] = time.perf_counter() - inicio
+        cerrar_etapa(perfil, 'visualizacion', marca)
+    else:
+        respuesta["visualizacion_previa_url"] = f"/resultados/{resultado_id}/visualizacion_previa.png"
+        respuesta["visualizacion_simulacion_url"] = f"/resultados/{resultado_id}/visualizacion_simulacion.png"
+    
+    if formato == "vectorial":
+        respuesta["vectorial"] = {
+            "contorno": _contorno(geo_info),
+            "muestra": muestra_cuantizada(resultados)
+        }
+    
+    if 'variable_control' in resultados:
+        respuesta["variable_control"] = _bloque_variable_control(resultados['variable_control'], area_real,
+                                                                 geo_info['area_exacta_km2'])
+    
+    respuesta["tiempos_etapas"] = {etapa: round(segundos, 4) for etapa, segundos in tiempos.items()}
+    if plan_memoria is not None:
+        respuesta["memoria"] = resumen_plan(plan_memoria)
+    if perfil is not None:
+        respuesta["memoria_etapas"] = perfil
+    registrar_corrida("api", nombre, parametros.metodo, resultados, area_real,
+                      estimador=parametros.estimador, tiempos_etapas=respuesta["tiempos_etapas"],
+                      nivel_detalle=geo_info.get('nivel_detalle'))
+    
+    return respuesta, resultados
+
+
+def _responder(peticion, respuesta, resultados, formato):
+    """Serializa (y comprime si el cliente lo acepta) la respuesta de una simulación."""
+    muestras = None
+    if formato in ("msgpack", "arrow"):
+        muestras = {
+            "dentro_x": resultados['puntos_dentro_x'],
+            "dentro_y": resultados['puntos_dentro_y'],
+            "fuera_x": resultados['puntos_fuera_x'],
+            "fuera_y": resultados['puntos_fuera_y']
+        }
+    return construir_respuesta(respuesta, formato, peticion.headers.get('accept-encoding'), muestras)
+
+
+@router.post("/simular")
+async def simular(request: SimulacionRequest, peticion: Request, formato: Optional[str] = None,
+                  perfil_memoria: Optional[str] = None):
+    """
+    Ejecuta la simulación de Monte Carlo.
+    
+    Formatos (?formato= o cabecera Accept): json (con imágenes en base64),
+    ligero (sin imágenes, con sus URLs), vectorial (contorno GeoJSON/SVG y
+    muestra cuantizada para dibujar en el navegador), msgpack y arrow
+    (incluyen las muestras como arreglos binarios). Se comprime con br/gzip según
+    Accept-Encoding.
+    
+    Con metodo "exacto" responde al instante el área del polígono proyectado
+    (y la geodésica), sin muestrear ni consumir la cuota de puntos.
+    
+    nivel_detalle elige la geometría (ver /niveles_detalle): 110m por
+    defecto; 50m, 10m y sus derivados simplificados incluyen las islas a
+    cambio de más vértices por clasificar.
+    
+    Antes de empezar se estima la memoria de la solicitud: si no entra se
+    degrada a menos puntos de visualización o se rechaza (ver "memoria" en
+    la respuesta). Con ?perfil_memoria=rss (o =tracemalloc, más detallado
+    y mucho más lento) se agrega la memoria medida en cada etapa
+    ("memoria_etapas").
+    """
+    global mundo
+    
+    if mundo is None:
+        raise HTTPException(status_code=500, detail="Datos geográficos no disponibles")
+    
+    _validar_parametros(request)
+    catalogo = await _catalogo_nivel(request.nivel_detalle)
+    
+    nombre_pais = buscar_pais(catalogo, request.pais)
+    if nombre_pais is None:
+        raise HTTPException(status_code=400, detail="País no válido")
+    
+    formato = _formato_solicitado(peticion, formato)
+    
+    if request.metodo == "exacto":
+        def _exacta():
+            _, geo_info = geometria_pais(catalogo, nombre_pais)
+            return _respuesta_exacta(geo_info, nombre_pais, AREAS_REALES_KM2.get(nombre_pais, 0), formato,
+                                     peticion.headers.get('accept-encoding'))
+        return await run_in_threadpool(_exacta)
+    
+    _validar_perfil(perfil_memoria)
+    plan = _plan_memoria(request, formato)
+    
+    def _procesar(cancelacion):
+        with perfil_solicitud(perfil_memoria) as perfil:
+            pais_gdf, geo_info = geometria_pais(catalogo, nombre_pais)
+            objetivo = {"tipo": "pais", "id": nombre_pais, "nivel_detalle": request.nivel_detalle}
+            return _ejecutar_simulacion(geo_info, nombre_pais, pais_gdf, AREAS_REALES_KM2.get(nombre_pais, 0), request,
+                                        formato, objetivo=objetivo, cancelacion=cancelacion,
+                                        plan_memoria=plan, perfil=perfil)
+    
+    respuesta, resultados = await _calcular(peticion, _puntos_solicitados(request), _procesar, plan['bytes'])
+    return await run_in_threadpool(_responder, peticion, respuesta, resultados, formato)
+
+
+@router.get("/resultados/{resultado_id}/{imagen}.png")
+def imagen_resultado(resultado_id: str, imagen: str):
+    """Genera bajo demanda la imagen PNG de una simulación reciente."""
+    datos = obtener_resultado(resultado_id)
+    if datos is None:
+        raise HTTPException(status_code=404, detail="Resultado no encontrado o expirado")
+    
+    if imagen == "visualizacion_previa":
+        imagen_base64 = generar_visualizacion_previa(datos['pais_gdf'], datos['nombre'], datos['nivel_detalle'])
+    elif imagen == "visualizacion_simulacion":
+        imagen_base64 = generar_visualizacion_simulacion(
+            datos['pais_proyectado'], datos['nombre'], datos['resultados'], datos['area_real'],
+            datos['nivel_detalle']
+        )
+    else:
+        raise HTTPException(status_code=404, detail="Imagen no válida")
+    
+    return Response(content=base64.b64decode(imagen_base64), media_type="image/png")
+
+
+@router.get("/resultados/{resultado_id}/teselas")
+def info_teselas(resultado_id: str):
+    """Describe la grilla XYZ de teselas de densidad de una simulación reciente."""
+    datos = obtener_resultado(resultado_id)
+    if datos is None:
+        raise HTTPException(status_code=404, detail="Resultado no encontrado o expirado")
+    
+    min_x, min_y, max_x, max_y = datos['resultados']['bbox']
+    lado = max(max_x - min_x, max_y - min_y)
+    return {
+        "url": f"/resultados/{resultado_id}/teselas/{{z}}/{{x}}/{{y}}.png",
+        "tamano_tesela": TAMANO_TESELA,
+        "zoom_maximo": ZOOM_MAXIMO_TESELAS,
+        "extension_m": [min_x, max_y - lado, min_x + lado, max_y],
+        "bbox": [min_x, min_y, max_x, max_y]
+    }
+
+
+@router.get("/resultados/{resultado_id}/teselas/{z}/{x}/{y}.png")
+def tesela_resultado(resultado_id: str, z: int, x: int, y: int):
+    """
+    Tesela de densidad (z, x, y) de una simulación reciente: conteos de
+    puntos dentro/fuera por píxel sobre el cuadrado que cubre el bbox.
+    """
+    datos = obtener_resultado(resultado_id)
+    if datos is None:
+        raise HTTPException(status_code=404, detail="Resultado no encontrado o expirado")
+    
+    try:
+        png = obtener_tesela(resultado_id, datos, z, x, y)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return Response(content=png, media_type="image/png", headers={"Cache-Control": "max-age=3600"})
+
+
+@router.post("/simular_regiones")
+async def simular_regiones(request: RegionesRequest, peticion: Request):
+    """
+    Estima el área de varios países con una sola nube de puntos sobre el
+    bbox de su unión; cada punto se asigna a un país mediante un STRtree.
+    """
+    if mundo is None:
+        raise HTTPException(status_code=500, detail="Datos geográficos no disponibles")
+    
+    if (request.paises is None) == (request.continente is None):
+        raise HTTPException(status_code=400, detail="Indique 'paises' o 'continente'")
+    
+    if request.n_puntos < 100 or request.n_puntos > 10_000_000:
+        raise HTTPException(status_code=400, detail="Cantidad de puntos fuera de rango (100-10,000,000)")
+    
+    if request.muestreador not in MUESTREADORES:
+        raise HTTPException(status_code=400, detail=f"Muestreador no válido. Opciones: {', '.join(MUESTREADORES)}")
+    
+    if request.semilla is not None and request.semilla < 0:
+        raise HTTPException(status_code=400, detail="La semilla debe ser un entero no negativo")
+    
+    if request.paises is not None:
+        nombres = {buscar_pais(indice_paises, consulta) for consulta in request.paises}
+        if None in nombres:
+            raise HTTPException(status_code=400, detail="País no válido en la lista")
+    else:
+        nombres = {info['nombre'] for info in indice_paises['paises'].values()
+                   if info['continente'] == request.continente}
+        if not nombres:
+            raise HTTPException(status_code=400, detail="Continente sin países")
+    
+    nombres = sorted(nombres)
+    
+    def _procesar(cancelacion):
+        regiones = obtener_regiones(
+            nombres,
+            [mundo.geometry.iloc[indice_paises['paises'][nombre]['posicion']] for nombre in nombres]
+        )
+        return regiones, simulacion_multirregion(regiones, request.n_puntos, request.muestreador,
+                                                 request.semilla, cancelacion)
+    
+    # Sin puntos de visualización: solo los lotes de muestras y sus etiquetas
+    memoria = estimar_memoria(request.n_puntos, "vectorizado")
+    regiones, resultados = await _calcular(peticion, request.n_puntos, _procesar, memoria)
+    
+    paises = []
+    for nombre in nombres:
+        estimacion = resultados['paises'][nombre]
+        area_real = AREAS_REALES_KM2.get(nombre, 0)
+        error_relativo = abs(estimacion['area_estimada_km2'] - area_real) / area_real * 100 if area_real > 0 else 0
+        paises.append({
+            "pais": nombre,
+            "puntos_dentro": estimacion['puntos_dentro'],
+            "area_estimada_km2": round(estimacion['area_estimada_km2'], 2),
+            "error_estandar_km2": round(estimacion['error_estandar_km2'], 2),
             "area_real_km2": area_real,
-            "area_estimada_km2": round(area_estimada, 2),
-            "error_absoluto_km2": round(error_absoluto, 2),
             "error_relativo_porcentaje": round(error_relativo, 4)
+        })
+    
+    return {
+        "proyeccion": regiones['proyeccion'],
+        "n_puntos": resultados['n_puntos'],
+        "muestreador": resultados['muestreador'],
+        "semilla": resultados['semilla'],
+        "area_dominio_km2": round(resultados['area_dominio_m2'] / 1_000_000, 2),
+        "tiempo_segundos": round(resultados['tiempo_simulacion'], 2),
+        "paises": paises,
+        "total": {
+            "puntos_dentro": resultados['total']['puntos_dentro'],
+            "area_estimada_km2": round(resultados['total']['area_estimada_km2'], 2),
+            "error_estandar_km2": round(resultados['total']['error_estandar_km2'], 2)
+        }
+    }
+
+
+@router.post("/poligonos", openapi_extra={"requestBody": {
+    "required": True, "content": {"application/json": {"schema": PoligonoRequest.model_json_schema()}}}})
+async def subir_poligono(peticion: Request):
+    """
+    Registra un polígono propio (GeoJSON o WKB en base64, en WGS84). Se valida,
+    se proyecta y se cachea bajo el hash de su contenido; subir el mismo
+    polígono otra vez devuelve el mismo id sin reprocesarlo.
+    
+    Cuerpo: {"geojson": {...}} o {"wkb_base64": "..."} (ver PoligonoRequest).
+    El tamaño se limita antes de decodificar el JSON, porque los límites de
+    leer_poligono se aplican recién sobre los objetos ya construidos.
+    """
+    contenido = await _leer_cuerpo(peticion, MAX_BYTES_CUERPO_POLIGONO)
+    
+    def _registrar():
+        try:
+            request = PoligonoRequest.model_validate_json(contenido)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_input=False))
+        try:
+            geometria = leer_poligono(request.geojson, request.wkb_base64)
+            # La proyección puede invalidar el polígono y no siempre se puede reparar
+            poligono_id, geo_info = registrar_poligono(geometria)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return poligono_id, geometria, geo_info
+    
+    poligono_id, geometria, geo_info = await run_in_threadpool(_registrar)
+    return {
+        "poligono_id": poligono_id,
+        "n_vertices": int(shapely.get_num_coordinates(geometria)),
+        "coordenadas_geograficas": geo_info['coords_geo'],
+        "coordenadas_proyectadas": geo_info['coords_proyectadas'],
+        "proyeccion": geo_info['proyeccion']
+    }
+
+
+@router.post("/poligonos/{poligono_id}/simular")
+async def simular_poligono(poligono_id: str, request: ParametrosSimulacion, peticion: Request,
+                           formato: Optional[str] = None, perfil_memoria: Optional[str] = None):
+    """Ejecuta la simulación sobre un polígono registrado con /poligonos (mismos formatos que /simular)."""
+    geo_info = obtener_poligono(poligono_id)
+    if geo_info is None:
+        raise HTTPException(status_code=404, detail="Polígono no encontrado; vuelva a subirlo a /poligonos")
+    
+    _validar_parametros(request)
+    formato = _formato_solicitado(peticion, formato)
+    
+    if request.metodo == "exacto":
+        return await run_in_threadpool(_respuesta_exacta, geo_info, f"Polígono {poligono_id[:12]}", 0, formato,
+                                       peticion.headers.get('accept-encoding'))
+    
+    _validar_perfil(perfil_memoria)
+    plan = _plan_memoria(request, formato)
+    
+    def _procesar(cancelacion):
+        with perfil_solicitud(perfil_memoria) as perfil:
+            return _ejecutar_simulacion(geo_info, f"Polígono {poligono_id[:12]}", geo_info['pais_gdf'], 0, request,
+                                        formato, objetivo={"tipo": "poligono", "id": poligono_id},
+                                        cancelacion=cancelacion, plan_memoria=plan, perfil=perfil)
+    
+    respuesta, resultados = await _calcular(peticion, _puntos_solicitados(request), _procesar, plan['bytes'])
+    return await run_in_threadpool(_responder, peticion, respuesta, resultados, formato)
+
+
+@router.post("/simulaciones/{simulacion_id}/extender")
+async def extender(simulacion_id: str, request: ExtensionRequest, peticion: Request):
+    """
+    Agrega puntos a una simulación de Monte Carlo anterior (devuelta por
+    /simular como simulacion_id) y combina sus conteos: la estimación y el
+    error estándar corresponden a todos los puntos acumulados, pero solo se
+    calculan los nuevos.
+    """
+    estadisticas = cargar_simulacion(simulacion_id)
+    if estadisticas is None:
+        raise HTTPException(status_code=404, detail="Simulación no encontrada")
+    
+    if request.n_puntos < 100 or request.n_puntos > 10_000_000:
+        raise HTTPException(status_code=400, detail="Cantidad de puntos fuera de rango (100-10,000,000)")
+    
+    objetivo = estadisticas['objetivo']
+    if objetivo['tipo'] == "pais":
+        if mundo is None:
+            raise HTTPException(status_code=500, detail="Datos geográficos no disponibles")
+        # Las simulaciones guardadas antes de los niveles de detalle usaban el 110m
+        catalogo = await _catalogo_nivel(objetivo.get('nivel_detalle', "110m"))
+        if objetivo['id'] not in catalogo['paises']:
+            raise HTTPException(status_code=404, detail=f"El país de la simulación ({objetivo['id']}) "
+                                                        f"no está en el nivel {catalogo['nivel']}")
+        nombre = objetivo['id']
+        area_real = AREAS_REALES_KM2.get(nombre, 0)
+        geo_info = None
+    else:
+        geo_info = obtener_poligono(objetivo['id'])
+        if geo_info is None:
+            raise HTTPException(status_code=404, detail="Polígono no encontrado; vuelva a subirlo a /poligonos")
+        nombre = f"Polígono {objetivo['id'][:12]}"
+        area_real = 0
+    
+    def _procesar(cancelacion):
+        # Con la caché fría, proyectar y verificar el país lleva tiempo: fuera del event loop
+        info = geo_info if geo_info is not None else geometria_pais(catalogo, nombre)[1]
+        dominio = obtener_dominio(info, estadisticas['muestreador'])
+        control = None
+        if estadisticas['estimador'] == "variable_control":
+            control = obtener_control(info, estadisticas['muestreador'], dominio, estadisticas['forma_control'])
+        
+        precision = estadisticas.get('precision', "float64")
+        return info, extender_simulacion(
+            simulacion_id, info, request.n_puntos,
+            obtener_indice(info, estadisticas['motor'], local=PRECISIONES[precision]['local']),
+            dominio, control, cancelacion
+        )
+    
+    try:
+        memoria = estimar_memoria(request.n_puntos, estadisticas['motor'], estadisticas.get('precision', "float64"))
+        info_objetivo, resultados = await _calcular(peticion, request.n_puntos, _procesar, memoria)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    # En el historial se registran solo los puntos nuevos, para que las
+    # estimaciones combinadas no cuenten dos veces la corrida original
+    registrar_corrida("api_extension", nombre, "montecarlo", {
+        "motor": estadisticas['motor'],
+        "muestreador": estadisticas['muestreador'],
+        "n_puntos": resultados['n_puntos_agregados'],
+        "puntos_dentro": resultados['puntos_dentro_agregados'],
+        "area_dominio_m2": resultados['area_dominio_m2'],
+        "area_estimada_km2": resultados['area_dominio_m2'] * resultados['puntos_dentro_agregados']
+                             / resultados['n_puntos_agregados'] / 1_000_000,
+        "tiempo_simulacion": resultados['tiempo_extension']
+    }, area_real, estimador=estadisticas['estimador'], nivel_detalle=info_objetivo.get('nivel_detalle'))
+    
+    respuesta = {
+        "simulacion_id": simulacion_id,
+        "pais": nombre,
+        "simulacion": {
+            "metodo": "montecarlo",
+            "n_puntos": resultados['n_puntos'],
+            "n_puntos_agregados": resultados['n_puntos_agregados'],
+            "extensiones": resultados['extensiones'],
+            "motor": estadisticas['motor'],
+            "muestreador": estadisticas['muestreador'],
+            "precision": estadisticas.get('precision', "float64"),
+            "puntos_dentro": resultados['puntos_dentro'],
+            "puntos_fuera": resultados['puntos_fuera'],
+            "tiempo_segundos": round(resultados['tiempo_extension'], 2),
+            "tiempo_total_segundos": round(resultados['tiempo_total'], 2),
+            "area_dominio_km2": round(resultados['area_dominio_m2'] / 1_000_000, 2),
+            "proporcion": round(resultados['puntos_dentro'] / resultados['n_puntos'], 6),
+            "area_estimada_km2": round(resultados['area_estimada_km2'], 2),
+            "error_estandar_km2": round(resultados['error_estandar_km2'], 2)
         },
-        "visualizacion_previa": imagen_previa,
-        "visualizacion_simulacion": imagen_simulacion
+        "validacion": _bloque_validacion(resultados, area_real, info_objetivo)
     }
+    
+    if 'variable_control' in resultados:
+        respuesta["variable_control"] = _bloque_variable_control(resultados['variable_control'], area_real,
+                                                                 info_objetivo['area_exacta_km2'])
+    
+    return respuesta
+
+
+@router.get("/historial")
+def historial(limite: int = 100, pais: Optional[str] = None, motor: Optional[str] = None,
+              muestreador: Optional[str] = None, metodo: Optional[str] = None, origen: Optional[str] = None,
+              desde: Optional[str] = None, nivel_detalle: Optional[str] = None):
+    """Corridas registradas más recientes (API y CLI), con filtros opcionales."""
+    return {"corridas": listar_corridas(min(limite, 1000), pais=pais, motor=motor, muestreador=muestreador,
+                                        metodo=metodo, origen=origen, desde=desde, nivel_detalle=nivel_detalle)}
+
+
+@router.get("/historial/error_por_n")
+def historial_error_por_n(pais: Optional[str] = None, motor: Optional[str] = None,
+                          muestreador: Optional[str] = None, metodo: Optional[str] = None,
+                          origen: Optional[str] = None, desde: Optional[str] = None,
+                          nivel_detalle: Optional[str] = None):
+    """Error relativo medio respecto de AREAS_REALES_KM2 según N y nivel de detalle."""
+    return {"grupos": error_por_n(pais=pais, motor=motor, muestreador=muestreador,
+                                  metodo=metodo, origen=origen, desde=desde, nivel_detalle=nivel_detalle)}
+
+
+@router.get("/historial/rendimiento")
+def historial_rendimiento(agrupacion: str = "dia", motor: Optional[str] = None,
+                          muestreador: Optional[str] = None, metodo: Optional[str] = None,
+                          origen: Optional[str] = None, desde: Optional[str] = None):
+    """Tendencia de puntos por segundo por período, motor y equipo."""
+    try:
+        periodos = rendimiento(agrupacion, motor=motor, muestreador=muestreador,
+                               metodo=metodo, origen=origen, desde=desde)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"periodos": periodos}
+
+
+@router.get("/historial/combinada")
+def historial_combinada(pais: str, motor: Optional[str] = None, muestreador: Optional[str] = None,
+                        origen: Optional[str] = None, desde: Optional[str] = None,
+                        nivel_detalle: Optional[str] = None):
+    """
+    Estimación de mayor precisión combinando todas las corridas registradas
+    de un país, sin ejecutar puntos nuevos.
+    """
+    nombre_pais = buscar_pais(indice_paises, pais) if indice_paises is not None else None
+    combinada = estimacion_combinada(nombre_pais or pais, motor=motor, muestreador=muestreador,
+                                     origen=origen, desde=desde, nivel_detalle=nivel_detalle)
+    if combinada is None:
+        raise HTTPException(status_code=404, detail="No hay corridas de Monte Carlo registradas para ese país")
+    return combinada
+
+
+def _respuesta_clasificacion(ids, nombres, npy):
+    """Respuesta de /clasificar (se arma en el pool de hilos: con millones de puntos no es trivial)."""
+    # Un solo objetivo: basta un booleano por punto
+    resultado = ids == 0 if len(nombres) == 1 else ids
+    
+    if npy:
+        buffer = io.BytesIO()
+        np.save(buffer, resultado, allow_pickle=False)
+        return Response(content=buffer.getvalue(), media_type=TIPO_NPY,
+                        headers={"X-Objetivos": ",".join(nombres) if len(nombres) <= 32 else str(len(nombres))})
+    
+    if len(nombres) == 1:
+        return JSONResponse({"objetivo": nombres[0], "n_puntos": len(ids), "dentro": resultado.astype(np.uint8).tolist()})
+    return JSONResponse({"objetivos": nombres, "n_puntos": len(ids), "ids": resultado.tolist()})
+
+
+@router.post("/clasificar")
+async def clasificar(request: Request, paises: Optional[str] = None, poligono_id: Optional[str] = None,
+                     coordenadas: str = "lonlat", motor: str = MOTOR_CLASIFICACION_MASIVA):
+    """
+    Clasifica un lote de puntos (JSON, .npy o Arrow según Content-Type).
+    
+    Objetivos: un polígono registrado (poligono_id), una lista de países
+    separada por comas (nombres o ISO) o, por defecto, todos los países.
+    La respuesta es un arreglo booleano (un objetivo) o de ids de país
+    (-1 = ninguno); con Accept: application/x-npy se devuelve como .npy.
+    
+    Como /simular, los puntos cuentan en la cuota del cliente y la memoria
+    estimada pasa por la admisión del nodo; el cuerpo se limita a
+    MAX_BYTES_CLASIFICACION.
+    """
+    if mundo is None:
+        raise HTTPException(status_code=500, detail="Datos geográficos no disponibles")
+    if motor not in MOTORES:
+        raise HTTPException(status_code=400, detail=f"Motor no válido. Opciones: {', '.join(MOTORES)}")
+    if coordenadas not in ('lonlat', 'proyectadas'):
+        raise HTTPException(status_code=400, detail="coordenadas debe ser 'lonlat' o 'proyectadas'")
+    
+    if poligono_id is not None:
+        geo_info = obtener_poligono(poligono_id)
+        if geo_info is None:
+            raise HTTPException(status_code=404, detail="Polígono no encontrado; vuelva a subirlo a /poligonos")
+        nombres = [poligono_id]
+    else:
+        if paises is None:
+            nombres = list(indice_paises['paises'])
+        else:
+            nombres = [buscar_pais(indice_paises, consulta) for consulta in paises.split(',')]
+            if None in nombres:
+                raise HTTPException(status_code=400, detail="País no válido en la lista")
+    
+    contenido = await _leer_cuerpo(request, MAX_BYTES_CLASIFICACION)
+    npy = TIPO_NPY in request.headers.get('accept', '')
+    try:
+        x, y = await run_in_threadpool(leer_puntos, contenido, request.headers.get('content-type'))
+        memoria = planificar_clasificacion(len(x), motor, len(contenido), "npy" if npy else "json")
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Lote inválido: {e}")
+    
+    def _procesar(cancelacion):
+        # Proyectar un país la primera vez lleva tiempo: fuera del event loop
+        if poligono_id is not None:
+            objetivos = [geo_info]
+        else:
+            objetivos = [geometria_pais(indice_paises, nombre)[1] for nombre in nombres]
+        ids = clasificar_lote(x, y, objetivos, coordenadas, motor, cancelacion)
+        return _respuesta_clasificacion(ids, nombres, npy)
+    
+    try:
+        return await _calcular(request, len(x), _procesar, memoria)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Lote inválido: {e}")
@@ -0,0 +1,115 @@
+"""
+============================================================================
+SALIDA VECTORIAL
+Contorno simplificado y muestra cuantizada para dibujar en el navegador
+============================================================================
+"""
+
+import base64
+
+import numpy as np
+import shapely
+from shapely.geometry import mapping
+
+from config import TOLERANCIA_CONTORNO_VECTORIAL_M, MAX_PUNTOS_VECTORIAL, ANCHO_VIEWBOX_SVG
+
+# Rango de la cuantización de coordenadas (uint16)
+ESCALA_CUANTIZACION = 65535
+
+
+class ContornoNoDisponible(Exception):
+    """GEOS no pudo simplificar el contorno (geometría degenerada)."""
+
+
+def _ruta_svg(geometria, bbox, escala):
+    """
+    Ruta SVG (atributo 'd') del contorno en el sistema del viewBox: origen en
+    la esquina superior izquierda del bbox y el eje Y invertido.
+    """
+    min_x, _, _, max_y = bbox
+    partes = []
+    for poligono in getattr(geometria, 'geoms', [geometria]):
+        for anillo in [poligono.exterior, *poligono.interiors]:
+            coords = np.asarray(anillo.coords)[:-1]
+            px = np.round((coords[:, 0] - min_x) * escala, 1)
+            py = np.round((max_y - coords[:, 1]) * escala, 1)
+            pares = " ".join(f"{x:g} {y:g}" for x, y in zip(px, py))
+            partes.append(f"M{pares}Z")
+    return "".join(partes)
+
+
+def obtener_contorno(geo_info):
+    """
+    Contorno proyectado simplificado como GeoJSON (metros) y ruta SVG.
+    Se calcula una vez por geometría y se guarda en geo_info.
+
+    Raises:
+        ContornoNoDisponible: si GEOS falla al simplificar la geometría
+    """
+    if 'contorno_vectorial' in geo_info:
+        return geo_info['contorno_vectorial']
+
+    poligono = geo_info['pais_proyectado'].geometry.iloc[0]
+    try:
+        simplificado = shapely.simplify(poligono, TOLERANCIA_CONTORNO_VECTORIAL_M, preserve_topology=True)
+        simplificado = shapely.set_precision(simplificado, 1.0)
+    except shapely.errors.GEOSException as e:
+        raise ContornoNoDisponible(f"No se pudo construir el contorno vectorial: {e}") from e
+
+    bbox = geo_info['bbox']
+    ancho, alto = bbox[2] - bbox[0], bbox[3] - bbox[1]
+    escala = ANCHO_VIEWBOX_SVG / ancho
+
+    contorno = {
+        'geojson': mapping(simplificado),
+        'svg': {
+            'viewbox': [0, 0, ANCHO_VIEWBOX_SVG, round(alto * escala, 1)],
+            'ruta': _ruta_svg(simplificado, bbox, escala)
+        },
+        'n_vertices': int(shapely.get_num_coordinates(simplificado)),
+        'tolerancia_m': TOLERANCIA_CONTORNO_VECTORIAL_M
+    }
+    geo_info['contorno_vectorial'] = contorno
+    return contorno
+
+
+def _cuantizar(x, y, bbox):
+    """Coordenadas -> pares uint16 intercalados (x0, y0, x1, y1, ...) relativos al bbox."""
+    min_x, min_y, max_x, max_y = bbox
+    qx = np.round((np.asarray(x) - min_x) / (max_x - min_x) * ESCALA_CUANTIZACION)
+    qy = np.round((np.asarray(y) - min_y) / (max_y - min_y) * ESCALA_CUANTIZACION)
+    pares = np.empty(2 * len(qx), dtype='<u2')
+    pares[0::2] = np.clip(qx, 0, ESCALA_CUANTIZACION)
+    pares[1::2] = np.clip(qy, 0, ESCALA_CUANTIZACION)
+    return base64.b64encode(pares.tobytes()).decode('ascii')
+
+
+def muestra_cuantizada(resultados, max_puntos=MAX_PUNTOS_VECTORIAL):
+    """
+    Submuestra de los puntos de visualización, cuantizada a 16 bits sobre el
+    bbox. Cada buffer en base64 se decodifica en el navegador como
+    Uint16Array; la coordenada es min + q / 65535 × (max - min), con un
+    error máximo de medio paso (ancho del bbox / 131070).
+
+    Los puntos ya están en orden aleatorio, así que tomar los primeros de
+    cada grupo es una submuestra uniforme; se conserva la proporción
+    dentro/fuera de los puntos disponibles.
+    """
+    n_dentro = len(resultados['puntos_dentro_x'])
+    n_fuera = len(resultados['puntos_fuera_x'])
+    total = n_dentro + n_fuera
+
+    if total > max_puntos:
+        n_dentro = round(max_puntos * n_dentro / total)
+        n_fuera = max_puntos - n_dentro
+
+    bbox = resultados['bbox']
+    return {
+        'bbox': list(bbox),
+        'escala': ESCALA_CUANTIZACION,
+        'codificacion': "uint16le intercalado (x, y), base64",
+        'n_dentro': n_dentro,
+        'n_fuera': n_fuera,
+        'dentro': _cuantizar(resultados['puntos_dentro_x'][:n_dentro], resultados['puntos_dentro_y'][:n_dentro], bbox),
+        'fuera': _cuantizar(resultados['puntos_fuera_x'][:n_fuera], resultados['puntos_fuera_y'][:n_fuera], bbox)
+    }
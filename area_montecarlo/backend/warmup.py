@@ -0,0 +1,146 @@
+"""
+============================================================================
+PRECALENTAMIENTO
+Construye las cachés por país y prepara el renderizado antes de recibir
+tráfico; /ready informa cuándo terminó
+============================================================================
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import PRECALENTAR_PAISES, PRECALENTAR_MOTORES, PROCESOS_RENDER, GENERAR_TABLA_NIVELES
+from nucleo_montecarlo import (geometria_pais, obtener_indice, obtener_dominio, simular_geometria,
+                               verificar_geometria, asegurar_tabla)
+from nucleo_montecarlo.config import MUESTREADOR_POR_DEFECTO
+from vector_output import obtener_contorno
+from display import generar_visualizacion_previa, generar_visualizacion_simulacion
+
+
+# Estado compartido con /ready: 'etapa' es "cargando", "precalentando",
+# "listo" o "error"
+_estado = {
+    'etapa': "cargando",
+    'paises_listos': 0,
+    'paises_total': 0,
+    'paises_con_error': {},
+    'inicio': time.monotonic(),
+    'duracion_s': None,
+    'error': None
+}
+_lock = threading.Lock()
+
+
+def _actualizar(**cambios):
+    with _lock:
+        _estado.update(cambios)
+
+
+def marcar_error(mensaje):
+    """El servidor no puede quedar listo (por ejemplo, no cargaron los datos)."""
+    _actualizar(etapa="error", error=mensaje)
+
+
+def estado_preparacion():
+    """Copia del estado de preparación, para /ready."""
+    with _lock:
+        estado = dict(_estado, paises_con_error=dict(_estado['paises_con_error']))
+    if estado['duracion_s'] is None:
+        estado['transcurrido_s'] = round(time.monotonic() - estado['inicio'], 2)
+    del estado['inicio']
+    return estado
+
+
+def esta_listo():
+    with _lock:
+        return _estado['etapa'] == "listo"
+
+
+def _precalentar_render(catalogo, nombre):
+    """
+    Una simulación pequeña y sus dos imágenes por cada proceso de
+    renderizado: carga numpy, matplotlib y su caché de fuentes, y deja
+    arrancados los procesos del pool.
+    """
+    pais_gdf, geo_info = geometria_pais(catalogo, nombre)
+    resultados = simular_geometria(geo_info, 10_000, semilla=0)
+
+    def _renderizar():
+        generar_visualizacion_previa(pais_gdf, nombre)
+        generar_visualizacion_simulacion(geo_info['pais_proyectado'], nombre, resultados, 0)
+
+    # Tantos renderizados simultáneos como procesos, para arrancarlos a todos
+    simultaneos = max(1, PROCESOS_RENDER)
+    with ThreadPoolExecutor(max_workers=simultaneos) as ejecutor:
+        for tarea in [ejecutor.submit(_renderizar) for _ in range(simultaneos)]:
+            tarea.result()
+
+
+def precalentar(catalogo):
+    """
+    Construye, para cada país de PRECALENTAR_PAISES (None = todos), la
+    geometría proyectada, los índices de PRECALENTAR_MOTORES, el dominio
+    del muestreador por defecto y el contorno vectorial, y verifica la
+    geometría (validez y área geodésica, ver
+    nucleo_montecarlo.verificar_geometria); después prepara el renderizado
+    y, con GENERAR_TABLA_NIVELES, genera la tabla de /niveles_detalle si
+    falta algún nivel con datos locales (ver nucleo_montecarlo.asegurar_tabla).
+
+    Un país que falla (geometría inválida, error de GEOS...) se informa en
+    'paises_con_error' y en stderr, y deja el servidor en estado "error":
+    /ready no responde 200 con países que fallarían al pedirlos. Se
+    recorren igual todos los países para informar todas las fallas de una
+    vez. Un error al preparar el renderizado también deja el estado "error".
+    """
+    nombres = list(catalogo['paises']) if PRECALENTAR_PAISES is None else PRECALENTAR_PAISES
+    _actualizar(etapa="precalentando", paises_total=len(nombres))
+
+    for i, nombre in enumerate(nombres, start=1):
+        try:
+            _, geo_info = geometria_pais(catalogo, nombre)
+            for motor in PRECALENTAR_MOTORES:
+                obtener_indice(geo_info, motor)
+            obtener_dominio(geo_info, MUESTREADOR_POR_DEFECTO)
+            obtener_contorno(geo_info)
+            problemas = verificar_geometria(geo_info)
+            if problemas:
+                raise ValueError("; ".join(problemas))
+        except Exception as e:
+            print(f"ERROR: falló el precalentamiento de {nombre}: {type(e).__name__}: {e}", file=sys.stderr)
+            with _lock:
+                _estado['paises_con_error'][nombre] = str(e)
+        _actualizar(paises_listos=i)
+
+    with _lock:
+        fallidos = list(_estado['paises_con_error'])
+    if fallidos:
+        marcar_error(f"Falló el precalentamiento de {len(fallidos)} países: {', '.join(fallidos)}")
+        return
+
+    try:
+        if nombres:
+            _precalentar_render(catalogo, nombres[0])
+    except Exception as e:
+        marcar_error(f"Falló la preparación del renderizado: {e}")
+        raise
+
+    if GENERAR_TABLA_NIVELES:
+        # La tabla es informativa: si falla, el servidor igual puede atender
+        try:
+            asegurar_tabla()
+        except Exception as e:
+            print(f"ERROR: no se pudo generar la tabla de niveles de detalle: {type(e).__name__}: {e}",
+                  file=sys.stderr)
+
+    with _lock:
+        _estado['etapa'] = "listo"
+        _estado['duracion_s'] = round(time.monotonic() - _estado['inicio'], 2)
+
+
+def iniciar_precalentamiento(catalogo):
+    """Precalienta en un hilo aparte: el servidor atiende /ready mientras tanto."""
+    hilo = threading.Thread(target=precalentar, args=(catalogo,), name="precalentamiento", daemon=True)
+    hilo.start()
+    return hilo
@@ -4,51 +4,30 @@ CALCULADOR DE ÁREA CON MÉTODO DE MONTE CARLO
 Países de Sudamérica
 ============================================================================
 Este script permite calcular el área de cualquier país sudamericano
-utilizando el método de Monte Carlo con proyección Albers para América Latina.
+utilizando el método de Monte Carlo con una proyección de igual área por país.
 
 Autor: Proyecto de Modelado y Simulación
 Fecha: Enero 2026
 ============================================================================
 """
 
-import geopandas as gpd
-import numpy as np
-from shapely.geometry import Point
+import os
+import sys
+
 import matplotlib.pyplot as plt
-import time
 
-# --- CONFIGURACIÓN ---
-# Lista de países de Sudamérica (nombres en inglés como aparecen en Natural Earth)
-PAISES_SUDAMERICA = [
-    "Argentina",
-    "Bolivia",
-    "Brazil",
-    "Chile",
-    "Colombia",
-    "Ecuador",
-    "Guyana",
-    "Paraguay",
-    "Peru",
-    "Suriname",
-    "Uruguay",
-    "Venezuela"
-]
+# El núcleo de simulación compartido (nucleo_montecarlo) está en la raíz del repositorio
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from nucleo_montecarlo import (cargar_datos, crear_catalogo, geometria_pais, simular_geometria,
+                               registrar_corrida)
+from nucleo_montecarlo.config import PAISES_SUDAMERICA, AREAS_REALES_KM2
 
-# Áreas reales de referencia en km² (Fuente: Banco Mundial / Wikipedia)
-AREAS_REALES_KM2 = {
-    "Argentina": 2780400,
-    "Bolivia": 1098581,
-    "Brazil": 8515770,
-    "Chile": 756102,
-    "Colombia": 1138910,
-    "Ecuador": 283561,
-    "Guyana": 214969,
-    "Paraguay": 406752,
-    "Peru": 1285216,
-    "Suriname": 165940,
-    "Uruguay": 176215,
-    "Venezuela": 916445
-}
+# --- CONFIGURACIÓN ---
+# Países, áreas de referencia, carga de datos, proyección y simulación vienen
+# del núcleo compartido; este script solo conserva el menú y los gráficos
+MOTOR = "vectorizado"
+MAX_PUNTOS_VIZ = 5000
 
 
 def mostrar_menu():
@@ -67,35 +46,21 @@ def mostrar_menu():
     print("-" * 60)
 
 
-def cargar_datos():
-    """Descarga y carga los datos de países desde Natural Earth."""
-    print("\n📡 Descargando datos de Natural Earth...")
-    print("   (Esto puede tardar unos segundos la primera vez)")
-    
-    url_mapa = "https://naciscdn.org/naturalearth/110m/cultural/ne_110m_admin_0_countries.zip"
-    
-    try:
-        mundo = gpd.read_file(url_mapa)
-        print("   ✓ Datos descargados correctamente!")
-        return mundo
-    except Exception as e:
-        print(f"   ✗ Error al descargar: {e}")
-        return None
-
-
-def proyectar_y_calcular_bbox(pais_gdf, nombre_pais):
+def procesar_geometria(catalogo, nombre_pais):
     """
-    Proyecta el país a sistema métrico (Albers) y calcula el bounding box.
+    Proyecta el país a sistema métrico (igual área) y calcula el bounding box.
     
     Returns:
-        pais_proyectado: GeoDataFrame proyectado
-        bbox: tupla (min_x, min_y, max_x, max_y)
+        geo_info: geometría del registro del núcleo ('pais_proyectado', 'bbox', ...)
     """
     print(f"\n📐 Procesando geometría de {nombre_pais}...")
     
+    _, geo_info = geometria_pais(catalogo, nombre_pais)
+    
     # --- Mostrar coordenadas originales (lat/long) ---
-    bounds_geo = pais_gdf.total_bounds
-    min_lon, min_lat, max_lon, max_lat = bounds_geo
+    coords_geo = geo_info['coords_geo']
+    min_lat, max_lat = coords_geo['min_lat'], coords_geo['max_lat']
+    min_lon, max_lon = coords_geo['min_lon'], coords_geo['max_lon']
     
     print("\n   COORDENADAS GEOGRÁFICAS (WGS84 - Grados):")
     print(f"   ┌─────────────────────────────────────────────┐")
@@ -105,20 +70,10 @@ def proyectar_y_calcular_bbox(pais_gdf, nombre_pais):
     print(f"   │            Max = {max_lon:>10.4f}°              │")
     print(f"   └─────────────────────────────────────────────┘")
     
-    # --- Proyección a Albers Equal Area para América Latina ---
-    print("\n🔄 Aplicando proyección Albers Equal Area (ESRI:102033)...")
-    
-    try:
-        pais_proyectado = pais_gdf.to_crs("ESRI:102033")
-        proyeccion_usada = "ESRI:102033 (South America Albers Equal Area)"
-        print(f"   ✓ Proyección aplicada: {proyeccion_usada}")
-    except:
-        print("   ⚠ Usando proyección UTM 18S alternativa...")
-        pais_proyectado = pais_gdf.to_crs(epsg=32718)
-        proyeccion_usada = "EPSG:32718 (UTM Zone 18S)"
+    print(f"\n🔄 Proyección de igual área: {geo_info['proyeccion']}")
     
     # --- Calcular bounding box en metros ---
-    min_x, min_y, max_x, max_y = pais_proyectado.total_bounds
+    min_x, min_y, max_x, max_y = geo_info['bbox']
     
     ancho = max_x - min_x
     alto = max_y - min_y
@@ -140,95 +95,30 @@ def proyectar_y_calcular_bbox(pais_gdf, nombre_pais):
     print(f"   │                   {area_bbox/1_000_000:>20,.2f} km²            │")
     print(f"   └─────────────────────────────────────────────────────────┘")
     
-    return pais_proyectado, (min_x, min_y, max_x, max_y)
+    return geo_info
 
 
-def simulacion_montecarlo(pais_proyectado, bbox, n_puntos):
+def ejecutar_montecarlo(geo_info, n_puntos):
     """
     Ejecuta la simulación de Monte Carlo para estimar el área.
     
     Args:
-        pais_proyectado: GeoDataFrame con el polígono proyectado
-        bbox: tupla (min_x, min_y, max_x, max_y)
+        geo_info: geometría proyectada (ver procesar_geometria)
         n_puntos: cantidad de puntos pseudoaleatorios a generar
     
     Returns:
         dict con resultados de la simulación
     """
-    min_x, min_y, max_x, max_y = bbox
-    
-    # Calcular área del bounding box
-    ancho = max_x - min_x
-    alto = max_y - min_y
-    area_bbox = ancho * alto
-    
     print(f"\nIniciando simulación de Monte Carlo...")
-    print(f"   Generando {n_puntos:,} puntos pseudoaleatorios...")
-    
-    start_time = time.time()
-    
-    # --- Generar puntos aleatorios con distribución uniforme ---
-    x_rand = np.random.uniform(min_x, max_x, n_puntos)
-    y_rand = np.random.uniform(min_y, max_y, n_puntos)
+    print(f"   🔍 Generando y verificando {n_puntos:,} puntos pseudoaleatorios...")
     
-    print(f"   ✓ Puntos generados en el bounding box")
+    # Área_Estimada = Área_BBox × (puntos_dentro / total_puntos)
+    resultados = simular_geometria(geo_info, n_puntos, motor=MOTOR, muestreador="bbox",
+                                   max_puntos_viz=MAX_PUNTOS_VIZ)
     
-    # --- Obtener el polígono del país ---
-    poligono_pais = pais_proyectado.geometry.iloc[0]
+    print(f"   ✓ Simulación completada en {resultados['tiempo_simulacion']:.2f} segundos")
     
-    # --- Contar puntos dentro del polígono ---
-    print(f"   🔍 Verificando puntos dentro del polígono...")
-    
-    puntos_dentro = 0
-    puntos_dentro_x = []  # Para visualización
-    puntos_dentro_y = []
-    puntos_fuera_x = []
-    puntos_fuera_y = []
-    
-    # Límite de puntos a guardar para visualización
-    max_puntos_viz = 5000
-    
-    for i, (x, y) in enumerate(zip(x_rand, y_rand)):
-        # Mostrar progreso cada 10%
-        if n_puntos >= 10000 and i % (n_puntos // 10) == 0:
-            progreso = (i / n_puntos) * 100
-            print(f"      Progreso: {progreso:.0f}%", end='\r')
-        
-        punto = Point(x, y)
-        if poligono_pais.contains(punto):
-            puntos_dentro += 1
-            if len(puntos_dentro_x) < max_puntos_viz:
-                puntos_dentro_x.append(x)
-                puntos_dentro_y.append(y)
-        else:
-            if len(puntos_fuera_x) < max_puntos_viz // 2:
-                puntos_fuera_x.append(x)
-                puntos_fuera_y.append(y)
-    
-    end_time = time.time()
-    tiempo_simulacion = end_time - start_time
-    
-    print(f"   ✓ Simulación completada en {tiempo_simulacion:.2f} segundos")
-    
-    # --- Calcular área estimada con Monte Carlo ---
-    # Fórmula: Área_Estimada = Área_BBox × (puntos_dentro / total_puntos)
-    area_estimada_m2 = area_bbox * (puntos_dentro / n_puntos)
-    area_estimada_km2 = area_estimada_m2 / 1_000_000
-    
-    return {
-        'n_puntos': n_puntos,
-        'puntos_dentro': puntos_dentro,
-        'puntos_fuera': n_puntos - puntos_dentro,
-        'area_bbox_m2': area_bbox,
-        'area_estimada_m2': area_estimada_m2,
-        'area_estimada_km2': area_estimada_km2,
-        'tiempo_simulacion': tiempo_simulacion,
-        'puntos_dentro_x': puntos_dentro_x,
-        'puntos_dentro_y': puntos_dentro_y,
-        'puntos_fuera_x': puntos_fuera_x,
-        'puntos_fuera_y': puntos_fuera_y,
-        'bbox': bbox
-    }
+    return resultados
 
 
 def mostrar_resultados(nombre_pais, resultados):
@@ -369,6 +259,7 @@ def main():
     mundo = cargar_datos()
     if mundo is None:
         return
+    catalogo = crear_catalogo(mundo)
     
     while True:
         mostrar_menu()
@@ -393,11 +284,10 @@ def main():
             continue
         
         # --- Filtrar el país seleccionado ---
-        pais_gdf = mundo[mundo['NAME'] == nombre_pais]
-        
-        if pais_gdf.empty:
+        if nombre_pais not in catalogo['paises']:
             print(f"\n⚠ No se encontró el país '{nombre_pais}' en la base de datos.")
             continue
+        pais_gdf = mundo.iloc[[catalogo['paises'][nombre_pais]['posicion']]]
         
         print(f"\n✓ País seleccionado: {nombre_pais}")
         
@@ -405,7 +295,8 @@ def main():
         visualizar_previa(pais_gdf, nombre_pais)
         
         # --- Proyectar y calcular bounding box ---
-        pais_proyectado, bbox = proyectar_y_calcular_bbox(pais_gdf, nombre_pais)
+        geo_info = procesar_geometria(catalogo, nombre_pais)
+        pais_proyectado = geo_info['pais_proyectado']
         
         # --- Solicitar cantidad de puntos ---
         print("\n" + "-" * 60)
@@ -433,10 +324,13 @@ def main():
                 print("   ⚠ Por favor ingrese un número válido.")
         
         # --- Ejecutar simulación ---
-        resultados = simulacion_montecarlo(pais_proyectado, bbox, n_puntos)
+        resultados = ejecutar_montecarlo(geo_info, n_puntos)
         
         # --- Mostrar resultados ---
         mostrar_resultados(nombre_pais, resultados)
+        registrar_corrida("cli_v1", nombre_pais, "montecarlo", resultados,
+                          AREAS_REALES_KM2.get(nombre_pais, 0), estimador="simple",
+                          nivel_detalle=geo_info['nivel_detalle'])
         
         # --- Visualizar ---
         visualizar = input("\n→ ¿Desea ver la visualización gráfica? (s/n): ").strip().lower()
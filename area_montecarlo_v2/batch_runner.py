@@ -0,0 +1,254 @@
+"""
+============================================================================
+MODO POR LOTES
+Ejecución no interactiva y en paralelo, con resultados en JSON o CSV
+============================================================================
+"""
+
+import argparse
+import contextlib
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+matplotlib.use('Agg')  # sin ventanas: las imágenes solo se guardan en archivos
+import numpy as np
+
+from nucleo_montecarlo import (obtener_catalogo, buscar_pais, obtener_geometria_proyectada,
+                               registrar_corrida, simulacion_distribuida, FragmentoFallido,
+                               MOTORES, MUESTREADORES, PRECISIONES)
+from nucleo_montecarlo.config import (PAISES_SUDAMERICA, AREAS_REALES_KM2, PUNTOS_POR_FRAGMENTO, NIVELES_DETALLE,
+                                      NIVEL_DETALLE_POR_DEFECTO)
+from montecarlo_simulator import ejecutar_montecarlo
+from lattice_estimator import ejecutar_reticula
+from results_display import guardar_visualizacion
+from distributed_runner import lanzar_trabajadores_locales, detener_trabajadores
+
+# Columnas de la salida CSV (y claves de cada resultado en JSON)
+COLUMNAS = [
+    'pais', 'metodo', 'nivel_detalle', 'motor', 'muestreador', 'precision', 'semilla', 'n_puntos', 'puntos_dentro',
+    'area_estimada_km2', 'error_estandar_km2', 'area_real_km2', 'error_relativo_porcentaje',
+    'tiempo_simulacion', 'imagen'
+]
+
+CLAVES_VISUALIZACION = ('puntos_dentro_x', 'puntos_dentro_y', 'puntos_fuera_x', 'puntos_fuera_y')
+
+
+def crear_parser():
+    """Argumentos de línea de comandos del modo por lotes."""
+    parser = argparse.ArgumentParser(
+        description="Calculador de área con Monte Carlo - modo por lotes (sin menús ni ventanas)"
+    )
+    parser.add_argument('--paises', nargs='+', default=['todos'],
+                        help="países a simular (nombres de Natural Earth o códigos ISO) o 'todos' (por defecto)")
+    parser.add_argument('-n', '--n-puntos', type=int, default=100_000,
+                        help="puntos por país (por defecto 100000)")
+    parser.add_argument('--metodo', choices=['montecarlo', 'reticula'], default='montecarlo')
+    parser.add_argument('--semilla', type=int, default=None,
+                        help="semilla base; cada país recibe una secuencia independiente derivada de ella")
+    parser.add_argument('--muestreador', choices=list(MUESTREADORES), default='bbox')
+    parser.add_argument('--motor', choices=list(MOTORES), default='vectorizado')
+    parser.add_argument('--precision', choices=list(PRECISIONES), default='float64',
+                        help="precisión de las muestras: float32 y entera usan la mitad y un cuarto de memoria")
+    parser.add_argument('--nivel-detalle', choices=list(NIVELES_DETALLE), default=NIVEL_DETALLE_POR_DEFECTO,
+                        help="geometría: 110m (por defecto, sin islas pequeñas), 50m, 10m o un derivado "
+                             "simplificado (ver python -m nucleo_montecarlo.niveles_detalle)")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count(),
+                        help="procesos en paralelo (por defecto, uno por núcleo)")
+    parser.add_argument('-o', '--salida', default=None,
+                        help="archivo de resultados (.json o .csv); por defecto JSON en la salida estándar")
+    parser.add_argument('--formato', choices=['json', 'csv'], default=None,
+                        help="formato de salida (por defecto se deduce de la extensión de --salida)")
+    parser.add_argument('--imagenes', default=None, metavar='DIRECTORIO',
+                        help="guardar la visualización de cada país como PNG en este directorio")
+    distribuido = parser.add_argument_group(
+        "ejecución distribuida",
+        "cada país se reparte en fragmentos entre trabajadores (python main.py trabajador --help); "
+        "los países se simulan de a uno y sin imágenes"
+    )
+    distribuido.add_argument('--trabajadores', nargs='+', default=None, metavar='HOST:PUERTO',
+                             help="trabajadores ya iniciados")
+    distribuido.add_argument('--trabajadores-locales', type=int, default=0, metavar='N',
+                             help="iniciar N trabajadores en este equipo (para probar sin otras máquinas)")
+    distribuido.add_argument('--puntos-por-fragmento', type=int, default=PUNTOS_POR_FRAGMENTO,
+                             help=f"puntos de cada fragmento (por defecto {PUNTOS_POR_FRAGMENTO})")
+    return parser
+
+
+def _simular_pais(nombre_pais, pais_gdf, argumentos, semilla):
+    """
+    Tarea de un proceso: proyecta, simula y (opcionalmente) guarda la imagen
+    de un país. Sin mensajes de avance, para no mezclar los de varios procesos.
+    """
+    geo_info = obtener_geometria_proyectada(pais_gdf, nombre_pais, nivel=argumentos.nivel_detalle)
+    pais_proyectado = geo_info['pais_proyectado']
+
+    if argumentos.metodo == 'reticula':
+        resultados = ejecutar_reticula(geo_info, motor=argumentos.motor, mostrar=False)
+        resultados.update(muestreador=None, precision=None, semilla=None)
+    else:
+        resultados = ejecutar_montecarlo(
+            geo_info, argumentos.n_puntos, semilla=semilla,
+            motor=argumentos.motor, muestreador=argumentos.muestreador,
+            precision=argumentos.precision, mostrar=False
+        )
+
+    imagen = None
+    if argumentos.imagenes:
+        imagen = os.path.join(argumentos.imagenes, f"{nombre_pais.replace(' ', '_')}.png")
+        guardar_visualizacion(pais_proyectado, nombre_pais, resultados, imagen)
+
+    return _fila(nombre_pais, argumentos, semilla, resultados, imagen)
+
+
+def _fila(nombre_pais, argumentos, semilla, resultados, imagen=None):
+    """Fila de la salida y resumen para el historial de una simulación."""
+    area_real = AREAS_REALES_KM2.get(nombre_pais, 0)
+    area_estimada = resultados['area_estimada_km2']
+
+    # Los arreglos de visualización no viajan de vuelta al proceso principal
+    resumen = {clave: valor for clave, valor in resultados.items() if clave not in CLAVES_VISUALIZACION}
+    fila = {
+        'pais': nombre_pais,
+        'metodo': argumentos.metodo,
+        'nivel_detalle': argumentos.nivel_detalle,
+        'motor': resultados['motor'],
+        'muestreador': resultados['muestreador'],
+        'precision': resultados['precision'],
+        'semilla': semilla,
+        'n_puntos': resultados['n_puntos'],
+        'puntos_dentro': resultados.get('puntos_dentro'),
+        'area_estimada_km2': area_estimada,
+        'error_estandar_km2': resultados.get('error_estandar_km2'),
+        'area_real_km2': area_real,
+        'error_relativo_porcentaje': abs(area_estimada - area_real) / area_real * 100 if area_real > 0 else None,
+        'tiempo_simulacion': resultados['tiempo_simulacion'],
+        'imagen': imagen
+    }
+    return fila, resumen
+
+
+def _escribir_salida(filas, ruta, formato):
+    """Escribe los resultados como JSON (lista de objetos) o CSV."""
+    destino = open(ruta, 'w', newline='', encoding='utf-8') if ruta else sys.stdout
+    try:
+        if formato == 'csv':
+            escritor = csv.DictWriter(destino, fieldnames=COLUMNAS)
+            escritor.writeheader()
+            escritor.writerows(filas)
+        else:
+            json.dump(filas, destino, indent=2, ensure_ascii=False)
+            destino.write("\n")
+    finally:
+        if ruta:
+            destino.close()
+
+
+def _ejecutar_distribuido(nombres, semillas, argumentos):
+    """
+    Simula los países de a uno, cada uno repartido en fragmentos entre los
+    trabajadores de --trabajadores y los --trabajadores-locales que se
+    inician aquí (y se detienen al terminar).
+
+    Returns:
+        filas por país, o None si la simulación distribuida falló
+    """
+    trabajadores = list(argumentos.trabajadores or [])
+    procesos = []
+    try:
+        if argumentos.trabajadores_locales:
+            procesos, direcciones = lanzar_trabajadores_locales(argumentos.trabajadores_locales, nombres,
+                                                                argumentos.motor, argumentos.muestreador,
+                                                                argumentos.nivel_detalle)
+            trabajadores += direcciones
+
+        filas = {}
+        for nombre, semilla in zip(nombres, semillas):
+            resultados = simulacion_distribuida(
+                trabajadores, nombre, argumentos.n_puntos, semilla=semilla, motor=argumentos.motor,
+                muestreador=argumentos.muestreador, precision=argumentos.precision,
+                nivel_detalle=argumentos.nivel_detalle, puntos_por_fragmento=argumentos.puntos_por_fragmento
+            )
+            fila, resumen = _fila(nombre, argumentos, resultados['semilla'], resultados)
+            filas[nombre] = fila
+            registrar_corrida("cli_v2_distribuido", nombre, argumentos.metodo, resumen,
+                              AREAS_REALES_KM2.get(nombre, 0), estimador="simple",
+                              nivel_detalle=argumentos.nivel_detalle)
+            reintentos = sum(fragmento['intentos'] - 1 for fragmento in resultados['fragmentos'])
+            print(f"   {nombre:20s} {fila['area_estimada_km2']:>15,.2f} km²  ({fila['tiempo_simulacion']:.2f} seg, "
+                  f"{len(resultados['fragmentos'])} fragmentos, {reintentos} reintentos)", file=sys.stderr)
+        return filas
+    except (ValueError, RuntimeError, FragmentoFallido) as e:
+        print(f"Falló la simulación distribuida: {e}", file=sys.stderr)
+        return None
+    finally:
+        detener_trabajadores(procesos)
+
+
+def ejecutar_lote(argumentos):
+    """
+    Simula los países pedidos en paralelo (un proceso por país, hasta
+    --workers a la vez), registra cada corrida en el historial y escribe
+    los resultados.
+
+    Returns:
+        código de salida del programa (0 = todo bien)
+    """
+    # Los mensajes de carga van a stderr: stdout queda para los resultados
+    with contextlib.redirect_stdout(sys.stderr):
+        catalogo = obtener_catalogo(argumentos.nivel_detalle)
+    if catalogo is None:
+        return 1
+    mundo = catalogo['mundo']
+
+    consultas = PAISES_SUDAMERICA if argumentos.paises == ['todos'] else argumentos.paises
+    nombres = [buscar_pais(catalogo, consulta) for consulta in consultas]
+    desconocidos = [consulta for consulta, nombre in zip(consultas, nombres) if nombre is None]
+    if desconocidos:
+        print(f"Países no encontrados: {', '.join(desconocidos)}", file=sys.stderr)
+        return 2
+    nombres = list(dict.fromkeys(nombres))
+
+    distribuido = bool(argumentos.trabajadores or argumentos.trabajadores_locales)
+    if distribuido and (argumentos.metodo != 'montecarlo' or argumentos.imagenes):
+        print("La ejecución distribuida solo admite --metodo montecarlo y no guarda imágenes", file=sys.stderr)
+        return 2
+
+    formato = argumentos.formato or ('csv' if (argumentos.salida or '').endswith('.csv') else 'json')
+    if argumentos.imagenes:
+        os.makedirs(argumentos.imagenes, exist_ok=True)
+
+    # Una secuencia independiente y reproducible por país, sin importar el
+    # orden en que terminen los procesos
+    semillas = [
+        int(hijo.generate_state(1)[0]) for hijo in np.random.SeedSequence(argumentos.semilla).spawn(len(nombres))
+    ] if argumentos.semilla is not None else [None] * len(nombres)
+
+    if distribuido:
+        filas = _ejecutar_distribuido(nombres, semillas, argumentos)
+        if filas is None:
+            return 1
+        _escribir_salida([filas[nombre] for nombre in nombres], argumentos.salida, formato)
+        return 0
+
+    filas = {}
+    with ProcessPoolExecutor(max_workers=max(1, argumentos.workers)) as pool:
+        tareas = {
+            pool.submit(_simular_pais, nombre, mundo.iloc[[catalogo['paises'][nombre]['posicion']]], argumentos, semilla): nombre
+            for nombre, semilla in zip(nombres, semillas)
+        }
+        for tarea in as_completed(tareas):
+            nombre = tareas[tarea]
+            fila, resumen = tarea.result()
+            filas[nombre] = fila
+            registrar_corrida("cli_v2_lote", nombre, argumentos.metodo, resumen,
+                              AREAS_REALES_KM2.get(nombre, 0), estimador="simple",
+                              nivel_detalle=argumentos.nivel_detalle)
+            print(f"   {nombre:20s} {fila['area_estimada_km2']:>15,.2f} km²  ({fila['tiempo_simulacion']:.2f} seg)",
+                  file=sys.stderr)
+
+    _escribir_salida([filas[nombre] for nombre in nombres], argumentos.salida, formato)
+    return 0
@@ -0,0 +1,110 @@
+"""
+============================================================================
+TRABAJADOR DISTRIBUIDO
+Proceso que calcula fragmentos de simulaciones para un coordinador (ver
+nucleo_montecarlo.distribuido) y arranque de trabajadores locales
+============================================================================
+"""
+
+import argparse
+import contextlib
+import os
+import subprocess
+import sys
+
+from nucleo_montecarlo import obtener_catalogo, buscar_pais, crear_trabajador, MOTORES, MUESTREADORES
+from nucleo_montecarlo.config import PAISES_SUDAMERICA, NIVELES_DETALLE, NIVEL_DETALLE_POR_DEFECTO
+
+PROGRAMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+
+def crear_parser_trabajador():
+    """Argumentos de python main.py trabajador."""
+    parser = argparse.ArgumentParser(
+        prog="main.py trabajador",
+        description="Trabajador de simulaciones distribuidas: atiende fragmentos por HTTP hasta que se lo detiene"
+    )
+    parser.add_argument('--host', default="127.0.0.1",
+                        help="dirección en la que escucha (0.0.0.0 para recibir de otras máquinas)")
+    parser.add_argument('--puerto', type=int, default=0,
+                        help="puerto (0 = uno libre; la dirección se imprime en la salida estándar)")
+    parser.add_argument('--paises', nargs='+', default=['todos'],
+                        help="países precargados (nombres de Natural Earth o códigos ISO) o 'todos' (Sudamérica)")
+    parser.add_argument('--motor', nargs='+', choices=list(MOTORES), default=['vectorizado'],
+                        help="motores cuyos índices se construyen al iniciar")
+    parser.add_argument('--muestreador', choices=list(MUESTREADORES), default='bbox',
+                        help="muestreador cuyo dominio se construye al iniciar")
+    parser.add_argument('--nivel-detalle', choices=list(NIVELES_DETALLE), default=NIVEL_DETALLE_POR_DEFECTO,
+                        help="nivel de detalle precargado (los demás se cargan al pedirlos)")
+    return parser
+
+
+def ejecutar_trabajador(argumentos):
+    """
+    Precarga las geometrías, imprime 'TRABAJADOR host:puerto' en la salida
+    estándar y atiende fragmentos hasta recibir una interrupción.
+
+    Returns:
+        código de salida del programa
+    """
+    # Los mensajes de carga van a stderr: stdout anuncia solo la dirección
+    with contextlib.redirect_stdout(sys.stderr):
+        catalogo = obtener_catalogo(argumentos.nivel_detalle)
+    if catalogo is None:
+        return 1
+
+    consultas = PAISES_SUDAMERICA if argumentos.paises == ['todos'] else argumentos.paises
+    nombres = [buscar_pais(catalogo, consulta) for consulta in consultas]
+    if None in nombres:
+        desconocidos = [consulta for consulta, nombre in zip(consultas, nombres) if nombre is None]
+        print(f"Países no encontrados: {', '.join(desconocidos)}", file=sys.stderr)
+        return 2
+
+    servidor = crear_trabajador(catalogo, argumentos.host, argumentos.puerto, paises=list(dict.fromkeys(nombres)),
+                                motores=argumentos.motor, muestreador=argumentos.muestreador)
+    host, puerto = servidor.server_address[:2]
+    print(f"TRABAJADOR {host}:{puerto}", flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+    return 0
+
+
+def lanzar_trabajadores_locales(cantidad, paises, motor, muestreador, nivel_detalle=NIVEL_DETALLE_POR_DEFECTO):
+    """
+    Inicia 'cantidad' trabajadores en este equipo, cada uno en un puerto
+    libre, y espera a que terminen de precargar las geometrías.
+
+    Raises:
+        RuntimeError: si un trabajador termina antes de anunciar su dirección
+
+    Returns:
+        tupla (procesos, direcciones 'host:puerto')
+    """
+    comando = [sys.executable, PROGRAMA, "trabajador", "--paises", *paises,
+               "--motor", motor, "--muestreador", muestreador, "--nivel-detalle", nivel_detalle]
+    procesos = [subprocess.Popen(comando, stdout=subprocess.PIPE, text=True) for _ in range(cantidad)]
+
+    direcciones = []
+    for proceso in procesos:
+        linea = proceso.stdout.readline().split()
+        if len(linea) != 2 or linea[0] != "TRABAJADOR":
+            detener_trabajadores(procesos)
+            raise RuntimeError(f"El trabajador local {proceso.pid} no pudo iniciarse")
+        direcciones.append(linea[1])
+    return procesos, direcciones
+
+
+def detener_trabajadores(procesos):
+    """Termina los trabajadores locales (y los mata si no responden)."""
+    for proceso in procesos:
+        proceso.terminate()
+    for proceso in procesos:
+        try:
+            proceso.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proceso.kill()
+            proceso.wait()
@@ -1,26 +1,30 @@
 """
 ============================================================================
 PROCESAMIENTO DE GEOMETRÍA
-Funciones para proyectar y calcular bounding box
+Proyección y bounding box (del núcleo compartido) con salida por consola
 ============================================================================
 """
 
-from config import PROYECCION_PRINCIPAL, PROYECCION_ALTERNATIVA
+from nucleo_montecarlo import geometria_pais
 
 
-def proyectar_y_calcular_bbox(pais_gdf, nombre_pais):
+def procesar_geometria(catalogo, nombre_pais):
     """
-    Proyecta el país a sistema métrico (Albers) y calcula el bounding box.
+    Proyecta el país a sistema métrico (igual área) y muestra su bounding box.
+    La proyección y el bbox vienen del registro de geometrías del núcleo.
     
     Returns:
-        pais_proyectado: GeoDataFrame proyectado
-        bbox: tupla (min_x, min_y, max_x, max_y)
+        geo_info: dict con 'pais_proyectado', 'bbox' y las coordenadas
+        geográficas y proyectadas
     """
     print(f"\n Procesando geometría de {nombre_pais}...")
     
+    _, geo_info = geometria_pais(catalogo, nombre_pais)
+    
     # --- Mostrar coordenadas originales (lat/long) ---
-    bounds_geo = pais_gdf.total_bounds
-    min_lon, min_lat, max_lon, max_lat = bounds_geo
+    coords_geo = geo_info['coords_geo']
+    min_lat, max_lat = coords_geo['min_lat'], coords_geo['max_lat']
+    min_lon, max_lon = coords_geo['min_lon'], coords_geo['max_lon']
     
     print("\n   COORDENADAS GEOGRÁFICAS (WGS84 - Grados):")
     print(f"   ┌─────────────────────────────────────────────┐")
@@ -30,21 +34,10 @@ def proyectar_y_calcular_bbox(pais_gdf, nombre_pais):
     print(f"   │            Max = {max_lon:>10.4f}°              │")
     print(f"   └─────────────────────────────────────────────┘")
     
-    # --- Proyección a Albers Equal Area para América Latina ---
-    print(f"\n Aplicando proyección Albers Equal Area ({PROYECCION_PRINCIPAL})...")
-    
-    try:
-        pais_proyectado = pais_gdf.to_crs(PROYECCION_PRINCIPAL)
-        proyeccion_usada = f"{PROYECCION_PRINCIPAL} (South America Albers Equal Area)"
-        print(f"   Proyección aplicada: {proyeccion_usada}")
-    except:
-        print(f"   Usando proyección UTM alternativa ({PROYECCION_ALTERNATIVA})...")
-        pais_proyectado = pais_gdf.to_crs(PROYECCION_ALTERNATIVA)
-        proyeccion_usada = f"{PROYECCION_ALTERNATIVA} (UTM Zone 18S)"
-    
-    # --- Calcular bounding box en metros ---
-    min_x, min_y, max_x, max_y = pais_proyectado.total_bounds
+    print(f"\n Proyección de igual área: {geo_info['proyeccion']}")
     
+    # --- Bounding box en metros ---
+    min_x, min_y, max_x, max_y = geo_info['bbox']
     ancho = max_x - min_x
     alto = max_y - min_y
     area_bbox = ancho * alto
@@ -65,4 +58,4 @@ def proyectar_y_calcular_bbox(pais_gdf, nombre_pais):
     print(f"   │                   {area_bbox/1_000_000:>20,.2f} km²            │")
     print(f"   └─────────────────────────────────────────────────────────┘")
     
-    return pais_proyectado, (min_x, min_y, max_x, max_y)
+    return geo_info
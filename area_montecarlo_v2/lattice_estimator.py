@@ -0,0 +1,32 @@
+"""
+============================================================================
+ESTIMADOR DE RETÍCULA
+Salida por consola alrededor del conteo en retícula del núcleo compartido
+============================================================================
+"""
+
+from nucleo_montecarlo import estimacion_reticula, obtener_indice
+from config import MOTOR_INTERACTIVO
+
+
+def ejecutar_reticula(geo_info, motor=MOTOR_INTERACTIVO, mostrar=True):
+    """
+    Estima el área contando centros de celda a varias resoluciones y
+    extrapola hacia el límite h -> 0 (Richardson).
+    
+    Returns:
+        dict con los niveles, la estimación extrapolada y los tiempos
+    """
+    if mostrar:
+        print(f"\nIniciando conteo en retícula...")
+    
+    resultados = estimacion_reticula(geo_info['pais_proyectado'], geo_info['bbox'], motor,
+                                     indice=obtener_indice(geo_info, motor))
+    
+    if mostrar:
+        for nivel in resultados['niveles']:
+            resolucion = nivel['resolucion']
+            print(f"   Retícula {resolucion:>5} x {resolucion:<5} → {nivel['area_estimada_km2']:>15,.2f} km²")
+        print(f"   Conteo completado en {resultados['tiempo_simulacion']:.2f} segundos")
+    
+    return resultados
@@ -8,12 +8,22 @@ Fecha: Enero 2026
 ============================================================================
 """
 
-from config import PAISES_SUDAMERICA
-from data_loader import cargar_datos
-from geometry_processor import proyectar_y_calcular_bbox
-from montecarlo_simulator import simulacion_montecarlo
-from results_display import mostrar_resultados, visualizar_resultados, visualizar_previa
-from ui_menu import mostrar_menu, solicitar_cantidad_puntos
+import os
+import sys
+
+# El núcleo de simulación compartido (nucleo_montecarlo) está en la raíz del repositorio
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from nucleo_montecarlo import cargar_datos, crear_catalogo, registrar_corrida
+from nucleo_montecarlo.config import PAISES_SUDAMERICA, AREAS_REALES_KM2
+from geometry_processor import procesar_geometria
+from montecarlo_simulator import ejecutar_montecarlo
+from lattice_estimator import ejecutar_reticula
+from results_display import (mostrar_resultados, mostrar_resultados_reticula,
+                             visualizar_resultados, visualizar_previa)
+from batch_runner import crear_parser, ejecutar_lote
+from distributed_runner import crear_parser_trabajador, ejecutar_trabajador
+from ui_menu import mostrar_menu, solicitar_cantidad_puntos, solicitar_metodo
 
 
 def main():
@@ -22,6 +32,7 @@ def main():
     mundo = cargar_datos()
     if mundo is None:
         return
+    catalogo = crear_catalogo(mundo)
     
     while True:
         mostrar_menu()
@@ -47,11 +58,10 @@ def main():
             continue
         
         # --- Filtrar el país seleccionado ---
-        pais_gdf = mundo[mundo['NAME'] == nombre_pais]
-        
-        if pais_gdf.empty:
+        if nombre_pais not in catalogo['paises']:
             print(f"\n No se encontró el país '{nombre_pais}' en la base de datos.")
             continue
+        pais_gdf = mundo.iloc[[catalogo['paises'][nombre_pais]['posicion']]]
         
         print(f"\n País seleccionado: {nombre_pais}")
         
@@ -60,18 +70,31 @@ def main():
         
         # Paso 2, 3 y 4
         # --- Proyectar y calcular bounding box ---
-        pais_proyectado, bbox = proyectar_y_calcular_bbox(pais_gdf, nombre_pais)
+        geo_info = procesar_geometria(catalogo, nombre_pais)
+        pais_proyectado = geo_info['pais_proyectado']
         
-        # Paso 5
-        # --- Solicitar cantidad de puntos ---
-        n_puntos = solicitar_cantidad_puntos()
+        metodo = solicitar_metodo()
         
-        # Paso 6
-        # --- Ejecutar simulación ---
-        resultados = simulacion_montecarlo(pais_proyectado, bbox, n_puntos)
+        if metodo == "reticula":
+            # --- Conteo determinista en retícula ---
+            resultados = ejecutar_reticula(geo_info)
+            mostrar_resultados_reticula(nombre_pais, resultados)
+        else:
+            # Paso 5
+            # --- Solicitar cantidad de puntos ---
+            n_puntos = solicitar_cantidad_puntos()
+            
+            # Paso 6
+            # --- Ejecutar simulación ---
+            resultados = ejecutar_montecarlo(geo_info, n_puntos)
+            
+            # --- Mostrar resultados ---
+            mostrar_resultados(nombre_pais, resultados)
         
-        # --- Mostrar resultados ---
-        mostrar_resultados(nombre_pais, resultados)
+        # --- Guardar en el historial de corridas ---
+        registrar_corrida("cli_v2", nombre_pais, metodo, resultados,
+                          AREAS_REALES_KM2.get(nombre_pais, 0), estimador="simple",
+                          nivel_detalle=geo_info['nivel_detalle'])
         
         # --- Visualizar ---
         visualizar = input("\n→ ¿Desea ver la visualización gráfica? (s/n): ").strip().lower()
@@ -86,4 +109,10 @@ def main():
 
 
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["trabajador"]:
+        # Trabajador de simulaciones distribuidas (ver python main.py trabajador --help)
+        sys.exit(ejecutar_trabajador(crear_parser_trabajador().parse_args(sys.argv[2:])))
+    if len(sys.argv) > 1:
+        # Con argumentos: modo por lotes (ver python main.py --help)
+        sys.exit(ejecutar_lote(crear_parser().parse_args()))
     main()
@@ -1,96 +1,40 @@
 """
 ============================================================================
 SIMULADOR DE MONTE CARLO
-Funciones para ejecutar la simulación de Monte Carlo
+Salida por consola alrededor de la simulación del núcleo compartido
 ============================================================================
 """
 
-import numpy as np
-from shapely.geometry import Point
-import time
-from config import MAX_PUNTOS_VIZ
+from nucleo_montecarlo import simular_geometria
+from config import MAX_PUNTOS_VIZ, MOTOR_INTERACTIVO, MUESTREADOR_INTERACTIVO
 
 
-def simulacion_montecarlo(pais_proyectado, bbox, n_puntos):
+def ejecutar_montecarlo(geo_info, n_puntos, semilla=None, motor=MOTOR_INTERACTIVO,
+                        muestreador=MUESTREADOR_INTERACTIVO, precision="float64", mostrar=True):
     """
     Ejecuta la simulación de Monte Carlo para estimar el área.
     
     Args:
-        pais_proyectado: GeoDataFrame con el polígono proyectado
-        bbox: tupla (min_x, min_y, max_x, max_y)
+        geo_info: geometría del registro del núcleo (ver geometry_processor)
         n_puntos: cantidad de puntos pseudoaleatorios a generar
+        semilla: semilla del generador (None = aleatoria)
+        motor: clasificador de puntos (ver nucleo_montecarlo.MOTORES)
+        muestreador: dominio de muestreo (ver nucleo_montecarlo.MUESTREADORES)
+        precision: precisión de las muestras (ver nucleo_montecarlo.PRECISIONES)
+        mostrar: imprimir el avance (el modo por lotes lo desactiva)
     
     Returns:
         dict con resultados de la simulación
     """
-    min_x, min_y, max_x, max_y = bbox
+    if mostrar:
+        print(f"\nIniciando simulación de Monte Carlo...")
+        print(f"   Generando y clasificando {n_puntos:,} puntos pseudoaleatorios "
+              f"(motor {motor}, muestreador {muestreador})...")
     
-    # Calcular área del bounding box
-    ancho = max_x - min_x
-    alto = max_y - min_y
-    area_bbox = ancho * alto
+    resultados = simular_geometria(geo_info, n_puntos, motor=motor, muestreador=muestreador,
+                                   precision=precision, semilla=semilla, max_puntos_viz=MAX_PUNTOS_VIZ)
     
-    print(f"\nIniciando simulación de Monte Carlo...")
-    print(f"   Generando {n_puntos:,} puntos pseudoaleatorios...")
+    if mostrar:
+        print(f"   Simulación completada en {resultados['tiempo_simulacion']:.2f} segundos")
     
-    start_time = time.time()
-    
-    # --- Generar puntos aleatorios con distribución uniforme ---
-    x_rand = np.random.uniform(min_x, max_x, n_puntos)
-    y_rand = np.random.uniform(min_y, max_y, n_puntos)
-    
-    print(f"   Puntos generados en el bounding box")
-    
-    # --- Obtener el polígono del país ---
-    poligono_pais = pais_proyectado.geometry.iloc[0]
-    
-    # --- Contar puntos dentro del polígono ---
-    print(f"   Verificando puntos dentro del polígono...")
-    
-    puntos_dentro = 0
-    puntos_dentro_x = []  # Para visualización
-    puntos_dentro_y = []
-    puntos_fuera_x = []
-    puntos_fuera_y = []
-    
-    for i, (x, y) in enumerate(zip(x_rand, y_rand)):
-        # Mostrar progreso cada 10%
-        if n_puntos >= 10000 and i % (n_puntos // 10) == 0:
-            progreso = (i / n_puntos) * 100
-            print(f"      Progreso: {progreso:.0f}%", end='\r')
-        
-        punto = Point(x, y)
-        if poligono_pais.contains(punto):
-            puntos_dentro += 1
-            if len(puntos_dentro_x) < MAX_PUNTOS_VIZ:
-                puntos_dentro_x.append(x)
-                puntos_dentro_y.append(y)
-        else:
-            if len(puntos_fuera_x) < MAX_PUNTOS_VIZ // 2:
-                puntos_fuera_x.append(x)
-                puntos_fuera_y.append(y)
-    
-    end_time = time.time()
-    tiempo_simulacion = end_time - start_time
-    
-    print(f"   Simulación completada en {tiempo_simulacion:.2f} segundos")
-    
-    # --- Calcular área estimada con Monte Carlo ---
-    # Fórmula: Área_Estimada = Área_BBox × (puntos_dentro / total_puntos)
-    area_estimada_m2 = area_bbox * (puntos_dentro / n_puntos)
-    area_estimada_km2 = area_estimada_m2 / 1_000_000
-    
-    return {
-        'n_puntos': n_puntos,
-        'puntos_dentro': puntos_dentro,
-        'puntos_fuera': n_puntos - puntos_dentro,
-        'area_bbox_m2': area_bbox,
-        'area_estimada_m2': area_estimada_m2,
-        'area_estimada_km2': area_estimada_km2,
-        'tiempo_simulacion': tiempo_simulacion,
-        'puntos_dentro_x': puntos_dentro_x,
-        'puntos_dentro_y': puntos_dentro_y,
-        'puntos_fuera_x': puntos_fuera_x,
-        'puntos_fuera_y': puntos_fuera_y,
-        'bbox': bbox
-    }
+    return resultados
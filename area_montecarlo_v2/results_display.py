@@ -6,7 +6,7 @@ Funciones para mostrar y visualizar resultados
 """
 
 import matplotlib.pyplot as plt
-from config import AREAS_REALES_KM2
+from nucleo_montecarlo.config import AREAS_REALES_KM2
 
 
 def mostrar_resultados(nombre_pais, resultados):
@@ -55,14 +55,54 @@ def mostrar_resultados(nombre_pais, resultados):
         print("   (Error < 10%)")
     else:
         print(f"Probablemente el ShapeFile de {nombre_pais} no este considerando islas o archipielagos")
+        print("   (el nivel de detalle 110m las omite; pruebe con --nivel-detalle 10m o 10m_1km)")
     
     print("=" * 60)
 
 
-def visualizar_resultados(pais_proyectado, nombre_pais, resultados):
-    """Genera visualización gráfica de los resultados."""
-    print("\nGenerando visualización...")
+def mostrar_resultados_reticula(nombre_pais, resultados):
+    """Muestra los resultados del conteo determinista en retícula."""
+    area_real = AREAS_REALES_KM2.get(nombre_pais, 0)
+    area_estimada = resultados['area_estimada_km2']
+    
+    if area_real > 0:
+        error_absoluto = abs(area_estimada - area_real)
+        error_relativo = (error_absoluto / area_real) * 100
+    else:
+        error_absoluto = 0
+        error_relativo = 0
+    
+    print("\n" + "=" * 60)
+    print("   RESULTADOS DEL CONTEO EN RETÍCULA")
+    print("=" * 60)
+    
+    print(f"\n   País analizado: {nombre_pais}")
+    print(f"\n   NIVELES DE RESOLUCIÓN:")
+    for nivel in resultados['niveles']:
+        print(f"   ├─ {nivel['resolucion']:>5} x {nivel['resolucion']:<5} "
+              f"{nivel['area_estimada_km2']:>15,.2f} km²  ({nivel['tiempo']:.3f} seg)")
+    print(f"   └─ Tiempo total:                  {resultados['tiempo_simulacion']:>15.2f} seg")
+    
+    print(f"\n   CÁLCULO DEL ÁREA:")
+    print(f"   ├─ Nivel más fino:                {resultados['area_nivel_fino_km2']:>15,.2f} km²")
+    orden = resultados['orden_richardson']
+    if orden is not None:
+        print(f"   ├─ Orden estimado del error:      {orden:>15.3f}")
+    if resultados['extrapolacion'] == "richardson":
+        print(f"   └─ ÁREA EXTRAPOLADA (Richardson): {area_estimada:>15,.2f} km²")
+    else:
+        print(f"   └─ ÁREA (orden inestable, fina):  {area_estimada:>15,.2f} km²")
     
+    print(f"\n   VALIDACIÓN:")
+    print(f"   ├─ Área Real (dato oficial):      {area_real:>15,} km²")
+    print(f"   ├─ Diferencia (Error Absoluto):   {error_absoluto:>15,.2f} km²")
+    print(f"   └─ Error Relativo:                {error_relativo:>15.4f} %")
+    
+    print("\n" + "=" * 60)
+
+
+def _figura_resultados(pais_proyectado, nombre_pais, resultados):
+    """Construye la figura de la simulación (país, bounding box y puntos)."""
     bbox = resultados['bbox']
     min_x, min_y, max_x, max_y = bbox
     ancho = max_x - min_x
@@ -112,11 +152,26 @@ def visualizar_resultados(pais_proyectado, nombre_pais, resultados):
     ax.get_yaxis().set_major_formatter(plt.FuncFormatter(lambda x, p: format(int(x), ',')))
     
     plt.tight_layout()
+    return fig
+
+
+def visualizar_resultados(pais_proyectado, nombre_pais, resultados):
+    """Genera visualización gráfica de los resultados."""
+    print("\nGenerando visualización...")
+    
+    _figura_resultados(pais_proyectado, nombre_pais, resultados)
     plt.show()
     
     print("   Visualización generada")
 
 
+def guardar_visualizacion(pais_proyectado, nombre_pais, resultados, ruta):
+    """Guarda la visualización en un archivo PNG sin abrir ventanas (modo por lotes)."""
+    fig = _figura_resultados(pais_proyectado, nombre_pais, resultados)
+    fig.savefig(ruta, dpi=100)
+    plt.close(fig)
+
+
 def visualizar_previa(pais_gdf, nombre_pais):
     """Muestra una visualización rápida del país en coordenadas geográficas (Lat/Long)."""
     print(f"\n Generando vista previa de {nombre_pais} (Lat/Long)...")
@@ -5,7 +5,7 @@ Funciones para menú y entrada de datos
 ============================================================================
 """
 
-from config import PAISES_SUDAMERICA, AREAS_REALES_KM2
+from nucleo_montecarlo.config import PAISES_SUDAMERICA, AREAS_REALES_KM2
 
 
 def mostrar_menu():
@@ -49,3 +49,18 @@ def solicitar_cantidad_puntos():
             return n_puntos
         except ValueError:
             print("   Por favor ingrese un número válido.")
+
+
+def solicitar_metodo():
+    """Solicita el método de estimación: Monte Carlo o retícula determinista."""
+    print("\n   Método de estimación:")
+    print("   1. Monte Carlo (puntos pseudoaleatorios)")
+    print("   2. Retícula determinista con extrapolación de Richardson")
+    
+    while True:
+        opcion = input("\n→ Seleccione el método (1/2): ").strip()
+        if opcion in ("", "1"):
+            return "montecarlo"
+        if opcion == "2":
+            return "reticula"
+        print("   Opción inválida.")
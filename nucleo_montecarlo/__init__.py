@@ -0,0 +1,27 @@
+"""
+============================================================================
+NÚCLEO DE SIMULACIÓN MONTE CARLO
+Biblioteca compartida por el backend (FastAPI) y los programas de consola
+v1 y v2: carga de datos, proyecciones, registro de geometrías cacheadas,
+motores de clasificación, muestreadores, estimadores e historial
+============================================================================
+
+Los motores y muestreadores son registros intercambiables (ver
+point_classifier.registrar_motor y point_sampler.registrar_muestreador):
+lo que se agregue aquí queda disponible en todos los programas.
+"""
+
+from .data_loader import cargar_datos, buscar_pais
+from .catalogo import crear_catalogo, geometria_pais
+from .niveles_detalle import (obtener_catalogo, registrar_catalogo, datos_locales, cargar_tabla,
+                              asegurar_tabla, verificar_geometria, verificar_geometrias)
+from .geometry_processor import proyectar_y_calcular_bbox, obtener_geometria_proyectada
+from .point_classifier import MOTORES, registrar_motor, obtener_indice, clasificar_puntos
+from .point_sampler import MUESTREADORES, registrar_muestreador, obtener_dominio
+from .precision_muestreo import PRECISIONES, sesgo_reticula
+from .control_variate import FORMAS_CONTROL, obtener_control
+from .montecarlo_simulator import simulacion_montecarlo, simular_geometria, estimar_area
+from .lattice_estimator import estimacion_reticula
+from .run_history import registrar_corrida
+from .cancelacion import SimulacionCancelada, crear_cancelacion, cancelar, verificar_cancelacion
+from .distribuido import FragmentoFallido, crear_trabajador, simulacion_distribuida, salud_trabajador
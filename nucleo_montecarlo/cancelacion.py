@@ -0,0 +1,56 @@
+"""
+============================================================================
+CANCELACIÓN
+Token revisado entre lotes para detener una simulación a pedido o al
+vencer su plazo
+============================================================================
+"""
+
+import threading
+import time
+
+
+class SimulacionCancelada(Exception):
+    """
+    La simulación se detuvo entre dos lotes. 'motivo' indica por qué
+    ('cancelada' o 'plazo') y 'puntos_procesados' cuántos puntos alcanzó a
+    calcular, para devolver al cliente la cuota que no usó.
+    """
+
+    def __init__(self, motivo, puntos_procesados=0):
+        super().__init__(f"Simulación detenida ({motivo}) tras {puntos_procesados:,} puntos")
+        self.motivo = motivo
+        self.puntos_procesados = puntos_procesados
+
+
+def crear_cancelacion(plazo_segundos=None):
+    """
+    Token de cancelación: otro hilo lo cancela con cancelar(); el plazo, si
+    se indica, lo vence solo. El simulador lo revisa antes de cada lote, así
+    que una simulación cancelada libera su hilo en a lo sumo un lote.
+    """
+    return {
+        'evento': threading.Event(),
+        'motivo': None,
+        'limite': time.monotonic() + plazo_segundos if plazo_segundos is not None else None
+    }
+
+
+def cancelar(cancelacion, motivo="cancelada"):
+    """Marca el token; el simulador se detiene al terminar el lote en curso."""
+    if not cancelacion['evento'].is_set():
+        cancelacion['motivo'] = motivo
+        cancelacion['evento'].set()
+
+
+def verificar_cancelacion(cancelacion, puntos_procesados=0):
+    """
+    Lanza SimulacionCancelada si el token fue cancelado o venció su plazo.
+    Sin token (None) no hace nada.
+    """
+    if cancelacion is None:
+        return
+    if cancelacion['limite'] is not None and time.monotonic() > cancelacion['limite']:
+        cancelar(cancelacion, "plazo")
+    if cancelacion['evento'].is_set():
+        raise SimulacionCancelada(cancelacion['motivo'], puntos_procesados)
@@ -0,0 +1,51 @@
+"""
+============================================================================
+CATÁLOGO DE PAÍSES
+Índice del dataset, proyecciones y registro de geometrías cacheadas
+============================================================================
+"""
+
+from .data_loader import indexar_paises
+from .geometry_processor import crear_proyeccion_equivalente, obtener_geometria_proyectada
+from .config import NIVELES_DETALLE, NIVEL_DETALLE_POR_DEFECTO
+
+
+def crear_catalogo(mundo, nivel=NIVEL_DETALLE_POR_DEFECTO):
+    """
+    Indexa todos los países por nombre e ISO y prepara la proyección de
+    igual área de cada uno.
+
+    Args:
+        mundo: GeoDataFrame de la escala del nivel de detalle
+        nivel: nivel de detalle (ver config.NIVELES_DETALLE) con que
+            geometria_pais proyecta (y simplifica) los países
+
+    Returns:
+        dict con 'mundo' (el GeoDataFrame), 'nivel', 'por_clave' y 'paises'
+        (ver data_loader.indexar_paises; cada país incluye su 'proyeccion').
+        Sirve también como índice para data_loader.buscar_pais.
+    """
+    if nivel not in NIVELES_DETALLE:
+        raise ValueError(f"Nivel de detalle desconocido: {nivel}")
+
+    indice = indexar_paises(mundo)
+    for info in indice['paises'].values():
+        info['proyeccion'] = crear_proyeccion_equivalente(mundo.geometry.iloc[info['posicion']])
+
+    return {'mundo': mundo, 'nivel': nivel, **indice}
+
+
+def geometria_pais(catalogo, nombre_pais):
+    """
+    Devuelve (pais_gdf, geo_info) de un país ya resuelto a su NAME canónico.
+
+    geo_info es la entrada del registro de geometrías: la proyección, el bbox
+    y los índices de motores y dominios de muestreo se construyen una sola
+    vez y los comparten todas las simulaciones del proceso.
+    """
+    info_pais = catalogo['paises'][nombre_pais]
+    # Acceso directo por posición, sin recorrer el GeoDataFrame
+    pais_gdf = catalogo['mundo'].iloc[[info_pais['posicion']]]
+
+    geo_info = obtener_geometria_proyectada(pais_gdf, nombre_pais, info_pais['proyeccion'], catalogo['nivel'])
+    return pais_gdf, geo_info
@@ -0,0 +1,109 @@
+"""
+============================================================================
+CONFIGURACIÓN DEL NÚCLEO DE SIMULACIÓN
+Constantes compartidas por el backend y los programas de consola
+============================================================================
+"""
+
+import os
+
+# Lista de países de Sudamérica (nombres en inglés como aparecen en Natural Earth)
+PAISES_SUDAMERICA = [
+    "Argentina",
+    "Bolivia",
+    "Brazil",
+    "Chile",
+    "Colombia",
+    "Ecuador",
+    "Guyana",
+    "Paraguay",
+    "Peru",
+    "Suriname",
+    "Uruguay",
+    "Venezuela"
+]
+
+# Áreas reales de referencia en km² (Fuente: Banco Mundial / Wikipedia)
+AREAS_REALES_KM2 = {
+    "Argentina": 2780400,
+    "Bolivia": 1098581,
+    "Brazil": 8515770,
+    "Chile": 756102,
+    "Colombia": 1138910,
+    "Ecuador": 283561,
+    "Guyana": 214969,
+    "Paraguay": 406752,
+    "Peru": 1285216,
+    "Suriname": 165940,
+    "Uruguay": 176215,
+    "Venezuela": 916445
+}
+
+# URL de datos geográficos (países de Natural Earth; escala 110m, 50m o 10m)
+URL_NATURAL_EARTH = "https://naciscdn.org/naturalearth/{escala}/cultural/ne_{escala}_admin_0_countries.zip"
+URL_MAPA = URL_NATURAL_EARTH.format(escala="110m")
+
+# Datos locales: rutas absolutas, para que cada programa encuentre la misma
+# caché y el mismo historial sin importar desde dónde se ejecute
+DIRECTORIO_DATOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DATA_CACHE_PATH = os.path.join(DIRECTORIO_DATOS, "countries.gpkg")
+
+# Niveles de detalle de la geometría (ver niveles_detalle): las tres escalas
+# de Natural Earth y derivados simplificados con tolerancia en metros sobre
+# la proyección de igual área de cada país. Cada escala se lee de su caché
+# (DATA_CACHE_PATH la de 110m, countries_{escala}.gpkg las demás), de un
+# archivo ne_{escala}_admin_0_countries (.zip, .shp o .gpkg) copiado en
+# DIRECTORIO_DATOS o, si no hay ninguno, de URL_NATURAL_EARTH
+NIVELES_DETALLE = {
+    "110m": {'escala': "110m", 'tolerancia_m': None},
+    "50m": {'escala': "50m", 'tolerancia_m': None},
+    "10m": {'escala': "10m", 'tolerancia_m': None},
+    "10m_1km": {'escala': "10m", 'tolerancia_m': 1_000},
+    "10m_5km": {'escala': "10m", 'tolerancia_m': 5_000}
+}
+NIVEL_DETALLE_POR_DEFECTO = "110m"
+TABLA_NIVELES_PATH = os.path.join(DIRECTORIO_DATOS, "niveles_detalle.json") # vértices, área y costo por nivel
+PUNTOS_MEDICION_NIVELES = 200_000 # puntos clasificados para medir el costo de cada nivel
+TOLERANCIA_AREA_GEODESICA = 0.005 # diferencia relativa máxima entre el área proyectada y la geodésica (LAEA es de igual área)
+
+# Configuración de proyección
+# Cada país usa una proyección de igual área (LAEA) centrada en él, creada una
+# sola vez al cargar los datos (ver catalogo.crear_catalogo)
+
+# Configuración de visualización
+# MAX_PUNTOS_VIZ = 50000 # para limitar el número de puntos visibles
+MAX_PUNTOS_VIZ = float('inf') # para deshabilitar el límite
+
+# Configuración de la simulación
+# Motores disponibles: ver point_classifier.MOTORES
+MOTOR_POR_DEFECTO = "shapely"
+TAMANO_LOTE = 1_000_000 # puntos generados y clasificados por iteración
+TOLERANCIA_SIMPLIFICACION_M = 5_000 # tolerancia del polígono simplificado (motor "dos_niveles")
+
+# Precisión de las muestras: "float64", "float32" o "entera" (ver precision_muestreo)
+PRECISION_POR_DEFECTO = "float64"
+SUBLOTE_COMPACTO = 65_536 # puntos clasificados por llamado con muestras compactas
+
+# Muestreadores disponibles: ver point_sampler.MUESTREADORES
+MUESTREADOR_POR_DEFECTO = "bbox"
+CELDAS_COBERTURA = 64 # celdas por eje de la grilla de cobertura (muestreador "celdas")
+
+# Estimadores disponibles: "simple" o "variable_control"
+ESTIMADOR_POR_DEFECTO = "simple"
+FORMA_CONTROL_POR_DEFECTO = "simplificado" # ver control_variate.FORMAS_CONTROL
+TOLERANCIA_CONTROL_M = 20_000 # tolerancia del polígono simplificado usado como control
+
+# Estimador determinista de retícula (metodo "reticula")
+RESOLUCIONES_RETICULA = [128, 256, 512, 1024] # celdas por eje en cada nivel
+RANGO_ORDEN_RICHARDSON = (0.5, 3.0) # órdenes estimados del error que se aceptan para extrapolar
+TOLERANCIA_ORDEN_RICHARDSON = 0.5 # diferencia máxima entre los órdenes estimados con tríos de niveles consecutivos
+
+# Historial de corridas (SQLite compartido por la API y los programas de consola)
+HISTORIAL_DB_PATH = os.path.join(DIRECTORIO_DATOS, "historial.sqlite")
+
+# Ejecución distribuida (distribuido.py): fragmentos con semilla propia
+# repartidos entre procesos trabajadores por HTTP
+PUNTOS_POR_FRAGMENTO = 10_000_000 # puntos de cada fragmento
+REINTENTOS_FRAGMENTO = 3 # reintentos de un fragmento fallido, en cualquier trabajador
+FALLOS_TRABAJADOR = 2 # fallos seguidos tras los que un trabajador se da por caído
+TIEMPO_ESPERA_FRAGMENTO_S = 600 # plazo de respuesta de un trabajador por fragmento
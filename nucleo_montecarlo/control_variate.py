@@ -0,0 +1,108 @@
+"""
+============================================================================
+VARIABLE DE CONTROL
+Reducción de varianza usando formas de referencia con área exacta conocida
+============================================================================
+"""
+
+import numpy as np
+import shapely
+
+from .config import TOLERANCIA_CONTROL_M
+
+
+def _envolvente_convexa(poligono):
+    return poligono.convex_hull
+
+
+def _simplificado(poligono):
+    return poligono.simplify(TOLERANCIA_CONTROL_M, preserve_topology=True)
+
+
+# Formas de control disponibles; todas se derivan del polígono proyectado
+FORMAS_CONTROL = {
+    'envolvente_convexa': _envolvente_convexa,
+    'simplificado': _simplificado
+}
+
+
+def _celdas_dominio(dominio):
+    """Geometría de las celdas del dominio (o del bbox si no tiene celdas)."""
+    if 'x0' in dominio:
+        return shapely.box(
+            dominio['x0'], dominio['y0'],
+            dominio['x0'] + dominio['ancho_celda'], dominio['y0'] + dominio['alto_celda']
+        )
+    return np.array([shapely.box(*dominio['bbox'])])
+
+
+def construir_control(poligono, dominio, forma):
+    """
+    Construye la forma de control y su área exacta dentro del dominio.
+
+    El área se calcula recortando la forma con el dominio de muestreo, porque
+    la media conocida de la variable de control es área_control / área_dominio.
+
+    Returns:
+        dict con la geometría preparada, su área en m² y su media teórica
+    """
+    if forma not in FORMAS_CONTROL:
+        raise ValueError(f"Forma de control desconocida: {forma}")
+
+    geometria = FORMAS_CONTROL[forma](poligono)
+    area_m2 = float(shapely.area(shapely.intersection(geometria, _celdas_dominio(dominio))).sum())
+    shapely.prepare(geometria)
+
+    return {
+        'forma': forma,
+        'geometria': geometria,
+        'area_m2': area_m2,
+        'media': area_m2 / dominio['area_m2']
+    }
+
+
+def obtener_control(geo_info, muestreador, dominio, forma):
+    """Devuelve la forma de control cacheada para el par (muestreador, forma)."""
+    controles = geo_info.setdefault('controles', {})
+    clave = (muestreador, forma)
+    if clave not in controles:
+        poligono = geo_info['pais_proyectado'].geometry.iloc[0]
+        controles[clave] = construir_control(poligono, dominio, forma)
+
+    return controles[clave]
+
+
+def estimar_con_control(n, suma_y, suma_c, suma_yc, control, area_dominio):
+    """
+    Combina los indicadores del país (Y) y del control (C) con el coeficiente
+    óptimo beta = Cov(Y, C) / Var(C):
+
+        p_vc = media(Y) - beta * (media(C) - media_conocida(C))
+
+    Al ser indicadores 0/1, las sumas de cuadrados coinciden con las sumas, así
+    que bastan n, ΣY, ΣC y ΣYC (acumulables por lotes).
+
+    Returns:
+        dict con la estimación reducida, su error estándar y diagnósticos
+    """
+    media_y = suma_y / n
+    media_c = suma_c / n
+    var_y = media_y * (1 - media_y)
+    var_c = media_c * (1 - media_c)
+    cov_yc = suma_yc / n - media_y * media_c
+
+    beta = cov_yc / var_c if var_c > 0 else 0.0
+    correlacion = cov_yc / np.sqrt(var_y * var_c) if var_y > 0 and var_c > 0 else 0.0
+
+    proporcion = media_y - beta * (media_c - control['media'])
+    error_estandar = np.sqrt(max(var_y - beta * cov_yc, 0.0) / n)
+
+    return {
+        'forma': control['forma'],
+        'area_control_m2': control['area_m2'],
+        'coeficiente': float(beta),
+        'correlacion': float(correlacion),
+        'area_estimada_m2': float(area_dominio * proporcion),
+        'area_estimada_km2': float(area_dominio * proporcion / 1_000_000),
+        'error_estandar_km2': float(area_dominio * error_estandar / 1_000_000)
+    }
@@ -0,0 +1,148 @@
+"""
+============================================================================
+CARGA DE DATOS GEOGRÁFICOS
+Funciones para descargar y cargar datos de Natural Earth
+============================================================================
+"""
+
+import geopandas as gpd
+import os
+import sys
+
+from .config import URL_NATURAL_EARTH, DATA_CACHE_PATH, DIRECTORIO_DATOS, NIVELES_DETALLE
+
+# Extensiones aceptadas para un archivo de Natural Earth copiado a mano
+EXTENSIONES_LOCALES = ('.zip', '.shp', '.gpkg')
+
+
+def ruta_cache(escala):
+    """Caché GeoPackage de una escala de Natural Earth."""
+    if escala == "110m":
+        return DATA_CACHE_PATH
+    return os.path.join(DIRECTORIO_DATOS, f"countries_{escala}.gpkg")
+
+
+def archivo_local(escala):
+    """Archivo ne_{escala}_admin_0_countries copiado en DIRECTORIO_DATOS, o None."""
+    for extension in EXTENSIONES_LOCALES:
+        ruta = os.path.join(DIRECTORIO_DATOS, f"ne_{escala}_admin_0_countries{extension}")
+        if os.path.exists(ruta):
+            return ruta
+    return None
+
+
+def cargar_datos(escala="110m"):
+    """
+    Carga los países de Natural Earth en la escala pedida (110m, 50m o
+    10m): desde la caché local, desde un archivo de Natural Earth copiado en
+    DIRECTORIO_DATOS o, si no hay ninguno, descargándolos. Lo leído de un
+    archivo o de internet se guarda en la caché.
+    """
+    if escala not in {nivel['escala'] for nivel in NIVELES_DETALLE.values()}:
+        raise ValueError(f"Escala de Natural Earth desconocida: {escala}")
+    cache = ruta_cache(escala)
+    
+    # Verificar si existe caché local
+    if os.path.exists(cache):
+        try:
+            print(f"Cargando datos desde caché local: {cache}")
+            mundo = gpd.read_file(cache)
+            print("Datos cargados correctamente desde caché!")
+            return mundo
+        except Exception as e:
+            print(f"Error al cargar caché: {e}")
+            print("Intentando descargar nuevamente...")
+    
+    origen = archivo_local(escala)
+    if origen is not None:
+        print(f"Leyendo datos de Natural Earth ({escala}) desde {origen}...")
+    else:
+        # Descargar desde internet
+        origen = URL_NATURAL_EARTH.format(escala=escala)
+        print(f"Descargando datos de Natural Earth ({escala})...")
+        print("(Esto puede tardar unos segundos la primera vez)")
+    
+    try:
+        mundo = gpd.read_file(origen)
+        print("Datos cargados correctamente!")
+        
+        # Guardar en caché
+        try:
+            os.makedirs(os.path.dirname(cache), exist_ok=True)
+            mundo.to_file(cache, driver="GPKG")
+            print(f"Datos guardados en caché: {cache}")
+        except Exception as e:
+            print(f"Advertencia: No se pudo guardar caché: {e}")
+        
+        return mundo
+    except Exception as e:
+        print(f"Error al cargar los datos: {e}")
+        return None
+
+
+# Columnas de Natural Earth usadas como claves de búsqueda de países
+COLUMNAS_NOMBRE = ['NAME', 'NAME_LONG', 'ADMIN']
+COLUMNAS_ISO = ['ISO_A3', 'ISO_A3_EH', 'ISO_A2', 'ISO_A2_EH', 'ADM0_A3']
+# Código ISO de un país: el primero definido ('-99' = sin código); Natural
+# Earth deja ISO_A3 en -99 para Francia, Noruega, Kosovo, etc.
+COLUMNAS_ISO_A3 = ['ISO_A3', 'ISO_A3_EH', 'ADM0_A3']
+
+
+def _normalizar_clave(texto):
+    return str(texto).strip().casefold()
+
+
+def _codigo_iso(fila):
+    """ISO A3 del país según COLUMNAS_ISO_A3, o None si ninguna lo define."""
+    for columna in COLUMNAS_ISO_A3:
+        valor = fila.get(columna)
+        if valor is not None and str(valor) != '-99':
+            return valor
+    return None
+
+
+def indexar_paises(mundo):
+    """
+    Indexa todos los países del dataset por nombre y códigos ISO.
+    
+    Una clave (nombre alternativo o código) que ya apunta a otro país no se
+    sobrescribe: se conserva la primera y se avisa por stderr.
+    
+    Raises:
+        ValueError: si dos filas comparten NAME (el nombre canónico)
+    
+    Returns:
+        dict con 'por_clave' (clave normalizada -> NAME) y 'paises'
+        (NAME -> info del país, incluida su fila en el GeoDataFrame)
+    """
+    por_clave = {}
+    paises = {}
+    
+    for posicion, (_, fila) in enumerate(mundo.iterrows()):
+        nombre = fila['NAME']
+        if nombre in paises:
+            raise ValueError(f"País duplicado en el dataset: {nombre} "
+                             f"(filas {paises[nombre]['posicion']} y {posicion})")
+        paises[nombre] = {
+            'nombre': nombre,
+            'iso_a3': _codigo_iso(fila),
+            'continente': fila.get('CONTINENT'),
+            'posicion': posicion
+        }
+        
+        for columna in COLUMNAS_NOMBRE + COLUMNAS_ISO:
+            valor = fila.get(columna)
+            if valor is None or str(valor) == '-99':
+                continue
+            clave = _normalizar_clave(valor)
+            anterior = por_clave.setdefault(clave, nombre)
+            if anterior != nombre:
+                print(f"Aviso: la clave '{valor}' ({columna}) de {nombre} ya corresponde a {anterior}; "
+                      f"se conserva {anterior}", file=sys.stderr)
+    
+    return {'por_clave': por_clave, 'paises': paises}
+
+
+def buscar_pais(indice_paises, consulta):
+    """Devuelve el NAME canónico para un nombre o código ISO, o None."""
+    return indice_paises['por_clave'].get(_normalizar_clave(consulta))
@@ -0,0 +1,382 @@
+"""
+============================================================================
+EJECUCIÓN DISTRIBUIDA
+Coordinador y trabajadores que reparten una simulación en fragmentos con
+semilla propia, por HTTP/JSON
+============================================================================
+
+Protocolo (HTTP/1.1, cuerpos JSON):
+
+- GET  /salud      -> {'paises': [...precargados], 'motores': [...], 'pid'}
+- POST /fragmento  {'pais', 'n_puntos', 'semilla', 'motor', 'muestreador',
+                    'precision', 'control', 'nivel_detalle'} -> conteos del fragmento
+                   (400 si los parámetros son inválidos: no se reintenta)
+
+Cada fragmento tiene su semilla, derivada de la semilla de la simulación
+con SeedSequence.spawn: los conteos combinados son los mismos sin importar
+cuántos trabajadores haya, cuál calculó cada fragmento o cuántas veces se
+reintentó. Como N, ΣY, ΣC y ΣYC se suman, la combinación da el mismo
+estimador (y error estándar) que una sola corrida de N puntos.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from .catalogo import geometria_pais
+from .config import (MOTOR_POR_DEFECTO, MUESTREADOR_POR_DEFECTO, PRECISION_POR_DEFECTO, NIVEL_DETALLE_POR_DEFECTO,
+                     PUNTOS_POR_FRAGMENTO, REINTENTOS_FRAGMENTO, FALLOS_TRABAJADOR, TIEMPO_ESPERA_FRAGMENTO_S)
+from .niveles_detalle import obtener_catalogo
+from .point_classifier import MOTORES, obtener_indice
+from .point_sampler import obtener_dominio
+from .precision_muestreo import PRECISIONES
+from .control_variate import FORMAS_CONTROL, obtener_control, estimar_con_control
+from .montecarlo_simulator import simular_geometria, estimar_area, validar_precision
+from .cancelacion import SimulacionCancelada, verificar_cancelacion
+
+# Diferencia relativa tolerada entre las áreas de dominio de los trabajadores
+TOLERANCIA_DOMINIO = 1e-9
+
+
+class FragmentoFallido(Exception):
+    """Un fragmento agotó sus reintentos o no quedan trabajadores disponibles."""
+
+
+def fragmentar(n_puntos, semilla=None, puntos_por_fragmento=PUNTOS_POR_FRAGMENTO):
+    """
+    Divide una simulación en fragmentos de a lo sumo puntos_por_fragmento
+    puntos, cada uno con una semilla independiente derivada de 'semilla'.
+
+    Returns:
+        tupla (semilla, lista de fragmentos {'indice', 'n_puntos', 'semilla'})
+    """
+    if n_puntos <= 0 or puntos_por_fragmento <= 0:
+        raise ValueError("n_puntos y puntos_por_fragmento deben ser positivos")
+    if semilla is None:
+        semilla = int(np.random.SeedSequence().entropy % 2**63)
+
+    cantidad = -(-n_puntos // puntos_por_fragmento)
+    hijos = np.random.SeedSequence(semilla).spawn(cantidad)
+    fragmentos = [
+        {
+            'indice': i,
+            'n_puntos': min(puntos_por_fragmento, n_puntos - i * puntos_por_fragmento),
+            'semilla': int(hijo.generate_state(1, dtype=np.uint64)[0] % 2**63)
+        }
+        for i, hijo in enumerate(hijos)
+    ]
+    return semilla, fragmentos
+
+
+# ============================================================================
+# TRABAJADOR
+# ============================================================================
+
+def ejecutar_fragmento(geo_info, peticion):
+    """
+    Calcula un fragmento con el núcleo local, sin guardar puntos de
+    visualización.
+
+    Raises:
+        ValueError: si el motor, el muestreador, la precisión o la forma de
+            control no existen
+
+    Returns:
+        dict con los conteos del fragmento y lo necesario para combinarlos
+    """
+    motor = peticion.get('motor', MOTOR_POR_DEFECTO)
+    muestreador = peticion.get('muestreador', MUESTREADOR_POR_DEFECTO)
+    precision = peticion.get('precision', PRECISION_POR_DEFECTO)
+    forma = peticion.get('control')
+    if motor not in MOTORES:
+        raise ValueError(f"Motor de clasificación desconocido: {motor}")
+    validar_precision(precision, muestreador)
+    if forma is not None and forma not in FORMAS_CONTROL:
+        raise ValueError(f"Forma de control desconocida: {forma}")
+
+    control = None
+    if forma is not None:
+        control = obtener_control(geo_info, muestreador, obtener_dominio(geo_info, muestreador), forma)
+
+    resultados = simular_geometria(
+        geo_info, int(peticion['n_puntos']), motor=motor, muestreador=muestreador, precision=precision,
+        control=control, semilla=int(peticion['semilla']), max_puntos_viz=0
+    )
+
+    respuesta = {
+        'n_puntos': resultados['n_puntos'],
+        'puntos_dentro': resultados['puntos_dentro'],
+        'area_dominio_m2': resultados['area_dominio_m2'],
+        'area_bbox_m2': resultados['area_bbox_m2'],
+        'bbox': list(resultados['bbox']),
+        'tiempo_simulacion': resultados['tiempo_simulacion']
+    }
+    if control is not None:
+        respuesta['puntos_control'] = resultados['puntos_control']
+        respuesta['puntos_ambos'] = resultados['puntos_ambos']
+        respuesta['control'] = {clave: control[clave] for clave in ('forma', 'area_m2', 'media')}
+    return respuesta
+
+
+class _ManejadorTrabajador(BaseHTTPRequestHandler):
+    """Atiende /salud y /fragmento; el catálogo está en self.server.catalogo."""
+
+    protocol_version = "HTTP/1.1"
+
+    def _responder(self, estado, cuerpo):
+        datos = json.dumps(cuerpo).encode('utf-8')
+        self.send_response(estado)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_GET(self):
+        if self.path != "/salud":
+            self._responder(404, {'error': "Ruta desconocida"})
+            return
+        self._responder(200, {'paises': self.server.precargados, 'motores': list(MOTORES), 'pid': os.getpid()})
+
+    def do_POST(self):
+        if self.path != "/fragmento":
+            self._responder(404, {'error': "Ruta desconocida"})
+            return
+        try:
+            peticion = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            pais = peticion['pais']
+            nivel = peticion.get('nivel_detalle', NIVEL_DETALLE_POR_DEFECTO)
+            catalogo = self.server.catalogo if nivel == self.server.catalogo['nivel'] else obtener_catalogo(nivel)
+            if catalogo is None:
+                # Sin datos de ese nivel en este trabajador: otro puede tenerlos
+                self._responder(500, {'error': f"Datos del nivel {nivel} no disponibles"})
+                return
+            if pais not in catalogo['paises']:
+                raise ValueError(f"País no encontrado: {pais}")
+            _, geo_info = geometria_pais(catalogo, pais)
+            self._responder(200, ejecutar_fragmento(geo_info, peticion))
+        except (ValueError, KeyError, TypeError) as e:
+            self._responder(400, {'error': str(e)})
+        except Exception as e:
+            self._responder(500, {'error': str(e)})
+
+    def log_message(self, formato, *args):
+        # Sin una línea por fragmento en la consola del trabajador
+        pass
+
+
+def crear_trabajador(catalogo, host="127.0.0.1", puerto=0, paises=(), motores=(MOTOR_POR_DEFECTO,),
+                     muestreador=MUESTREADOR_POR_DEFECTO):
+    """
+    Crea el servidor de un trabajador con las geometrías de 'paises' ya
+    proyectadas y los índices de 'motores' construidos (los demás países
+    se cargan en su primer fragmento). Con puerto 0 el sistema elige uno
+    libre: se lee en servidor.server_address.
+
+    Returns:
+        ThreadingHTTPServer; se atiende con serve_forever()
+    """
+    for nombre in paises:
+        _, geo_info = geometria_pais(catalogo, nombre)
+        for motor in motores:
+            for local in {PRECISIONES[p]['local'] for p in PRECISIONES}:
+                obtener_indice(geo_info, motor, local=local)
+        obtener_dominio(geo_info, muestreador)
+
+    servidor = ThreadingHTTPServer((host, puerto), _ManejadorTrabajador)
+    servidor.daemon_threads = True
+    servidor.catalogo = catalogo
+    servidor.precargados = list(paises)
+    return servidor
+
+
+# ============================================================================
+# COORDINADOR
+# ============================================================================
+
+def _pedir(trabajador, ruta, cuerpo=None, tiempo_espera=TIEMPO_ESPERA_FRAGMENTO_S):
+    """GET (sin cuerpo) o POST JSON a un trabajador 'host:puerto'."""
+    datos = json.dumps(cuerpo).encode('utf-8') if cuerpo is not None else None
+    solicitud = urllib.request.Request(f"http://{trabajador}{ruta}", data=datos,
+                                       headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(solicitud, timeout=tiempo_espera) as respuesta:
+        return json.loads(respuesta.read())
+
+
+def salud_trabajador(trabajador, tiempo_espera=5):
+    """Respuesta de /salud, o None si el trabajador no responde."""
+    try:
+        return _pedir(trabajador, "/salud", tiempo_espera=tiempo_espera)
+    except (OSError, ValueError):
+        return None
+
+
+def _combinar(pais, parametros, semilla, fragmentos, respuestas):
+    """Suma los conteos de los fragmentos en un resultado estándar del simulador."""
+    areas = {respuesta['area_dominio_m2'] for respuesta in respuestas}
+    if max(areas) - min(areas) > TOLERANCIA_DOMINIO * max(areas):
+        raise ValueError(f"Los trabajadores usan geometrías distintas de {pais} "
+                         f"(áreas de dominio {sorted(areas)})")
+    area_dominio = respuestas[0]['area_dominio_m2']
+
+    n_puntos = sum(respuesta['n_puntos'] for respuesta in respuestas)
+    puntos_dentro = sum(respuesta['puntos_dentro'] for respuesta in respuestas)
+    area_estimada_m2, error_estandar_km2 = estimar_area(area_dominio, puntos_dentro, n_puntos)
+
+    resultados = {
+        'n_puntos': n_puntos,
+        'puntos_dentro': puntos_dentro,
+        'puntos_fuera': n_puntos - puntos_dentro,
+        'area_bbox_m2': respuestas[0]['area_bbox_m2'],
+        'area_dominio_m2': area_dominio,
+        'area_estimada_m2': area_estimada_m2,
+        'area_estimada_km2': area_estimada_m2 / 1_000_000,
+        'error_estandar_km2': error_estandar_km2,
+        'motor': parametros['motor'],
+        'muestreador': parametros['muestreador'],
+        'precision': parametros['precision'],
+        'puntos_dentro_x': [],
+        'puntos_dentro_y': [],
+        'puntos_fuera_x': [],
+        'puntos_fuera_y': [],
+        'bbox': tuple(respuestas[0]['bbox']),
+        'semilla': semilla,
+        'fragmentos': fragmentos
+    }
+
+    if parametros['control'] is not None:
+        resultados['puntos_control'] = sum(respuesta['puntos_control'] for respuesta in respuestas)
+        resultados['puntos_ambos'] = sum(respuesta['puntos_ambos'] for respuesta in respuestas)
+        resultados['variable_control'] = estimar_con_control(
+            n_puntos, puntos_dentro, resultados['puntos_control'], resultados['puntos_ambos'],
+            respuestas[0]['control'], area_dominio
+        )
+    return resultados
+
+
+def simulacion_distribuida(trabajadores, pais, n_puntos, semilla=None, motor=MOTOR_POR_DEFECTO,
+                           muestreador=MUESTREADOR_POR_DEFECTO, precision=PRECISION_POR_DEFECTO, control=None,
+                           nivel_detalle=NIVEL_DETALLE_POR_DEFECTO, puntos_por_fragmento=PUNTOS_POR_FRAGMENTO,
+                           reintentos=REINTENTOS_FRAGMENTO, tiempo_espera=TIEMPO_ESPERA_FRAGMENTO_S, cancelacion=None):
+    """
+    Reparte una simulación entre trabajadores ('host:puerto') y combina sus
+    conteos en el resultado estándar de simulacion_montecarlo (sin puntos de
+    visualización ni estado del generador).
+
+    Cada trabajador toma fragmentos de una cola común, de a uno, así que los
+    más rápidos calculan más. Un fragmento fallido (conexión, plazo o error
+    500) vuelve a la cola para cualquier trabajador, hasta 'reintentos'
+    veces; un trabajador con FALLOS_TRABAJADOR fallos seguidos se da por
+    caído y deja de recibir fragmentos.
+
+    Args:
+        pais: NAME canónico del país (ver data_loader.buscar_pais)
+        control: forma de control (ver control_variate.FORMAS_CONTROL) o None
+        nivel_detalle: nivel de detalle de la geometría (ver config.NIVELES_DETALLE)
+        cancelacion: token revisado antes de enviar cada fragmento
+
+    Raises:
+        ValueError: si un trabajador rechaza los parámetros (400) o las
+            geometrías de los trabajadores no coinciden
+        FragmentoFallido: si un fragmento agota sus reintentos o se caen
+            todos los trabajadores
+        SimulacionCancelada: si el token se cancela o vence su plazo
+
+    Returns:
+        dict con resultados de la simulación y el detalle de cada fragmento
+        ('fragmentos': trabajador, intentos y tiempo)
+    """
+    if not trabajadores:
+        raise ValueError("Se necesita al menos un trabajador")
+    semilla, fragmentos = fragmentar(n_puntos, semilla, puntos_por_fragmento)
+    parametros = {'motor': motor, 'muestreador': muestreador, 'precision': precision, 'control': control}
+
+    pendientes = queue.Queue()
+    for fragmento in fragmentos:
+        fragmento['intentos'] = 0
+        pendientes.put(fragmento)
+
+    respuestas = {}
+    errores = []
+    activos = {'trabajadores': len(trabajadores)}
+    lock = threading.Lock()
+    terminado = threading.Event()
+
+    def _detener(error):
+        with lock:
+            errores.append(error)
+        terminado.set()
+
+    def _atender(trabajador):
+        fallos_seguidos = 0
+        while not terminado.is_set():
+            try:
+                fragmento = pendientes.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            try:
+                with lock:
+                    procesados = sum(respuesta['n_puntos'] for respuesta in respuestas.values())
+                verificar_cancelacion(cancelacion, procesados)
+            except SimulacionCancelada as e:
+                _detener(e)
+                return
+
+            fragmento['intentos'] += 1
+            inicio = time.perf_counter()
+            try:
+                respuesta = _pedir(trabajador, "/fragmento", {
+                    'pais': pais, 'n_puntos': fragmento['n_puntos'], 'semilla': fragmento['semilla'],
+                    'nivel_detalle': nivel_detalle, **parametros
+                }, tiempo_espera)
+            except urllib.error.HTTPError as e:
+                detalle = e.read().decode('utf-8', 'replace')
+                if e.code == 400:
+                    _detener(ValueError(f"{trabajador} rechazó el fragmento: {detalle}"))
+                    return
+                falla = f"{trabajador}: HTTP {e.code} {detalle}"
+            except (OSError, ValueError) as e:
+                falla = f"{trabajador}: {e}"
+            else:
+                fallos_seguidos = 0
+                fragmento.update(trabajador=trabajador, tiempo=round(time.perf_counter() - inicio, 3))
+                with lock:
+                    respuestas[fragmento['indice']] = respuesta
+                    if len(respuestas) == len(fragmentos):
+                        terminado.set()
+                continue
+
+            fallos_seguidos += 1
+            if fragmento['intentos'] > reintentos:
+                _detener(FragmentoFallido(f"El fragmento {fragmento['indice']} falló {fragmento['intentos']} "
+                                          f"veces (último error: {falla})"))
+                return
+            pendientes.put(fragmento)
+            if fallos_seguidos >= FALLOS_TRABAJADOR:
+                with lock:
+                    activos['trabajadores'] -= 1
+                    if activos['trabajadores'] == 0:
+                        errores.append(FragmentoFallido(f"No quedan trabajadores disponibles (último error: {falla})"))
+                        terminado.set()
+                return
+
+    inicio = time.perf_counter()
+    hilos = [threading.Thread(target=_atender, args=(trabajador,), daemon=True) for trabajador in trabajadores]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    if errores:
+        raise errores[0]
+
+    resultados = _combinar(pais, parametros, semilla, fragmentos, [respuestas[i] for i in range(len(fragmentos))])
+    resultados['tiempo_simulacion'] = time.perf_counter() - inicio
+    resultados['trabajadores'] = list(trabajadores)
+    return resultados
@@ -0,0 +1,188 @@
+"""
+============================================================================
+PROCESAMIENTO DE GEOMETRÍA
+Funciones para proyectar y calcular bounding box
+============================================================================
+"""
+
+import geopandas as gpd
+import numpy as np
+import pyproj
+import shapely
+
+from .config import NIVELES_DETALLE, NIVEL_DETALLE_POR_DEFECTO
+
+# Elipsoide de WGS84 para el área geodésica
+_GEOD = pyproj.Geod(ellps="WGS84")
+
+
+def crear_proyeccion_equivalente(geometria_geo):
+    """
+    Crea una proyección Lambert Azimutal de Igual Área (LAEA) centrada en el
+    país, junto con su transformador WGS84 -> metros.
+    
+    El centro es un punto interior de la parte más grande del país (no el
+    centro del bbox), así los países con territorios lejanos o que cruzan el
+    antimeridiano quedan centrados en su territorio principal.
+    
+    Returns:
+        dict con el CRS, el transformador y una descripción
+    """
+    partes = getattr(geometria_geo, 'geoms', [geometria_geo])
+    centro = max(partes, key=lambda parte: parte.area).representative_point()
+    crs = pyproj.CRS.from_dict({
+        'proj': 'laea',
+        'lat_0': round(centro.y, 4),
+        'lon_0': round(centro.x, 4),
+        'datum': 'WGS84',
+        'units': 'm'
+    })
+    transformador = pyproj.Transformer.from_crs("EPSG:4326", crs, always_xy=True)
+    
+    return {
+        'crs': crs,
+        'transformador': transformador,
+        'descripcion': f"LAEA (lat_0={centro.y:.4f}, lon_0={centro.x:.4f})"
+    }
+
+
+def proyectar_y_calcular_bbox(pais_gdf, nombre_pais, proyeccion=None, tolerancia_m=None):
+    """
+    Proyecta el país a sistema métrico y calcula el bounding box.
+    
+    Args:
+        pais_gdf: GeoDataFrame del país en WGS84
+        nombre_pais: nombre del país
+        proyeccion: proyección precalculada (ver crear_proyeccion_equivalente);
+            si es None se crea aquí
+        tolerancia_m: si se indica, el polígono proyectado se simplifica con
+            esa tolerancia en metros (niveles de detalle derivados)
+    
+    Returns:
+        dict con información de proyección y bbox, la cantidad de vértices y
+        el área exacta del polígono: plana en la proyección (a la que
+        converge Monte Carlo) y geodésica sobre el elipsoide
+    """
+    bounds_geo = pais_gdf.total_bounds
+    min_lon, min_lat, max_lon, max_lat = bounds_geo
+    
+    geometria_geo = pais_gdf.geometry.iloc[0]
+    if proyeccion is None:
+        proyeccion = crear_proyeccion_equivalente(geometria_geo)
+    
+    geometria = proyectar_geometria(geometria_geo, proyeccion)
+    if tolerancia_m:
+        # Sin colapsar partes: las islas menores que la tolerancia se conservan
+        geometria = reparar_poligono(shapely.simplify(geometria, tolerancia_m, preserve_topology=True))
+        # El área geodésica es la del polígono simplificado, no la del original
+        geometria_geo = proyectar_geometria(geometria, proyeccion, inversa=True)
+    if not geometria.is_valid:
+        # Todos los métodos (y el área exacta) suponen un polígono válido
+        raise ValueError(f"Geometría proyectada inválida para {nombre_pais}: {shapely.is_valid_reason(geometria)}")
+    pais_proyectado = gpd.GeoDataFrame(geometry=[geometria], crs=proyeccion['crs'])
+    proyeccion_usada = proyeccion['descripcion']
+    
+    min_x, min_y, max_x, max_y = pais_proyectado.total_bounds
+    
+    ancho = max_x - min_x
+    alto = max_y - min_y
+    area_bbox = ancho * alto
+    
+    return {
+        'pais_proyectado': pais_proyectado,
+        'bbox': (min_x, min_y, max_x, max_y),
+        'coords_geo': {
+            'min_lat': min_lat,
+            'max_lat': max_lat,
+            'min_lon': min_lon,
+            'max_lon': max_lon
+        },
+        'coords_proyectadas': {
+            'min_x': min_x,
+            'max_x': max_x,
+            'min_y': min_y,
+            'max_y': max_y,
+            'ancho': ancho,
+            'alto': alto,
+            'area_bbox_m2': area_bbox,
+            'area_bbox_km2': area_bbox / 1_000_000
+        },
+        'proyeccion': proyeccion_usada,
+        'transformador': proyeccion['transformador'],
+        'vertices': int(shapely.get_num_coordinates(geometria)),
+        'area_exacta_km2': float(geometria.area) / 1_000_000,
+        'area_geodesica_km2': area_geodesica(geometria_geo) / 1_000_000
+    }
+
+
+def area_geodesica(geometria_geo):
+    """Área en m² de una geometría WGS84 sobre el elipsoide (sin proyectar)."""
+    # Cada parte con el exterior antihorario: pyproj da el área con signo
+    # según la orientación y las de una multiparte podrían restarse
+    partes = getattr(geometria_geo, 'geoms', [geometria_geo])
+    return sum(_GEOD.geometry_area_perimeter(shapely.geometry.polygon.orient(parte))[0] for parte in partes)
+
+
+def reparar_poligono(geometria):
+    """
+    Devuelve la geometría si es válida o, si no, su versión reparada con
+    make_valid quedándose solo con las partes poligonales (make_valid puede
+    agregar líneas o puntos donde había autointersecciones).
+    
+    Raises:
+        ValueError: si no queda ninguna parte con área
+    """
+    if geometria.is_valid:
+        return geometria
+    
+    reparada = shapely.make_valid(geometria)
+    poligonos = [parte for parte in shapely.get_parts(reparada) if parte.geom_type in ('Polygon', 'MultiPolygon')]
+    if not poligonos:
+        raise ValueError("La geometría reparada no tiene partes poligonales")
+    return shapely.union_all(poligonos)
+
+
+def proyectar_geometria(geometria_geo, proyeccion, inversa=False):
+    """
+    Proyecta una geometría shapely WGS84 con el transformador ya creado
+    (con inversa=True, vuelve de la proyección a WGS84).
+    
+    Una geometría válida en WGS84 puede dejar de serlo al proyectarla: las
+    partes a ambos lados del antimeridiano (Fiji, Rusia) caen una sobre
+    otra y los vértices muy próximos pueden cruzarse (Sudán). Por eso la
+    proyección directa se repara (ver reparar_poligono). La inversa no: en
+    WGS84 esas partes vuelven a quedar separadas por el antimeridiano y
+    repararlas en el plano de longitud/latitud las deformaría.
+    """
+    direccion = pyproj.enums.TransformDirection.INVERSE if inversa else pyproj.enums.TransformDirection.FORWARD
+    
+    def _transformar(coords):
+        x, y = proyeccion['transformador'].transform(coords[:, 0], coords[:, 1], direction=direccion)
+        return np.column_stack([x, y])
+    
+    proyectada = shapely.transform(geometria_geo, _transformar)
+    return proyectada if inversa else reparar_poligono(proyectada)
+
+
+# Caché de geometrías proyectadas por (nivel de detalle, país); incluye los
+# índices de los motores
+_cache_geometrias = {}
+
+
+def obtener_geometria_proyectada(pais_gdf, nombre_pais, proyeccion=None, nivel=NIVEL_DETALLE_POR_DEFECTO):
+    """
+    Igual que proyectar_y_calcular_bbox, pero reutiliza el resultado entre
+    peticiones. Los índices de clasificación se guardan en 'indices'.
+    
+    pais_gdf debe venir del dataset de la escala del nivel (ver
+    config.NIVELES_DETALLE); los niveles derivados se simplifican aquí.
+    """
+    clave = (nivel, nombre_pais)
+    if clave not in _cache_geometrias:
+        geo_info = proyectar_y_calcular_bbox(pais_gdf, nombre_pais, proyeccion,
+                                             NIVELES_DETALLE[nivel]['tolerancia_m'])
+        geo_info['indices'] = {}
+        geo_info['nivel_detalle'] = nivel
+        _cache_geometrias[clave] = geo_info
+
+    return _cache_geometrias[clave]
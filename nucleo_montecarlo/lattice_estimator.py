@@ -0,0 +1,160 @@
+"""
+============================================================================
+ESTIMADOR DE RETÍCULA
+Conteo determinista de centros de celda con extrapolación de Richardson
+============================================================================
+"""
+
+import numpy as np
+import time
+from .config import (RESOLUCIONES_RETICULA, RANGO_ORDEN_RICHARDSON, TOLERANCIA_ORDEN_RICHARDSON,
+                     MAX_PUNTOS_VIZ, TAMANO_LOTE)
+from .point_classifier import MOTORES, clasificar_puntos
+from .cancelacion import verificar_cancelacion
+
+
+def _contar_reticula(indice, motor, bbox, resolucion, cancelacion=None):
+    """
+    Cuenta los centros de una retícula resolucion x resolucion dentro del país.
+    Las filas se clasifican por lotes para acotar la memoria.
+    """
+    min_x, min_y, max_x, max_y = bbox
+    hx = (max_x - min_x) / resolucion
+    hy = (max_y - min_y) / resolucion
+
+    xs = min_x + (np.arange(resolucion) + 0.5) * hx
+    ys = min_y + (np.arange(resolucion) + 0.5) * hy
+
+    filas_por_lote = max(1, TAMANO_LOTE // resolucion)
+    dentro = np.empty(resolucion * resolucion, dtype=bool)
+
+    for inicio in range(0, resolucion, filas_por_lote):
+        verificar_cancelacion(cancelacion, inicio * resolucion)
+        filas = ys[inicio:inicio + filas_por_lote]
+        x = np.tile(xs, len(filas))
+        y = np.repeat(filas, resolucion)
+        dentro[inicio * resolucion:inicio * resolucion + len(x)] = clasificar_puntos(motor, indice, x, y, cancelacion, inicio * resolucion)
+
+    return xs, ys, dentro, hx * hy
+
+
+def _orden_estimado(niveles):
+    """
+    Orden p del error estimado con tres niveles de razón r constante:
+        p = log((A(h) - A(h/r)) / (A(h/r) - A(h/r²))) / log(r)
+    None si las resoluciones no tienen razón constante o las diferencias
+    son nulas o de distinto signo (el error no decrece como una potencia).
+    """
+    resoluciones = [nivel['resolucion'] for nivel in niveles]
+    razon = resoluciones[1] / resoluciones[0]
+    if razon <= 1 or not np.isclose(resoluciones[2] / resoluciones[1], razon):
+        return None
+
+    areas = [nivel['area_estimada_km2'] for nivel in niveles]
+    diferencia_gruesa = areas[0] - areas[1]
+    diferencia_fina = areas[1] - areas[2]
+    if diferencia_gruesa * diferencia_fina <= 0:
+        return None
+    return float(np.log(diferencia_gruesa / diferencia_fina) / np.log(razon))
+
+
+def _extrapolar(niveles):
+    """
+    Extrapolación de Richardson con los dos niveles más finos y el orden
+    estimado con los tres más finos. Con un cuarto nivel, el orden del trío
+    anterior debe coincidir (TOLERANCIA_ORDEN_RICHARDSON); si el orden no
+    se puede estimar, es inestable o cae fuera de RANGO_ORDEN_RICHARDSON,
+    se usa el nivel más fino.
+
+    Returns:
+        tupla (área en km², método: "richardson" o "nivel_fino", orden estimado o None)
+    """
+    area_fina = niveles[-1]['area_estimada_km2']
+    if len(niveles) < 3:
+        return area_fina, "nivel_fino", None
+
+    orden = _orden_estimado(niveles[-3:])
+    if orden is None or not RANGO_ORDEN_RICHARDSON[0] <= orden <= RANGO_ORDEN_RICHARDSON[1]:
+        return area_fina, "nivel_fino", orden
+    if len(niveles) > 3:
+        orden_anterior = _orden_estimado(niveles[-4:-1])
+        if orden_anterior is None or abs(orden - orden_anterior) > TOLERANCIA_ORDEN_RICHARDSON:
+            return area_fina, "nivel_fino", orden
+
+    factor = (niveles[-1]['resolucion'] / niveles[-2]['resolucion']) ** orden
+    area_gruesa = niveles[-2]['area_estimada_km2']
+    return (factor * area_fina - area_gruesa) / (factor - 1), "richardson", orden
+
+
+def estimacion_reticula(pais_proyectado, bbox, motor, indice=None, resoluciones=RESOLUCIONES_RETICULA,
+                        cancelacion=None):
+    """
+    Estima el área contando centros de celda a varias resoluciones y
+    extrapola hacia el límite h -> 0.
+
+    Suponiendo A(h) = A + C·h^p, dos niveles con h y h/r dan
+        A ≈ (r^p · A(h/r) - A(h)) / (r^p - 1)
+    El error lo domina el borde del polígono, que no decrece como h^2 (se
+    comporta como h o h^(2-D) según su dimensión fractal D), así que p se
+    estima con los niveles (ver _extrapolar); si la estimación es
+    inestable se usa el nivel más fino. El resultado indica cuál se usó, y
+    el nivel más fino se reporta siempre.
+
+    El token 'cancelacion' (ver cancelacion.py) se revisa entre lotes de filas.
+
+    Returns:
+        dict con los niveles, la estimación extrapolada y los tiempos
+    """
+    if indice is None:
+        indice = MOTORES[motor]['construir'](pais_proyectado.geometry.iloc[0])
+
+    min_x, min_y, max_x, max_y = bbox
+    area_bbox = (max_x - min_x) * (max_y - min_y)
+
+    start_time = time.time()
+
+    niveles = []
+    for resolucion in sorted(resoluciones):
+        inicio_nivel = time.time()
+        xs, ys, dentro, area_celda = _contar_reticula(indice, motor, bbox, resolucion, cancelacion)
+        puntos_dentro = int(np.count_nonzero(dentro))
+
+        niveles.append({
+            'resolucion': resolucion,
+            'n_puntos': resolucion * resolucion,
+            'puntos_dentro': puntos_dentro,
+            'area_estimada_km2': puntos_dentro * area_celda / 1_000_000,
+            'tiempo': time.time() - inicio_nivel
+        })
+
+        # La retícula más gruesa sirve para la visualización
+        if len(niveles) == 1:
+            x = np.tile(xs, resolucion)
+            y = np.repeat(ys, resolucion)
+            limite = None if MAX_PUNTOS_VIZ == float('inf') else int(MAX_PUNTOS_VIZ)
+            viz = {
+                'puntos_dentro_x': x[dentro][:limite].tolist(),
+                'puntos_dentro_y': y[dentro][:limite].tolist(),
+                'puntos_fuera_x': x[~dentro][:limite].tolist(),
+                'puntos_fuera_y': y[~dentro][:limite].tolist()
+            }
+
+    tiempo_simulacion = time.time() - start_time
+
+    area_fina = niveles[-1]['area_estimada_km2']
+    area_estimada, extrapolacion, orden = _extrapolar(niveles)
+
+    return {
+        'metodo': 'reticula',
+        'motor': motor,
+        'niveles': niveles,
+        'n_puntos': sum(nivel['n_puntos'] for nivel in niveles),
+        'area_bbox_m2': area_bbox,
+        'area_nivel_fino_km2': area_fina,
+        'area_estimada_km2': area_estimada,
+        'extrapolacion': extrapolacion,
+        'orden_richardson': orden,
+        'tiempo_simulacion': tiempo_simulacion,
+        'bbox': bbox,
+        **viz
+    }
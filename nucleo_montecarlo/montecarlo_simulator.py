@@ -0,0 +1,224 @@
+"""
+============================================================================
+SIMULADOR DE MONTE CARLO
+Funciones para ejecutar la simulación de Monte Carlo
+============================================================================
+"""
+
+import numpy as np
+import shapely
+import time
+from .config import MAX_PUNTOS_VIZ, MOTOR_POR_DEFECTO, MUESTREADOR_POR_DEFECTO, PRECISION_POR_DEFECTO, TAMANO_LOTE
+from .point_classifier import MOTORES, clasificar_puntos, obtener_indice
+from .point_sampler import MUESTREADORES, obtener_dominio
+from .precision_muestreo import PRECISIONES, poligono_local
+from .control_variate import estimar_con_control
+from .cancelacion import verificar_cancelacion
+
+
+def _limite_viz(limite):
+    """Convierte el límite de visualización en un índice válido para slicing."""
+    return None if limite == float('inf') else int(limite)
+
+
+def validar_precision(precision, muestreador):
+    """
+    Raises:
+        ValueError: si la precisión no existe o el muestreador no la admite
+    """
+    if precision not in PRECISIONES:
+        raise ValueError(f"Precisión desconocida: {precision}")
+    if precision not in MUESTREADORES[muestreador]['precisiones']:
+        raise ValueError(f"El muestreador {muestreador} no admite la precisión {precision}")
+
+
+def estimar_area(area_dominio, puntos_dentro, n_puntos):
+    """
+    Estimador de Monte Carlo y su error estándar binomial.
+    
+    Returns:
+        tupla (area_estimada_m2, error_estandar_km2)
+    """
+    # Fórmula: Área_Estimada = Área_Dominio × (puntos_dentro / total_puntos)
+    # (el dominio es el bbox o la unión de celdas que cubre al país)
+    proporcion = puntos_dentro / n_puntos
+    area_estimada_m2 = area_dominio * proporcion
+    
+    # Error estándar del estimador binomial: Área_Dominio × sqrt(p(1-p)/N)
+    error_estandar_km2 = area_dominio * np.sqrt(proporcion * (1 - proporcion) / n_puntos) / 1_000_000
+    return area_estimada_m2, float(error_estandar_km2)
+
+
+def simulacion_montecarlo(pais_proyectado, bbox, n_puntos, motor=MOTOR_POR_DEFECTO, indice=None,
+                          muestreador=MUESTREADOR_POR_DEFECTO, dominio=None, control=None,
+                          semilla=None, estado_rng=None, max_puntos_viz=MAX_PUNTOS_VIZ, cancelacion=None,
+                          precision=PRECISION_POR_DEFECTO, acumular=None):
+    """
+    Ejecuta la simulación de Monte Carlo para estimar el área.
+    
+    Args:
+        pais_proyectado: GeoDataFrame con el polígono proyectado
+        bbox: tupla (min_x, min_y, max_x, max_y)
+        n_puntos: cantidad de puntos pseudoaleatorios a generar
+        motor: nombre del clasificador de puntos (ver point_classifier.MOTORES)
+        indice: índice precalculado del motor (sobre el polígono local si la
+            precisión es compacta); si es None se construye aquí
+        muestreador: dominio de muestreo (ver point_sampler.MUESTREADORES)
+        dominio: dominio precalculado del muestreador; si es None se construye aquí
+        control: forma de control (ver control_variate.construir_control); si se
+            indica, cada punto se clasifica también contra ella y se agrega la
+            estimación con variable de control
+        semilla: semilla del generador; si es None se elige una al azar
+        estado_rng: estado del generador de una corrida anterior; si se
+            indica, la muestra continúa esa secuencia (refinamiento incremental)
+        max_puntos_viz: máximo de puntos guardados para visualización
+        cancelacion: token de cancelación (ver cancelacion.crear_cancelacion),
+            revisado antes de cada lote
+        precision: "float64", "float32" o "entera" (ver precision_muestreo);
+            las compactas reducen la memoria de cada lote a la mitad o a un
+            cuarto sin cambiar la estimación a escala de país
+        acumular: función llamada con (x, y, dentro) de cada lote, en
+            coordenadas absolutas; permite agregar la muestra completa (p. ej.
+            conteos por celda) sin retener sus puntos más allá de max_puntos_viz
+    
+    Raises:
+        SimulacionCancelada: si el token se cancela o vence su plazo
+        ValueError: si el muestreador no admite la precisión
+    
+    Returns:
+        dict con resultados de la simulación
+    """
+    min_x, min_y, max_x, max_y = bbox
+    
+    ancho = max_x - min_x
+    alto = max_y - min_y
+    area_bbox = ancho * alto
+    
+    validar_precision(precision, muestreador)
+    formato = PRECISIONES[precision]
+    
+    poligono_pais = pais_proyectado.geometry.iloc[0]
+    if indice is None:
+        indice = MOTORES[motor]['construir'](poligono_local(poligono_pais, bbox) if formato['local'] else poligono_pais)
+    if dominio is None:
+        dominio = MUESTREADORES[muestreador]['construir'](poligono_pais, bbox)
+    
+    area_dominio = dominio['area_m2']
+    muestrear = MUESTREADORES[muestreador]['muestrear']
+    # Las muestras compactas vuelven a coordenadas absolutas solo para el
+    # control, para 'acumular' y para los puntos que se guardan para visualizar
+    coordenadas = formato['coordenadas']
+    escala = formato['escala'](dominio) if formato['escala'] else None
+    opciones_muestreo = {'precision': precision} if precision != "float64" else {}
+    
+    # Generador propio: su estado se devuelve para poder extender la corrida
+    if semilla is None:
+        semilla = int(np.random.SeedSequence().entropy % 2**63)
+    rng = np.random.default_rng(semilla)
+    if estado_rng is not None:
+        rng.bit_generator.state = estado_rng
+    
+    start_time = time.time()
+    
+    puntos_dentro = 0
+    puntos_control = 0
+    puntos_ambos = 0
+    puntos_dentro_x = []
+    puntos_dentro_y = []
+    puntos_fuera_x = []
+    puntos_fuera_y = []
+    
+    max_puntos_viz = min(max_puntos_viz, n_puntos)
+    max_dentro = _limite_viz(max_puntos_viz)
+    max_fuera = _limite_viz(max_puntos_viz // 2)
+    
+    # Procesar por lotes para acotar la memoria de los arreglos de puntos
+    for inicio in range(0, n_puntos, TAMANO_LOTE):
+        n_lote = min(TAMANO_LOTE, n_puntos - inicio)
+        verificar_cancelacion(cancelacion, inicio)
+        
+        # Generar puntos aleatorios con distribución uniforme en el dominio
+        x_rand, y_rand = muestrear(dominio, n_lote, rng, **opciones_muestreo)
+        
+        dentro = clasificar_puntos(motor, indice, x_rand, y_rand, cancelacion, inicio, escala)
+        puntos_dentro += int(np.count_nonzero(dentro))
+        
+        if control is not None:
+            en_control = shapely.contains_xy(control['geometria'], *coordenadas(x_rand, y_rand, dominio))
+            puntos_control += int(np.count_nonzero(en_control))
+            puntos_ambos += int(np.count_nonzero(dentro & en_control))
+        
+        if acumular is not None:
+            acumular(*coordenadas(x_rand, y_rand, dominio), dentro)
+        
+        if max_dentro is None or len(puntos_dentro_x) < max_dentro:
+            faltan = None if max_dentro is None else max_dentro - len(puntos_dentro_x)
+            x_viz, y_viz = coordenadas(x_rand[dentro][:faltan], y_rand[dentro][:faltan], dominio)
+            puntos_dentro_x.extend(x_viz.tolist())
+            puntos_dentro_y.extend(y_viz.tolist())
+        
+        if max_fuera is None or len(puntos_fuera_x) < max_fuera:
+            faltan = None if max_fuera is None else max_fuera - len(puntos_fuera_x)
+            x_viz, y_viz = coordenadas(x_rand[~dentro][:faltan], y_rand[~dentro][:faltan], dominio)
+            puntos_fuera_x.extend(x_viz.tolist())
+            puntos_fuera_y.extend(y_viz.tolist())
+    
+    end_time = time.time()
+    tiempo_simulacion = end_time - start_time
+    
+    # Calcular área estimada con Monte Carlo
+    area_estimada_m2, error_estandar_km2 = estimar_area(area_dominio, puntos_dentro, n_puntos)
+    area_estimada_km2 = area_estimada_m2 / 1_000_000
+    
+    resultados = {
+        'n_puntos': n_puntos,
+        'puntos_dentro': puntos_dentro,
+        'puntos_fuera': n_puntos - puntos_dentro,
+        'area_bbox_m2': area_bbox,
+        'area_dominio_m2': area_dominio,
+        'area_estimada_m2': area_estimada_m2,
+        'area_estimada_km2': area_estimada_km2,
+        'error_estandar_km2': error_estandar_km2,
+        'tiempo_simulacion': tiempo_simulacion,
+        'motor': motor,
+        'muestreador': muestreador,
+        'precision': precision,
+        'puntos_dentro_x': puntos_dentro_x,
+        'puntos_dentro_y': puntos_dentro_y,
+        'puntos_fuera_x': puntos_fuera_x,
+        'puntos_fuera_y': puntos_fuera_y,
+        'bbox': bbox,
+        'semilla': semilla,
+        'estado_rng': rng.bit_generator.state
+    }
+    
+    if control is not None:
+        resultados['puntos_control'] = puntos_control
+        resultados['puntos_ambos'] = puntos_ambos
+        resultados['variable_control'] = estimar_con_control(
+            n_puntos, puntos_dentro, puntos_control, puntos_ambos, control, area_dominio
+        )
+    
+    return resultados
+
+
+def simular_geometria(geo_info, n_puntos, motor=MOTOR_POR_DEFECTO, muestreador=MUESTREADOR_POR_DEFECTO,
+                      precision=PRECISION_POR_DEFECTO, **opciones):
+    """
+    simulacion_montecarlo sobre una entrada del registro de geometrías (ver
+    catalogo.geometria_pais): el índice del motor y el dominio de muestreo
+    se construyen la primera vez y se reutilizan en las siguientes corridas.
+    Las demás opciones (control, semilla, cancelacion...) se pasan tal cual.
+    """
+    validar_precision(precision, muestreador)
+    return simulacion_montecarlo(
+        geo_info['pais_proyectado'],
+        geo_info['bbox'],
+        n_puntos,
+        motor=motor,
+        indice=obtener_indice(geo_info, motor, local=PRECISIONES[precision]['local']),
+        muestreador=muestreador,
+        dominio=obtener_dominio(geo_info, muestreador),
+        precision=precision,
+        **opciones
+    )
@@ -0,0 +1,293 @@
+"""
+============================================================================
+NIVELES DE DETALLE
+Catálogos por nivel de detalle de la geometría y tabla de vértices, área
+exacta y costo de clasificación de cada país en cada nivel
+============================================================================
+
+El dataset 110m omite islas y simplifica costas (Chile pierde fiordos y
+archipiélagos): la estimación de Monte Carlo converge al área de ese
+polígono, no a la del país. Los niveles 50m y 10m la acercan al área real a
+cambio de más vértices, es decir, índices más caros de construir y menos
+puntos clasificados por segundo; los derivados simplificados (10m_1km,
+10m_5km) conservan las islas con menos vértices. La tabla permite elegir
+el nivel sabiendo cuánto cuesta cada uno.
+
+Para generar la tabla (los niveles sin datos locales se descargan):
+
+    python -m nucleo_montecarlo.niveles_detalle --niveles 110m 50m 10m 10m_1km
+
+Para verificar que todas las geometrías proyectadas son válidas y que su
+área coincide con la geodésica (termina con código 1 si alguna falla):
+
+    python -m nucleo_montecarlo.niveles_detalle --verificar
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import shapely
+
+from .config import (NIVELES_DETALLE, NIVEL_DETALLE_POR_DEFECTO, PAISES_SUDAMERICA, AREAS_REALES_KM2,
+                     TABLA_NIVELES_PATH, PUNTOS_MEDICION_NIVELES, TOLERANCIA_AREA_GEODESICA)
+from .data_loader import cargar_datos, buscar_pais, ruta_cache, archivo_local
+from .catalogo import crear_catalogo, geometria_pais
+from .point_classifier import MOTORES, clasificar_puntos
+from .point_sampler import muestrear_bbox
+
+# Datasets por escala y catálogos por nivel, cargados la primera vez que se piden
+_mundos = {}
+_catalogos = {}
+_lock = threading.Lock()
+
+
+def datos_locales(nivel):
+    """Si la escala del nivel ya está en disco (caché o archivo de Natural Earth)."""
+    escala = NIVELES_DETALLE[nivel]['escala']
+    return escala in _mundos or os.path.exists(ruta_cache(escala)) or archivo_local(escala) is not None
+
+
+def obtener_catalogo(nivel=NIVEL_DETALLE_POR_DEFECTO):
+    """
+    Catálogo de países de un nivel de detalle. La escala se carga una sola
+    vez por proceso y la comparten sus niveles derivados.
+
+    Raises:
+        ValueError: si el nivel no existe
+
+    Returns:
+        catálogo (ver catalogo.crear_catalogo), o None si los datos de la
+        escala no están disponibles
+    """
+    if nivel not in NIVELES_DETALLE:
+        raise ValueError(f"Nivel de detalle desconocido: {nivel}")
+
+    with _lock:
+        if nivel not in _catalogos:
+            escala = NIVELES_DETALLE[nivel]['escala']
+            if escala not in _mundos:
+                mundo = cargar_datos(escala)
+                if mundo is None:
+                    return None
+                _mundos[escala] = mundo
+            _catalogos[nivel] = crear_catalogo(_mundos[escala], nivel)
+        return _catalogos[nivel]
+
+
+def registrar_catalogo(catalogo):
+    """Reutiliza un catálogo ya creado por el programa (el del nivel por defecto)."""
+    with _lock:
+        _mundos.setdefault(NIVELES_DETALLE[catalogo['nivel']]['escala'], catalogo['mundo'])
+        _catalogos.setdefault(catalogo['nivel'], catalogo)
+
+
+def medir_nivel(geo_info, motor="vectorizado", n_puntos=PUNTOS_MEDICION_NIVELES, repeticiones=3):
+    """
+    Vértices, área exacta del polígono proyectado y costo de clasificación
+    de un país en un nivel: tiempo de construir el índice del motor y
+    nanosegundos por punto clasificado (el mejor de 'repeticiones', con
+    puntos uniformes en el bbox).
+    """
+    poligono = geo_info['pais_proyectado'].geometry.iloc[0]
+
+    inicio = time.perf_counter()
+    indice = MOTORES[motor]['construir'](poligono)
+    construccion = time.perf_counter() - inicio
+
+    rng = np.random.default_rng(0)
+    x, y = muestrear_bbox({'bbox': geo_info['bbox']}, n_puntos, rng)
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        clasificar_puntos(motor, indice, x, y)
+        mejor = min(mejor, time.perf_counter() - inicio)
+
+    return {
+        'vertices': geo_info['vertices'],
+        'area_exacta_km2': geo_info['area_exacta_km2'],
+        'area_geodesica_km2': geo_info['area_geodesica_km2'],
+        'construccion_indice_ms': round(construccion * 1000, 2),
+        'ns_por_punto': round(mejor / n_puntos * 1e9, 1),
+        'puntos_por_segundo': int(n_puntos / mejor)
+    }
+
+
+def calcular_tabla(niveles=None, paises=None, motor="vectorizado", n_puntos=PUNTOS_MEDICION_NIVELES):
+    """
+    Mide cada país en cada nivel (ver medir_nivel). Los niveles cuyos datos
+    no se pueden cargar se informan en 'niveles_omitidos'.
+
+    Args:
+        niveles: nombres de NIVELES_DETALLE (None = todos)
+        paises: nombres o códigos ISO (None = Sudamérica)
+
+    Returns:
+        dict con los parámetros de la medición y una fila por país y nivel
+    """
+    niveles = list(NIVELES_DETALLE) if niveles is None else niveles
+    paises = PAISES_SUDAMERICA if paises is None else paises
+
+    filas = []
+    omitidos = []
+    for nivel in niveles:
+        catalogo = obtener_catalogo(nivel)
+        if catalogo is None:
+            omitidos.append(nivel)
+            continue
+        for consulta in paises:
+            nombre = buscar_pais(catalogo, consulta)
+            if nombre is None:
+                continue
+            _, geo_info = geometria_pais(catalogo, nombre)
+            medicion = medir_nivel(geo_info, motor, n_puntos)
+            area_real = AREAS_REALES_KM2.get(nombre)
+            filas.append({
+                'pais': nombre,
+                'nivel': nivel,
+                **medicion,
+                'diferencia_area_real_porcentaje': (
+                    round((medicion['area_exacta_km2'] - area_real) / area_real * 100, 3) if area_real else None
+                )
+            })
+
+    return {
+        'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'motor': motor,
+        'n_puntos': n_puntos,
+        'niveles_omitidos': omitidos,
+        'filas': filas
+    }
+
+
+def asegurar_tabla(ruta=TABLA_NIVELES_PATH):
+    """
+    Devuelve la tabla guardada o, si falta o no incluye todos los niveles
+    con datos locales, la genera con esos niveles y la guarda. No descarga
+    escalas: los niveles sin datos locales quedan fuera hasta que se pidan.
+
+    Los tiempos dependen del equipo, por eso la tabla se genera donde corre
+    el servidor en vez de versionarse.
+    """
+    locales = [nivel for nivel in NIVELES_DETALLE if datos_locales(nivel)]
+    tabla = cargar_tabla(ruta)
+    medidos = {fila['nivel'] for fila in tabla['filas']} if tabla is not None else set()
+    if tabla is not None and set(locales) <= medidos:
+        return tabla
+
+    tabla = calcular_tabla(locales)
+    guardar_tabla(tabla, ruta)
+    return tabla
+
+
+def verificar_geometria(geo_info, tolerancia=TOLERANCIA_AREA_GEODESICA):
+    """
+    Problemas de la geometría proyectada de un país: que no sea válida o
+    que su área difiera de la geodésica en más de 'tolerancia' (relativa).
+    La proyección es de igual área, así que una diferencia mayor indica
+    partes perdidas o superpuestas al proyectar o reparar el polígono.
+
+    Returns:
+        lista de descripciones (vacía si no hay problemas)
+    """
+    problemas = []
+    geometria = geo_info['pais_proyectado'].geometry.iloc[0]
+    if not geometria.is_valid:
+        problemas.append(f"geometría inválida ({shapely.is_valid_reason(geometria)})")
+
+    exacta, geodesica = geo_info['area_exacta_km2'], geo_info['area_geodesica_km2']
+    diferencia = abs(exacta - geodesica) / geodesica if geodesica > 0 else float('inf')
+    if diferencia > tolerancia:
+        problemas.append(f"área proyectada {exacta:,.1f} km² vs geodésica {geodesica:,.1f} km² "
+                         f"({diferencia:.2%}, máximo {tolerancia:.2%})")
+    return problemas
+
+
+def verificar_geometrias(niveles=None, paises=None, tolerancia=TOLERANCIA_AREA_GEODESICA):
+    """
+    Aplica verificar_geometria a cada país en cada nivel. Un país cuya
+    proyección lanza ValueError (no se pudo reparar) también se informa.
+
+    Args:
+        niveles: nombres de NIVELES_DETALLE (None = los que tienen datos locales)
+        paises: nombres o códigos ISO (None = todos los del catálogo)
+
+    Returns:
+        dict (nivel, país) -> lista de problemas, solo con los que fallan
+    """
+    niveles = [nivel for nivel in NIVELES_DETALLE if datos_locales(nivel)] if niveles is None else niveles
+
+    fallas = {}
+    for nivel in niveles:
+        catalogo = obtener_catalogo(nivel)
+        if catalogo is None:
+            fallas[(nivel, None)] = ["datos no disponibles"]
+            continue
+        nombres = list(catalogo['paises']) if paises is None else [buscar_pais(catalogo, p) or p for p in paises]
+        for nombre in nombres:
+            try:
+                problemas = verificar_geometria(geometria_pais(catalogo, nombre)[1], tolerancia)
+            except (ValueError, KeyError) as e:
+                problemas = [str(e)]
+            if problemas:
+                fallas[(nivel, nombre)] = problemas
+    return fallas
+
+
+def guardar_tabla(tabla, ruta=TABLA_NIVELES_PATH):
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(tabla, archivo, indent=2, ensure_ascii=False)
+        archivo.write("\n")
+
+
+def cargar_tabla(ruta=TABLA_NIVELES_PATH):
+    """Tabla precalculada, o None si todavía no se generó."""
+    try:
+        with open(ruta, encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except FileNotFoundError:
+        return None
+
+
+def _imprimir_tabla(tabla):
+    print(f"\n{'país':12s} {'nivel':9s} {'vértices':>9s} {'área exacta km²':>17s} {'dif. real':>10s} "
+          f"{'índice ms':>10s} {'ns/punto':>9s} {'puntos/s':>12s}")
+    for fila in tabla['filas']:
+        diferencia = fila['diferencia_area_real_porcentaje']
+        texto_diferencia = f"{diferencia:+.2f}%" if diferencia is not None else "-"
+        print(f"{fila['pais']:12s} {fila['nivel']:9s} {fila['vertices']:>9,} {fila['area_exacta_km2']:>17,.1f} "
+              f"{texto_diferencia:>10s} {fila['construccion_indice_ms']:>10} {fila['ns_por_punto']:>9} "
+              f"{fila['puntos_por_segundo']:>12,}")
+    if tabla['niveles_omitidos']:
+        print(f"\nNiveles sin datos disponibles: {', '.join(tabla['niveles_omitidos'])}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tabla de vértices, área exacta y costo por nivel de detalle")
+    parser.add_argument('--niveles', nargs='+', choices=list(NIVELES_DETALLE), default=None,
+                        help="niveles a medir (por defecto, todos)")
+    parser.add_argument('--paises', nargs='+', default=None, help="países (por defecto, Sudamérica)")
+    parser.add_argument('--motor', choices=list(MOTORES), default="vectorizado")
+    parser.add_argument('-n', '--n-puntos', type=int, default=PUNTOS_MEDICION_NIVELES)
+    parser.add_argument('-o', '--salida', default=TABLA_NIVELES_PATH)
+    parser.add_argument('--verificar', action='store_true',
+                        help="solo verificar validez y área geodésica (por defecto, todos los países "
+                             "de los niveles con datos locales)")
+    argumentos = parser.parse_args()
+
+    if argumentos.verificar:
+        fallas = verificar_geometrias(argumentos.niveles, argumentos.paises)
+        for (nivel, nombre), problemas in fallas.items():
+            print(f"{nivel:9s} {nombre or '-':30s} {'; '.join(problemas)}")
+        print(f"\n{len(fallas)} geometrías con problemas" if fallas else "Todas las geometrías son válidas")
+        sys.exit(1 if fallas else 0)
+
+    tabla = calcular_tabla(argumentos.niveles, argumentos.paises, argumentos.motor, argumentos.n_puntos)
+    guardar_tabla(tabla, argumentos.salida)
+    _imprimir_tabla(tabla)
+    print(f"\nTabla guardada en {argumentos.salida}")
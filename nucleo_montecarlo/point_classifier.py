@@ -0,0 +1,172 @@
+"""
+============================================================================
+CLASIFICADORES DE PUNTOS
+Motores intercambiables para decidir si un punto cae dentro del país
+============================================================================
+"""
+
+import numpy as np
+import shapely
+from shapely.geometry import Point
+
+from .config import TOLERANCIA_SIMPLIFICACION_M, SUBLOTE_COMPACTO
+from .slab_index import construir_indice_slabs, clasificar_puntos_slabs
+from .precision_muestreo import poligono_local, escalar_reticula
+from .cancelacion import verificar_cancelacion
+
+
+def _construir_shapely(poligono):
+    return poligono
+
+
+def _clasificar_shapely(poligono, x, y):
+    """Clasificación punto por punto con Point + contains (motor original)."""
+    return np.fromiter(
+        (poligono.contains(Point(px, py)) for px, py in zip(x, y)),
+        dtype=bool,
+        count=len(x)
+    )
+
+
+def _copia_preparada(geometria):
+    """Copia preparada propia del motor, independiente de la geometría cacheada."""
+    copia = shapely.from_wkb(shapely.to_wkb(geometria))
+    shapely.prepare(copia)
+    return copia
+
+
+def _construir_vectorizado(poligono):
+    return _copia_preparada(poligono)
+
+
+def _clasificar_vectorizado(poligono, x, y):
+    """Un solo llamado a GEOS sobre el polígono preparado (índice de aristas interno)."""
+    return shapely.contains_xy(poligono, x, y)
+
+
+def _construir_dos_niveles(poligono):
+    """
+    Prepara el polígono simplificado y la banda alrededor del borde real.
+
+    Douglas-Peucker desplaza el borde como mucho la tolerancia, así que fuera
+    de una banda algo más ancha que ella el polígono simplificado y el exacto
+    coinciden. El margen extra cubre la aproximación de los arcos del buffer.
+    """
+    simplificado = poligono.simplify(TOLERANCIA_SIMPLIFICACION_M, preserve_topology=True)
+    banda = poligono.boundary.buffer(1.25 * TOLERANCIA_SIMPLIFICACION_M, quad_segs=2)
+
+    return {
+        'exacto': _copia_preparada(poligono),
+        'simplificado': _copia_preparada(simplificado),
+        'banda': _copia_preparada(banda)
+    }
+
+
+def _clasificar_dos_niveles(indice, x, y):
+    """Usa el polígono simplificado y solo consulta el exacto cerca del borde."""
+    cerca_borde = shapely.contains_xy(indice['banda'], x, y)
+
+    dentro = np.empty(len(x), dtype=bool)
+    dentro[~cerca_borde] = shapely.contains_xy(indice['simplificado'], x[~cerca_borde], y[~cerca_borde])
+    dentro[cerca_borde] = shapely.contains_xy(indice['exacto'], x[cerca_borde], y[cerca_borde])
+    return dentro
+
+
+# Registro de motores: cada uno construye un índice a partir del polígono
+# proyectado y clasifica lotes de coordenadas con ese índice. 'sublote'
+# (opcional) parte cada lote para revisar la cancelación más seguido.
+MOTORES = {
+    'shapely': {
+        'construir': _construir_shapely,
+        'clasificar': _clasificar_shapely,
+        'descripcion': 'Point + contains, un punto a la vez',
+        # Lento: un lote completo tarda segundos, así que se clasifica por
+        # partes para poder cancelarlo entre ellas
+        'sublote': 50_000
+    },
+    'vectorizado': {
+        'construir': _construir_vectorizado,
+        'clasificar': _clasificar_vectorizado,
+        'descripcion': 'shapely.contains_xy sobre el polígono preparado, por lotes'
+    },
+    'slab': {
+        'construir': construir_indice_slabs,
+        'clasificar': clasificar_puntos_slabs,
+        'descripcion': 'Índice de franjas con búsqueda binaria por lotes'
+    },
+    'dos_niveles': {
+        'construir': _construir_dos_niveles,
+        'clasificar': _clasificar_dos_niveles,
+        'descripcion': 'Polígono simplificado; geometría exacta solo cerca del borde'
+    }
+}
+
+
+def registrar_motor(nombre, construir, clasificar, descripcion, sublote=None):
+    """
+    Agrega un motor al registro: construir(poligono) -> índice y
+    clasificar(indice, x, y) -> arreglo booleano. Queda disponible para la
+    API, los programas de consola y el estimador de retícula.
+    """
+    MOTORES[nombre] = {
+        'construir': construir,
+        'clasificar': clasificar,
+        'descripcion': descripcion
+    }
+    if sublote is not None:
+        MOTORES[nombre]['sublote'] = sublote
+
+
+def obtener_indice(geo_info, motor, local=False):
+    """
+    Devuelve el índice del motor para una geometría, construyéndolo una sola vez.
+
+    El índice se guarda dentro de geo_info['indices'], de modo que queda
+    cacheado junto con la geometría proyectada. Con local=True se construye
+    sobre el polígono trasladado al origen del bbox, para clasificar
+    muestras compactas (ver precision_muestreo).
+    """
+    if motor not in MOTORES:
+        raise ValueError(f"Motor de clasificación desconocido: {motor}")
+
+    indices = geo_info.setdefault('indices', {})
+    clave = (motor, 'local') if local else motor
+    if clave not in indices:
+        poligono = geo_info['pais_proyectado'].geometry.iloc[0]
+        if local:
+            poligono = poligono_local(poligono, geo_info['bbox'])
+        indices[clave] = MOTORES[motor]['construir'](poligono)
+
+    return indices[clave]
+
+
+def clasificar_puntos(motor, indice, x, y, cancelacion=None, puntos_procesados=0, escala=None):
+    """
+    Clasifica arreglos de coordenadas proyectadas con el motor indicado.
+
+    Con un token de cancelación, los motores con 'sublote' clasifican por
+    partes y lo revisan entre ellas (puntos_procesados es el conteo previo,
+    para informar cuántos puntos se alcanzaron a calcular).
+
+    Las muestras compactas (no float64) se clasifican siempre de a
+    SUBLOTE_COMPACTO puntos: así la conversión a float64 que hace GEOS y,
+    con escala (el paso de la retícula, precisión "entera"), el paso de
+    índices a desplazamientos nunca materializan el lote completo.
+    """
+    sublote = MOTORES[motor].get('sublote') if cancelacion is not None else None
+    if x.dtype != np.float64:
+        sublote = min(sublote or SUBLOTE_COMPACTO, SUBLOTE_COMPACTO)
+
+    if sublote is None or len(x) <= sublote:
+        if escala is not None:
+            x, y = escalar_reticula(x, y, escala)
+        return MOTORES[motor]['clasificar'](indice, x, y)
+
+    dentro = np.empty(len(x), dtype=bool)
+    for inicio in range(0, len(x), sublote):
+        verificar_cancelacion(cancelacion, puntos_procesados + inicio)
+        x_parte, y_parte = x[inicio:inicio + sublote], y[inicio:inicio + sublote]
+        if escala is not None:
+            x_parte, y_parte = escalar_reticula(x_parte, y_parte, escala)
+        dentro[inicio:inicio + sublote] = MOTORES[motor]['clasificar'](indice, x_parte, y_parte)
+    return dentro
@@ -0,0 +1,162 @@
+"""
+============================================================================
+MUESTREADORES DE PUNTOS
+Dominios de muestreo para la simulación de Monte Carlo
+============================================================================
+"""
+
+import numpy as np
+import shapely
+
+from .config import CELDAS_COBERTURA
+from .precision_muestreo import PASOS_RETICULA
+from .point_classifier import _copia_preparada
+
+
+def construir_dominio_bbox(poligono, bbox):
+    """Dominio original: todo el bounding box alineado a los ejes."""
+    min_x, min_y, max_x, max_y = bbox
+    return {
+        'bbox': bbox,
+        'area_m2': (max_x - min_x) * (max_y - min_y)
+    }
+
+
+def muestrear_bbox(dominio, n, rng=None, precision="float64"):
+    """
+    Puntos uniformes dentro del bounding box: coordenadas absolutas o, con
+    precisión compacta, locales al origen del bbox (ver precision_muestreo).
+    """
+    rng = rng or np.random.default_rng()
+    min_x, min_y, max_x, max_y = dominio['bbox']
+    if precision == "float32":
+        x = rng.random(n, dtype=np.float32) * np.float32(max_x - min_x)
+        y = rng.random(n, dtype=np.float32) * np.float32(max_y - min_y)
+    elif precision == "entera":
+        x = rng.integers(0, PASOS_RETICULA, n, dtype=np.uint16)
+        y = rng.integers(0, PASOS_RETICULA, n, dtype=np.uint16)
+    else:
+        x = rng.uniform(min_x, max_x, n)
+        y = rng.uniform(min_y, max_y, n)
+    return x, y
+
+
+def construir_dominio_celdas(poligono, bbox, n_celdas=CELDAS_COBERTURA):
+    """
+    Divide el bounding box en una grilla de n_celdas x n_celdas y conserva
+    solo las celdas que tocan el polígono. Su unión cubre al país completo,
+    así que muestrear en ella no introduce sesgo.
+    """
+    min_x, min_y, max_x, max_y = bbox
+    ancho_celda = (max_x - min_x) / n_celdas
+    alto_celda = (max_y - min_y) / n_celdas
+
+    i, j = np.meshgrid(np.arange(n_celdas), np.arange(n_celdas), indexing='ij')
+    x0 = min_x + i.ravel() * ancho_celda
+    y0 = min_y + j.ravel() * alto_celda
+
+    celdas = shapely.box(x0, y0, x0 + ancho_celda, y0 + alto_celda)
+    # El polígono es el de la caché y otros hilos lo leen: se prepara una copia
+    cubre = shapely.intersects(_copia_preparada(poligono), celdas)
+
+    return {
+        'bbox': bbox,
+        'x0': x0[cubre],
+        'y0': y0[cubre],
+        'columna': i.ravel()[cubre].astype(np.uint16),
+        'fila': j.ravel()[cubre].astype(np.uint16),
+        'celdas_por_eje': n_celdas,
+        'ancho_celda': ancho_celda,
+        'alto_celda': alto_celda,
+        'n_celdas': int(cubre.sum()),
+        'area_m2': cubre.sum() * ancho_celda * alto_celda
+    }
+
+
+def muestrear_celdas(dominio, n, rng=None, precision="float64"):
+    """
+    Puntos uniformes sobre la unión de celdas de cobertura. Todas las celdas
+    tienen la misma área, así que elegirlas con probabilidad uniforme equivale
+    a muestrear proporcionalmente al área.
+
+    Con precisión "entera" cada celda contiene un bloque de la misma
+    retícula que usa el muestreador bbox, así que ambos estiman la misma
+    cantidad.
+
+    Raises:
+        ValueError: con precisión "entera", si las celdas por eje no dividen
+            a PASOS_RETICULA
+    """
+    rng = rng or np.random.default_rng()
+    if precision == "float64":
+        celda = rng.integers(0, dominio['n_celdas'], n)
+        x = dominio['x0'][celda] + rng.uniform(0, dominio['ancho_celda'], n)
+        y = dominio['y0'][celda] + rng.uniform(0, dominio['alto_celda'], n)
+        return x, y
+
+    celda = rng.integers(0, dominio['n_celdas'], n, dtype=np.int32)
+    if precision == "entera":
+        if PASOS_RETICULA % dominio['celdas_por_eje']:
+            raise ValueError(f"Las celdas por eje deben dividir a {PASOS_RETICULA} con precisión entera")
+        pasos_celda = PASOS_RETICULA // dominio['celdas_por_eje']
+        x = dominio['columna'][celda] * np.uint16(pasos_celda) + rng.integers(0, pasos_celda, n, dtype=np.uint16)
+        y = dominio['fila'][celda] * np.uint16(pasos_celda) + rng.integers(0, pasos_celda, n, dtype=np.uint16)
+        return x, y
+
+    min_x, min_y = dominio['bbox'][:2]
+    x0 = (dominio['x0'] - min_x).astype(np.float32)
+    y0 = (dominio['y0'] - min_y).astype(np.float32)
+    x = x0[celda] + rng.random(n, dtype=np.float32) * np.float32(dominio['ancho_celda'])
+    y = y0[celda] + rng.random(n, dtype=np.float32) * np.float32(dominio['alto_celda'])
+    return x, y
+
+
+# Registro de muestreadores: cada uno construye su dominio a partir del
+# polígono proyectado y genera puntos uniformes dentro de él con el
+# generador (np.random.Generator) que recibe. 'precisiones' son las
+# precisiones de muestra que admite (ver precision_muestreo.PRECISIONES).
+MUESTREADORES = {
+    'bbox': {
+        'construir': construir_dominio_bbox,
+        'muestrear': muestrear_bbox,
+        'descripcion': 'Uniforme en el bounding box',
+        'precisiones': ('float64', 'float32', 'entera')
+    },
+    'celdas': {
+        'construir': construir_dominio_celdas,
+        'muestrear': muestrear_celdas,
+        'descripcion': 'Uniforme en la unión de celdas de grilla que cubren el país',
+        'precisiones': ('float64', 'float32', 'entera')
+    }
+}
+
+
+def registrar_muestreador(nombre, construir, muestrear, descripcion, precisiones=('float64',)):
+    """
+    Agrega un muestreador al registro: construir(poligono, bbox) -> dominio
+    (con al menos 'area_m2' y 'bbox') y muestrear(dominio, n, rng) -> (x, y).
+    Si declara precisiones compactas, muestrear recibe además precision y
+    devuelve coordenadas locales (ver precision_muestreo).
+    """
+    MUESTREADORES[nombre] = {
+        'construir': construir,
+        'muestrear': muestrear,
+        'descripcion': descripcion,
+        'precisiones': tuple(precisiones)
+    }
+
+
+def obtener_dominio(geo_info, muestreador):
+    """
+    Devuelve el dominio de muestreo de una geometría, construyéndolo una sola
+    vez y guardándolo en geo_info['dominios'].
+    """
+    if muestreador not in MUESTREADORES:
+        raise ValueError(f"Muestreador desconocido: {muestreador}")
+
+    dominios = geo_info.setdefault('dominios', {})
+    if muestreador not in dominios:
+        poligono = geo_info['pais_proyectado'].geometry.iloc[0]
+        dominios[muestreador] = MUESTREADORES[muestreador]['construir'](poligono, geo_info['bbox'])
+
+    return dominios[muestreador]
@@ -0,0 +1,169 @@
+"""
+============================================================================
+PRECISIÓN DE MUESTREO
+Muestras compactas (float32 o retícula entera) para reducir la memoria y
+el ancho de banda de generar y clasificar puntos
+============================================================================
+
+Con precisión "float64" los muestreadores devuelven coordenadas proyectadas
+absolutas: 16 bytes por punto. Las precisiones compactas devuelven
+coordenadas locales, relativas al origen del bbox (min_x, min_y), y los
+motores clasifican contra una copia del polígono trasladada a ese origen
+(ver point_classifier.obtener_indice):
+
+- "float32": desplazamientos float32, 8 bytes por punto.
+- "entera": índices uint16 de una retícula de PASOS_RETICULA x
+  PASOS_RETICULA centros de celda sobre el bbox, 4 bytes por punto. Se
+  escalan a desplazamientos float32 por partes, al clasificar.
+
+Análisis de precisión
+---------------------
+float32: rng.random(dtype=float32) toma 2^24 valores equiespaciados en
+[0, 1), así que cada eje del bbox queda discretizado en pasos de
+ancho / 2^24, y el producto por el ancho redondea a lo sumo medio ulp
+(ancho · 2^-24). Con el lado más largo de un bbox de Sudamérica (~4.300
+km, Brasil y Chile) ambos términos suman menos de 0,6 m por punto. Solo
+puede cambiar de clase un punto a menos de esa distancia del borde: con
+los perímetros de los datos 110m (≤ 17.300 km) esa franja es < 3·10^-6
+del área del bbox en el peor caso, y como el redondeo no tiene dirección
+preferida el efecto neto es mucho menor. El error estándar binomial con
+10^7 puntos es 2-6·10^-4 del área: float32 no cambia la estimación.
+
+"entera": el estimador es insesgado para la fracción de centros de la
+retícula que caen dentro del país, no para el área del polígono; la
+diferencia entre ambas es determinista y sesgo_reticula la calcula exacta
+(por filas, sin clasificar puntos). Con 2^16 pasos por eje es a lo sumo
+3·10^-7 del área en los países de Sudamérica (tabla en el README), tres
+órdenes por debajo del error estándar con 10^7 puntos.
+"""
+
+import numpy as np
+import shapely
+
+from .slab_index import _extraer_aristas
+
+# Centros de retícula por eje con precisión "entera" (índices uint16)
+PASOS_RETICULA = 2 ** 16
+
+
+def coordenadas_float64(x, y, dominio):
+    return x, y
+
+
+def coordenadas_float32(x, y, dominio):
+    """Desplazamientos float32 -> coordenadas proyectadas absolutas."""
+    min_x, min_y = dominio['bbox'][:2]
+    return min_x + x.astype(np.float64), min_y + y.astype(np.float64)
+
+
+def pasos_reticula(dominio):
+    """Lado (hx, hy) de las celdas de la retícula de muestreo entera."""
+    min_x, min_y, max_x, max_y = dominio['bbox']
+    return (max_x - min_x) / PASOS_RETICULA, (max_y - min_y) / PASOS_RETICULA
+
+
+def escalar_reticula(x, y, pasos):
+    """
+    Índices de la retícula -> desplazamientos float32 de los centros de
+    celda (el redondeo del producto es el mismo que el de "float32").
+    """
+    hx, hy = np.float32(pasos[0]), np.float32(pasos[1])
+    return (x + np.float32(0.5)) * hx, (y + np.float32(0.5)) * hy
+
+
+def coordenadas_entera(x, y, dominio):
+    """Índices de la retícula -> coordenadas proyectadas absolutas (float64)."""
+    min_x, min_y = dominio['bbox'][:2]
+    hx, hy = pasos_reticula(dominio)
+    return min_x + (x + 0.5) * hx, min_y + (y + 0.5) * hy
+
+
+# Registro de precisiones: bytes por punto de la muestra, si las
+# coordenadas son locales (relativas al origen del bbox), cómo volver a
+# coordenadas absolutas para la variable de control y la visualización y,
+# si la muestra es de índices, cómo obtener su escala a partir del dominio
+PRECISIONES = {
+    'float64': {
+        'bytes_por_punto': 16,
+        'local': False,
+        'coordenadas': coordenadas_float64,
+        'escala': None,
+        'descripcion': 'Coordenadas absolutas float64'
+    },
+    'float32': {
+        'bytes_por_punto': 8,
+        'local': True,
+        'coordenadas': coordenadas_float32,
+        'escala': None,
+        'descripcion': 'Desplazamientos float32 desde el origen del bbox'
+    },
+    'entera': {
+        'bytes_por_punto': 4,
+        'local': True,
+        'coordenadas': coordenadas_entera,
+        'escala': pasos_reticula,
+        'descripcion': f'Índices uint16 de una retícula de {PASOS_RETICULA} centros por eje'
+    }
+}
+
+
+def poligono_local(poligono, bbox):
+    """Copia del polígono trasladada al origen del bbox (marco de las muestras compactas)."""
+    min_x, min_y = bbox[:2]
+    return shapely.transform(poligono, lambda coords: coords - (min_x, min_y))
+
+
+def sesgo_reticula(poligono, bbox, pasos=PASOS_RETICULA):
+    """
+    Diferencia exacta entre el área que estima la precisión "entera" (centros
+    de la retícula dentro del polígono × área de celda) y el área del polígono.
+
+    Cada fila de centros corta al polígono en intervalos [a, b); los centros
+    de columna dentro de un intervalo se cuentan con aritmética, así que el
+    costo depende de los cruces borde-fila y no de pasos².
+
+    Returns:
+        dict con ambas áreas en m² y la diferencia relativa
+    """
+    min_x, min_y, max_x, max_y = bbox
+    hx = (max_x - min_x) / pasos
+    hy = (max_y - min_y) / pasos
+
+    # Aristas en unidades de celda, relativas al origen del bbox
+    x0, y0, x1, y1 = _extraer_aristas(poligono).T
+    x0, x1 = (x0 - min_x) / hx, (x1 - min_x) / hx
+    y0, y1 = (y0 - min_y) / hy, (y1 - min_y) / hy
+
+    # Filas j cuyo centro j + 0.5 cae en [min(y0, y1), max(y0, y1))
+    inferior = np.minimum(y0, y1)
+    superior = np.maximum(y0, y1)
+    primera = np.ceil(inferior - 0.5).astype(np.int64)
+    ultima = np.ceil(superior - 0.5).astype(np.int64)
+    cantidad = np.maximum(ultima - primera, 0)
+
+    arista = np.repeat(np.arange(len(x0)), cantidad)
+    fila = np.repeat(primera, cantidad) + (np.arange(len(arista)) - np.repeat(np.cumsum(cantidad) - cantidad, cantidad))
+    yc = fila + 0.5
+    cruce = x0[arista] + (yc - y0[arista]) * (x1[arista] - x0[arista]) / (y1[arista] - y0[arista])
+
+    # Centros de columna con k + 0.5 < x: ceil(x - 0.5), acotado a la retícula
+    centros_izquierda = np.clip(np.ceil(cruce - 0.5), 0, pasos)
+
+    # Dentro de cada fila, los cruces ordenados alternan entrada y salida
+    orden = np.lexsort((cruce, fila))
+    fila = fila[orden]
+    centros_izquierda = centros_izquierda[orden]
+    inicio_fila = np.searchsorted(fila, fila, side='left')
+    signo = np.where((np.arange(len(fila)) - inicio_fila) % 2 == 1, 1, -1)
+
+    centros_dentro = int(np.sum(signo * centros_izquierda))
+    area_reticula = centros_dentro * hx * hy
+    area_exacta = float(poligono.area)
+
+    return {
+        'pasos': pasos,
+        'centros_dentro': centros_dentro,
+        'area_reticula_m2': area_reticula,
+        'area_exacta_m2': area_exacta,
+        'sesgo_relativo': (area_reticula - area_exacta) / area_exacta
+    }
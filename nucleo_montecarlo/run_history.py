@@ -0,0 +1,269 @@
+"""
+============================================================================
+HISTORIAL DE CORRIDAS
+Registro persistente (SQLite) de simulaciones y consultas agregadas
+============================================================================
+"""
+
+import json
+import os
+import platform
+import socket
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timezone
+
+import numpy as np
+
+from .config import HISTORIAL_DB_PATH
+
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS corridas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fecha TEXT NOT NULL,
+    origen TEXT NOT NULL,
+    pais TEXT NOT NULL,
+    metodo TEXT NOT NULL,
+    motor TEXT,
+    muestreador TEXT,
+    estimador TEXT,
+    nivel_detalle TEXT,
+    n_puntos INTEGER NOT NULL,
+    puntos_dentro INTEGER,
+    area_dominio_km2 REAL,
+    area_estimada_km2 REAL NOT NULL,
+    error_estandar_km2 REAL,
+    area_real_km2 REAL,
+    error_relativo_porcentaje REAL,
+    tiempo_simulacion REAL,
+    tiempos_etapas TEXT,
+    host TEXT,
+    plataforma TEXT,
+    cpus INTEGER,
+    version_python TEXT,
+    version_numpy TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_corridas_pais ON corridas(pais);
+CREATE INDEX IF NOT EXISTS idx_corridas_motor ON corridas(motor);
+CREATE INDEX IF NOT EXISTS idx_corridas_muestreador ON corridas(muestreador);
+CREATE INDEX IF NOT EXISTS idx_corridas_n_puntos ON corridas(n_puntos);
+"""
+
+# Columnas agregadas después de la primera versión del esquema: se añaden a
+# las bases existentes (sus corridas anteriores quedan en NULL; las de país
+# usaban el nivel de detalle 110m)
+_COLUMNAS_AGREGADAS = {
+    'nivel_detalle': "TEXT"
+}
+
+# Filtros admitidos por las consultas -> condición SQL
+_FILTROS = {
+    'pais': "pais = ?",
+    'motor': "motor = ?",
+    'muestreador': "muestreador = ?",
+    'metodo': "metodo = ?",
+    'origen': "origen = ?",
+    'nivel_detalle': "nivel_detalle = ?",
+    'desde': "fecha >= ?"
+}
+
+_HOST = {
+    'host': socket.gethostname(),
+    'plataforma': platform.platform(),
+    'cpus': os.cpu_count(),
+    'version_python': platform.python_version(),
+    'version_numpy': np.__version__
+}
+
+_esquema_creado = set()
+
+
+def _conectar():
+    """Conexión nueva por operación (sqlite3 no comparte conexiones entre hilos)."""
+    if os.path.dirname(HISTORIAL_DB_PATH):
+        os.makedirs(os.path.dirname(HISTORIAL_DB_PATH), exist_ok=True)
+    conexion = sqlite3.connect(HISTORIAL_DB_PATH, timeout=10)
+    conexion.row_factory = sqlite3.Row
+    if HISTORIAL_DB_PATH not in _esquema_creado:
+        conexion.execute("PRAGMA journal_mode=WAL")
+        conexion.executescript(_ESQUEMA)
+        existentes = {fila['name'] for fila in conexion.execute("PRAGMA table_info(corridas)")}
+        for columna, tipo in _COLUMNAS_AGREGADAS.items():
+            if columna not in existentes:
+                conexion.execute(f"ALTER TABLE corridas ADD COLUMN {columna} {tipo}")
+        _esquema_creado.add(HISTORIAL_DB_PATH)
+    return conexion
+
+
+def registrar_corrida(origen, pais, metodo, resultados, area_real=0, estimador=None, tiempos_etapas=None,
+                      nivel_detalle=None):
+    """
+    Guarda una corrida con sus parámetros, conteos, estimación, error
+    respecto del área de referencia, tiempos por etapa y datos del equipo.
+
+    Args:
+        origen: quién la ejecutó ('api', 'cli_v2', ...)
+        resultados: dict del simulador (montecarlo o retícula)
+        nivel_detalle: geometría usada (ver config.NIVELES_DETALLE); None
+            para polígonos que no salen del dataset
+
+    Returns:
+        id de la corrida
+    """
+    area_estimada = resultados['area_estimada_km2']
+    error_relativo = abs(area_estimada - area_real) / area_real * 100 if area_real > 0 else None
+    area_dominio = resultados.get('area_dominio_m2', resultados.get('area_bbox_m2'))
+
+    fila = {
+        'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'origen': origen,
+        'pais': pais,
+        'metodo': metodo,
+        'motor': resultados.get('motor'),
+        'muestreador': resultados.get('muestreador'),
+        'estimador': estimador,
+        'nivel_detalle': nivel_detalle,
+        'n_puntos': int(resultados['n_puntos']),
+        'puntos_dentro': int(resultados['puntos_dentro']) if 'puntos_dentro' in resultados else None,
+        'area_dominio_km2': area_dominio / 1_000_000 if area_dominio is not None else None,
+        'area_estimada_km2': float(area_estimada),
+        'error_estandar_km2': resultados.get('error_estandar_km2'),
+        'area_real_km2': area_real or None,
+        'error_relativo_porcentaje': error_relativo,
+        'tiempo_simulacion': resultados.get('tiempo_simulacion'),
+        'tiempos_etapas': json.dumps(tiempos_etapas) if tiempos_etapas else None,
+        **_HOST
+    }
+
+    columnas = ", ".join(fila)
+    marcadores = ", ".join("?" for _ in fila)
+    with closing(_conectar()) as conexion, conexion:
+        cursor = conexion.execute(f"INSERT INTO corridas ({columnas}) VALUES ({marcadores})", list(fila.values()))
+        return cursor.lastrowid
+
+
+def _condiciones(filtros):
+    """WHERE y parámetros a partir de los filtros no nulos."""
+    activos = {clave: valor for clave, valor in filtros.items() if valor is not None}
+    desconocidos = set(activos) - set(_FILTROS)
+    if desconocidos:
+        raise ValueError(f"Filtros no válidos: {', '.join(sorted(desconocidos))}")
+    if not activos:
+        return "", []
+    return "WHERE " + " AND ".join(_FILTROS[clave] for clave in activos), list(activos.values())
+
+
+def _consultar(sql, parametros):
+    with closing(_conectar()) as conexion:
+        return [dict(fila) for fila in conexion.execute(sql, parametros)]
+
+
+def listar_corridas(limite=100, **filtros):
+    """Corridas más recientes que cumplen los filtros."""
+    where, parametros = _condiciones(filtros)
+    filas = _consultar(f"SELECT * FROM corridas {where} ORDER BY id DESC LIMIT ?", parametros + [limite])
+    for fila in filas:
+        fila['tiempos_etapas'] = json.loads(fila['tiempos_etapas']) if fila['tiempos_etapas'] else None
+    return filas
+
+
+def error_por_n(**filtros):
+    """Error relativo medio (y su dispersión) agrupado por país, nivel de detalle, motor, muestreador y N."""
+    where, parametros = _condiciones(filtros)
+    where = f"{where} AND" if where else "WHERE"
+    filas = _consultar(f"""
+        SELECT pais, nivel_detalle, motor, muestreador, n_puntos,
+               COUNT(*) AS corridas,
+               AVG(error_relativo_porcentaje) AS error_relativo_medio,
+               AVG(error_relativo_porcentaje * error_relativo_porcentaje) AS error_cuadratico_medio,
+               AVG(error_estandar_km2) AS error_estandar_medio_km2
+        FROM corridas {where} error_relativo_porcentaje IS NOT NULL
+        GROUP BY pais, nivel_detalle, motor, muestreador, n_puntos
+        ORDER BY pais, nivel_detalle, motor, muestreador, n_puntos
+    """, parametros)
+    for fila in filas:
+        fila['raiz_error_cuadratico_medio'] = float(np.sqrt(fila.pop('error_cuadratico_medio')))
+    return filas
+
+
+def rendimiento(agrupacion='dia', **filtros):
+    """Puntos por segundo agregados por día (u hora) y motor."""
+    formatos = {'dia': "%Y-%m-%d", 'hora': "%Y-%m-%dT%H"}
+    if agrupacion not in formatos:
+        raise ValueError("agrupacion debe ser 'dia' u 'hora'")
+
+    where, parametros = _condiciones(filtros)
+    where = f"{where} AND" if where else "WHERE"
+    return _consultar(f"""
+        SELECT strftime('{formatos[agrupacion]}', fecha) AS periodo, motor, muestreador, host,
+               COUNT(*) AS corridas,
+               SUM(n_puntos) AS n_puntos,
+               SUM(tiempo_simulacion) AS tiempo_total,
+               SUM(n_puntos) / SUM(tiempo_simulacion) AS puntos_por_segundo
+        FROM corridas {where} tiempo_simulacion > 0
+        GROUP BY periodo, motor, muestreador, host
+        ORDER BY periodo, motor, muestreador
+    """, parametros)
+
+
+def estimacion_combinada(pais, **filtros):
+    """
+    Combina todas las corridas de Monte Carlo de un país sin calcular nada
+    nuevo. Las corridas con el mismo dominio de muestreo suman sus conteos
+    (equivale a una sola corrida con la N total); los grupos de dominios
+    distintos se combinan ponderando por el inverso de su varianza.
+
+    Cada nivel de detalle es un polígono distinto con su propia área: sin
+    el filtro nivel_detalle se combina solo el nivel con más puntos.
+
+    Returns:
+        dict con la estimación combinada y el detalle por dominio, o None si
+        no hay corridas
+    """
+    filtros = {**filtros, 'pais': pais, 'metodo': "montecarlo"}
+    where, parametros = _condiciones(filtros)
+    grupos = _consultar(f"""
+        SELECT nivel_detalle, muestreador, ROUND(area_dominio_km2, 3) AS area_dominio_km2,
+               COUNT(*) AS corridas, SUM(n_puntos) AS n_puntos, SUM(puntos_dentro) AS puntos_dentro,
+               MAX(area_real_km2) AS area_real_km2
+        FROM corridas {where} AND puntos_dentro IS NOT NULL
+        GROUP BY nivel_detalle, muestreador, ROUND(area_dominio_km2, 3)
+    """, parametros)
+    if not grupos:
+        return None
+
+    puntos_por_nivel = {}
+    for grupo in grupos:
+        puntos_por_nivel[grupo['nivel_detalle']] = puntos_por_nivel.get(grupo['nivel_detalle'], 0) + grupo['n_puntos']
+    nivel = max(puntos_por_nivel, key=puntos_por_nivel.get)
+    grupos = [grupo for grupo in grupos if grupo['nivel_detalle'] == nivel]
+
+    for grupo in grupos:
+        p = grupo['puntos_dentro'] / grupo['n_puntos']
+        grupo['area_estimada_km2'] = grupo['area_dominio_km2'] * p
+        grupo['error_estandar_km2'] = grupo['area_dominio_km2'] * np.sqrt(p * (1 - p) / grupo['n_puntos'])
+
+    # Ponderación por inverso de la varianza (un grupo con p = 0 o 1 no tiene
+    # varianza estimable: si no hay otro, se usa el de mayor N)
+    validos = [grupo for grupo in grupos if grupo['error_estandar_km2'] > 0]
+    if validos:
+        pesos = np.array([1 / grupo['error_estandar_km2'] ** 2 for grupo in validos])
+        area = float(np.sum(pesos * [grupo['area_estimada_km2'] for grupo in validos]) / pesos.sum())
+        error_estandar = float(np.sqrt(1 / pesos.sum()))
+    else:
+        mayor = max(grupos, key=lambda grupo: grupo['n_puntos'])
+        area, error_estandar = mayor['area_estimada_km2'], 0.0
+
+    area_real = max((grupo['area_real_km2'] or 0) for grupo in grupos)
+    return {
+        'pais': pais,
+        'nivel_detalle': nivel,
+        'corridas': sum(grupo['corridas'] for grupo in grupos),
+        'n_puntos': sum(grupo['n_puntos'] for grupo in grupos),
+        'area_estimada_km2': area,
+        'error_estandar_km2': error_estandar,
+        'area_real_km2': area_real or None,
+        'error_relativo_porcentaje': abs(area - area_real) / area_real * 100 if area_real else None,
+        'grupos': grupos
+    }
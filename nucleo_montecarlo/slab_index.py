@@ -0,0 +1,121 @@
+"""
+============================================================================
+ÍNDICE DE FRANJAS (SLABS)
+Descomposición horizontal del polígono para clasificar puntos en O(log E)
+============================================================================
+"""
+
+import numpy as np
+
+
+def _extraer_aristas(poligono):
+    """Devuelve las aristas (x0, y0, x1, y1) de todos los anillos del polígono."""
+    partes = getattr(poligono, 'geoms', [poligono])
+
+    aristas = []
+    for parte in partes:
+        for anillo in [parte.exterior, *parte.interiors]:
+            coords = np.asarray(anillo.coords, dtype=np.float64)
+            aristas.append(np.hstack([coords[:-1], coords[1:]]))
+
+    return np.vstack(aristas)
+
+
+def construir_indice_slabs(poligono):
+    """
+    Construye el índice de franjas horizontales de un polígono proyectado.
+
+    Los vértices se ordenan por Y y cada par de valores consecutivos define
+    una franja. Dentro de una franja las aristas no se cruzan, así que se
+    guardan ordenadas por X (formato CSR: desplazamientos + arreglos planos).
+
+    Args:
+        poligono: Polygon o MultiPolygon de shapely
+
+    Returns:
+        dict con los arreglos del índice
+    """
+    aristas = _extraer_aristas(poligono)
+
+    # Las aristas horizontales no cruzan ninguna franja
+    aristas = aristas[aristas[:, 1] != aristas[:, 3]]
+    x0, y0, x1, y1 = aristas.T
+
+    ys = np.unique(np.concatenate([y0, y1]))
+
+    y_min = np.minimum(y0, y1)
+    y_max = np.maximum(y0, y1)
+
+    # Cada arista cubre las franjas [inicio, fin)
+    inicio = np.searchsorted(ys, y_min)
+    fin = np.searchsorted(ys, y_max)
+    cantidad = fin - inicio
+
+    id_arista = np.repeat(np.arange(len(aristas)), cantidad)
+    desplazamiento = np.arange(len(id_arista)) - np.repeat(np.cumsum(cantidad) - cantidad, cantidad)
+    id_franja = np.repeat(inicio, cantidad) + desplazamiento
+
+    pendiente = (x1 - x0) / (y1 - y0)
+
+    # Ordenar por franja y, dentro de cada franja, por X en su altura media
+    y_media = (ys[id_franja] + ys[id_franja + 1]) / 2
+    x_media = x0[id_arista] + (y_media - y0[id_arista]) * pendiente[id_arista]
+    orden = np.lexsort((x_media, id_franja))
+
+    id_arista = id_arista[orden]
+    conteo = np.bincount(id_franja, minlength=len(ys) - 1)
+
+    return {
+        'ys': ys,
+        'offsets': np.concatenate([[0], np.cumsum(conteo)]),
+        'x0': x0[id_arista],
+        'y0': y0[id_arista],
+        'pendiente': pendiente[id_arista],
+        'max_aristas_franja': int(conteo.max()) if len(conteo) else 0
+    }
+
+
+def clasificar_puntos_slabs(indice, x, y):
+    """
+    Clasifica un lote de puntos con el índice de franjas.
+
+    La primera búsqueda binaria (np.searchsorted) ubica la franja de cada
+    punto; la segunda, vectorizada sobre todo el lote, cuenta cuántas aristas
+    de la franja quedan a la izquierda del punto. Un conteo impar indica que
+    el punto está dentro.
+
+    Returns:
+        ndarray booleano con True para los puntos dentro del polígono
+    """
+    ys = indice['ys']
+    offsets = indice['offsets']
+
+    franja = np.searchsorted(ys, y, side='right') - 1
+    valido = (franja >= 0) & (franja < len(ys) - 1)
+
+    dentro = np.zeros(len(x), dtype=bool)
+    if not valido.any():
+        return dentro
+
+    px = x[valido]
+    py = y[valido]
+    franja = franja[valido]
+
+    bajo = offsets[franja]
+    alto = offsets[franja + 1]
+    inicio = bajo.copy()
+
+    # Búsqueda binaria de la primera arista con X >= px
+    for _ in range(int(np.ceil(np.log2(indice['max_aristas_franja'] + 1)))):
+        activo = bajo < alto
+        if not activo.any():
+            break
+        medio = (bajo + alto) // 2
+        m = np.where(activo, medio, 0)
+        x_arista = indice['x0'][m] + (py - indice['y0'][m]) * indice['pendiente'][m]
+        izquierda = activo & (x_arista < px)
+        bajo = np.where(izquierda, medio + 1, bajo)
+        alto = np.where(activo & ~izquierda, medio, alto)
+
+    dentro[valido] = (bajo - inicio) % 2 == 1
+    return dentro